@@ -85,6 +85,7 @@
 
         'reports/report_visitor_request.xml',
         'views/mygate_visitor_views.xml',
+        'views/gate_event_views.xml',
         'views/mygate_billing_portal_templates.xml',
         'views/corpus_fund_invoice_views.xml',
         # new files
@@ -92,6 +93,15 @@
 
         # 'views/assets.xml',
         'data/overdue_reminder_cron.xml',
+        'data/gate_pass_expiry_cron.xml',
+        'data/gate_event_rollup_cron.xml',
+        'data/gate_credential_data.xml',
+        'data/family_member_qr_cron.xml',
+        'data/visitor_qr_cron.xml',
+        'data/notice_board_data.xml',
+        'data/community_post_data.xml',
+        'data/community_post_view_cron.xml',
+        'data/community_kpi_snapshot_cron.xml',
         # 'views/conctable_data_views.xml',
         'views/mygate_room_booking.xml',
         'views/membership_card_views.xml',
@@ -22,4 +22,5 @@ from . import community_post_controller
 from . import mygate_approval_portal
 from . import child_exit_permission_controllers
 from . import mygate_billing_portal
-from . import portal_multi_flat
\ No newline at end of file
+from . import portal_multi_flat
+from . import gate_verify
\ No newline at end of file
@@ -3,11 +3,21 @@ from odoo import http
 from odoo.http import request
 import json
 from datetime import datetime, timedelta
-import random
 
 
 class ChildExitPermissionController(http.Controller):
 
+    def _find_permission_by_code(self, access_code, states, log_scan=False):
+        """Resolve a child exit permission in the guard's community through the gate credential registry"""
+        community = request.env['gate.credential']._get_gate_community()
+        credential = request.env['gate.credential'].sudo()._resolve(access_code, community)
+        permission = request.env['child.exit.permission']
+        if credential.pass_type == 'child_exit' and credential.pass_state in states:
+            permission = permission.browse(credential.res_id).exists()
+        if log_scan:
+            request.env['gate.event']._log_scan(access_code, credential, community.id, allowed=bool(permission))
+        return permission
+
     # ====================
     # PORTAL/WEBSITE ROUTES
     # ====================
@@ -121,9 +131,6 @@ class ChildExitPermissionController(http.Controller):
             duration_hours = int(duration)
             valid_until = allowed_exit_time + timedelta(hours=duration_hours)
 
-            # Generate access code
-            access_code = str(random.randint(100000, 999999))
-
             # Create permission record
             permission = request.env['child.exit.permission'].create({
                 'child_id': child.id,
@@ -134,12 +141,11 @@ class ChildExitPermissionController(http.Controller):
                 'allowed_exit_time': allowed_exit_time,
                 'valid_until': valid_until,
                 'purpose': purpose.strip(),
-                'access_code': access_code,
                 'state': 'active',
             })
 
             # Return success message with access code
-            success_msg = f"Permission created successfully! Access Code: {access_code}"
+            success_msg = f"Permission created successfully! Access Code: {permission.access_code}"
             return request.redirect(f'/my/child-exit-permissions?success={success_msg}')
 
         except Exception as e:
@@ -225,9 +231,6 @@ class ChildExitPermissionController(http.Controller):
             duration_hours = int(duration)
             valid_until = allowed_exit_time + timedelta(hours=duration_hours)
 
-            # Generate access code
-            access_code = str(random.randint(100000, 999999))
-
             # Create permission record
             permission = request.env['child.exit.permission'].create({
                 'child_id': child.id,
@@ -238,7 +241,6 @@ class ChildExitPermissionController(http.Controller):
                 'allowed_exit_time': allowed_exit_time,
                 'valid_until': valid_until,
                 'purpose': purpose.strip(),
-                'access_code': access_code,
                 'state': 'active',
             })
 
@@ -274,10 +276,7 @@ class ChildExitPermissionController(http.Controller):
     def api_verify_permission(self, access_code, **kwargs):
         """Public API to verify a permission by access code (for security guards)"""
         try:
-            permission = request.env['child.exit.permission'].search([
-                ('access_code', '=', access_code),
-                ('state', '=', 'active')
-            ], limit=1)
+            permission = self._find_permission_by_code(access_code, ['active'], log_scan=True)
 
             if permission:
                 response = {
@@ -312,10 +311,7 @@ class ChildExitPermissionController(http.Controller):
     def api_mark_exited(self, access_code, **kwargs):
         """API to mark child as exited"""
         try:
-            permission = request.env['child.exit.permission'].search([
-                ('access_code', '=', access_code),
-                ('state', '=', 'active')
-            ], limit=1)
+            permission = self._find_permission_by_code(access_code, ['active'])
 
             if permission:
                 permission.action_mark_exited()
@@ -340,10 +336,7 @@ class ChildExitPermissionController(http.Controller):
     def api_mark_returned(self, access_code, **kwargs):
         """API to mark child as returned"""
         try:
-            permission = request.env['child.exit.permission'].search([
-                ('access_code', '=', access_code),
-                ('state', '=', 'used')
-            ], limit=1)
+            permission = self._find_permission_by_code(access_code, ['used'])
 
             if permission:
                 permission.action_mark_returned()
@@ -4,6 +4,9 @@ from werkzeug.exceptions import NotFound
 import base64
 import json
 
+# Image fields of community.post served by /community/post/<id>/image/<field>
+POST_IMAGE_FIELDS = ('image', 'image_1024', 'image_512')
+
 
 class CommunityPortalController(http.Controller):
 
@@ -70,20 +73,8 @@ class CommunityPortalController(http.Controller):
         if not post.exists() or not post.active:
             raise NotFound()
 
-        # Record view (only once per user)
-        View = request.env['community.post.view'].sudo()
-        existing_view = View.search([
-            ('post_id', '=', post.id),
-            ('user_id', '=', user.id)
-        ], limit=1)
-
-        if not existing_view:
-            View.create({
-                'post_id': post.id,
-                'user_id': user.id,
-            })
-            # Force recompute of view_count
-            post._compute_view_count()
+        # Record view (only once per user), staged and counted by the view cron
+        request.env['community.post.view'].sudo()._buffer_view(post.id, user.id)
 
         # Check if current user liked this post
         is_liked = bool(request.env['community.post.like'].sudo().search([
@@ -118,6 +109,22 @@ class CommunityPortalController(http.Controller):
 
         return request.render("community_management.community_post_detail_template", values)
 
+    @http.route('/community/post/<int:post_id>/image/<string:field>', type='http', auth="user")
+    def community_post_image(self, post_id, field, unique=None, **kwargs):
+        """Serve a post image from its attachment, cached long-term when versioned by ``unique``"""
+        if field not in POST_IMAGE_FIELDS:
+            raise NotFound()
+        post = request.env['community.post'].sudo().browse(post_id)
+        if not post.exists() or not post.active:
+            raise NotFound()
+
+        stream = request.env['ir.binary']._get_image_stream_from(post, field)
+        send_file_kwargs = {}
+        if unique:
+            send_file_kwargs['immutable'] = True
+            send_file_kwargs['max_age'] = http.STATIC_CACHE_LONG
+        return stream.get_response(**send_file_kwargs)
+
     @http.route('/community/post/like', type='json', auth="user")
     def like_post(self, post_id, **kwargs):
         """Like/Unlike a post via AJAX"""
@@ -146,9 +153,6 @@ class CommunityPortalController(http.Controller):
             })
             action = 'liked'
 
-        # Force recompute of like_count
-        post._compute_like_count()
-
         return {
             'action': action,
             'like_count': post.like_count,
@@ -174,9 +178,6 @@ class CommunityPortalController(http.Controller):
             'content': content.strip()
         })
 
-        # Force recompute of comment_count
-        post._compute_comment_count()
-
         return {
             'success': True,
             'comment_count': post.comment_count,
@@ -207,9 +208,6 @@ class CommunityPortalController(http.Controller):
         # Archive the comment
         comment.write({'active': False})
 
-        # Force recompute of comment_count
-        post._compute_comment_count()
-
         return {
             'success': True,
             'comment_count': post.comment_count
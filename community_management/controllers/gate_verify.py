@@ -0,0 +1,77 @@
+from odoo import http
+from odoo.http import request
+import json
+import logging
+
+_logger = logging.getLogger(__name__)
+
+GATE_USER_GROUP = 'community_management.group_community_security_guard'
+
+
+class GateVerifyController(http.Controller):
+
+    def _is_gate_user(self):
+        """Gate codes are only resolved for security guards, so they cannot be enumerated"""
+        return request.env.user.has_group(GATE_USER_GROUP)
+
+    @http.route('/api/gate/verify/<string:access_code>', type='http', auth='user', methods=['GET'], csrf=False)
+    def api_gate_verify(self, access_code, **kwargs):
+        """Resolve any gate code (visitor, child exit, guest invite, cab, delivery) with one lookup"""
+        if not self._is_gate_user():
+            return request.make_json_response({
+                'success': False,
+                'error': 'Access denied'
+            }, status=403)
+        try:
+            # Scoped to the guard's own community, whatever the client sends
+            community = request.env['gate.credential']._get_gate_community()
+            credential = request.env['gate.credential'].sudo()._resolve(access_code, community)
+            request.env['gate.event']._log_scan(access_code, credential, community.id)
+            if not credential:
+                return json.dumps({
+                    'success': False,
+                    'error': 'Code not found or no longer valid'
+                })
+            return json.dumps({
+                'success': True,
+                'data': credential._prepare_verify_data()
+            })
+
+        except Exception:
+            _logger.exception("Gate verification failed for code %s", access_code)
+            return json.dumps({
+                'success': False,
+                'error': 'Verification failed'
+            })
+
+    @http.route('/api/gate/admit/<string:access_code>', type='json', auth='user', methods=['POST'], csrf=False)
+    def api_gate_admit(self, access_code, **kwargs):
+        """Admit a pass at the gate, enforcing its own entry rules (e.g. cab entries per day)"""
+        if not self._is_gate_user():
+            return {
+                'success': False,
+                'error': 'Access denied'
+            }
+        try:
+            community = request.env['gate.credential']._get_gate_community()
+            credential = request.env['gate.credential'].sudo()._resolve(access_code, community)
+            gate_pass = credential._get_pass() if credential else False
+            if not gate_pass:
+                request.env['gate.event']._log_scan(access_code, credential, community.id, allowed=False)
+                return {
+                    'success': False,
+                    'error': 'Code not found or no longer valid'
+                }
+            allowed, reason = gate_pass._admit_gate_entry()
+            return {
+                'success': allowed,
+                'error': reason,
+                'data': credential._prepare_verify_data(),
+            }
+
+        except Exception:
+            _logger.exception("Gate admission failed for code %s", access_code)
+            return {
+                'success': False,
+                'error': 'Admission failed'
+            }
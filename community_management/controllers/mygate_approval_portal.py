@@ -1,14 +1,22 @@
 from odoo import http, fields
 from odoo.http import request, Response
-from odoo.addons.portal.controllers.portal import CustomerPortal, pager as portal_pager
+from odoo.addons.portal.controllers.portal import CustomerPortal
 from odoo.exceptions import AccessError, MissingError
 import logging
-import qrcode
-from io import BytesIO
 import base64
+from urllib.parse import urlencode
+
+from .portal_keyset import keyset_search
 
 _logger = logging.getLogger(__name__)
 
+# /my/visitors lists: state filter -> visitor states
+VISITOR_STATE_FILTERS = {
+    'pending': ['pending'],
+    'approved': ['approved'],
+    'completed': ['completed', 'rejected', 'cancelled'],
+}
+
 
 class MyGatePortal(CustomerPortal):
 
@@ -29,8 +37,14 @@ class MyGatePortal(CustomerPortal):
         values['pending_visitors_count'] = request.env['mygate.visitor'].search_count(domain)
         return values
 
-    @http.route(['/my/visitors', '/my/visitors/page/<int:page>'], type='http', auth="user", website=True)
-    def portal_my_visitors(self, page=1, date_begin=None, date_end=None, sortby=None, **kw):
+    @http.route(['/my/visitors/page/<int:page>'], type='http', auth="user", website=True)
+    def portal_my_visitors_page(self, page, **kw):
+        """Former offset pages: the lists are now paged by cursor from the first page"""
+        url_args = {key: kw[key] for key in ('sortby', 'state') if kw.get(key)}
+        return request.redirect('/my/visitors%s' % ('?%s' % urlencode(url_args) if url_args else ''), code=301)
+
+    @http.route(['/my/visitors'], type='http', auth="user", website=True)
+    def portal_my_visitors(self, date_begin=None, date_end=None, sortby=None, cursor=None, **kw):
         values = self._prepare_portal_layout_values()
         Visitor = request.env['mygate.visitor']
 
@@ -41,55 +55,53 @@ class MyGatePortal(CustomerPortal):
         # Domain for current user's visitors - based on tenant (partner)
         domain = [('tenant_id', '=', partner.id)]
 
-        # Handle state filter from URL
+        # Each list is searched with its own state filter and shows one page;
+        # the filtered list (the history by default) is paged on by cursor,
+        # the others link to their filtered view
         state_filter = kw.get('state')
-        if state_filter:
-            if state_filter == 'pending':
-                domain.append(('state', '=', 'pending'))
-            elif state_filter == 'approved':
-                domain.append(('state', '=', 'approved'))
-            elif state_filter == 'completed':
-                domain.append(('state', 'in', ['completed', 'rejected', 'cancelled']))
-
-        # Search visitors
+        if state_filter not in VISITOR_STATE_FILTERS:
+            state_filter = None
+
         searchbar_sortings = {
             'date': {'label': 'Newest', 'order': 'create_date desc'},
             'name': {'label': 'Name', 'order': 'name asc'},
             'arrival': {'label': 'Arrival Time', 'order': 'expected_arrival asc'},
         }
 
-        if not sortby:
+        if sortby not in searchbar_sortings:
             sortby = 'date'
         order = searchbar_sortings[sortby]['order']
 
-        # Count for pager
-        visitor_count = Visitor.search_count(domain)
-
-        # Pager
-        pager = portal_pager(
-            url="/my/visitors",
-            url_args={'date_begin': date_begin, 'date_end': date_end, 'sortby': sortby, 'state': state_filter},
-            total=visitor_count,
-            page=page,
-            step=self._items_per_page
-        )
-
-        # Get visitors
-        visitors = Visitor.search(domain, order=order, limit=self._items_per_page, offset=pager['offset'])
-
-        # Group visitors by status (only if no filter applied)
-        pending_visitors = visitors.filtered(lambda v: v.state == 'pending')
-        approved_visitors = visitors.filtered(lambda v: v.state == 'approved')
-        history_visitors = visitors.filtered(lambda v: v.state in ['completed', 'rejected', 'cancelled'])
+        paged_key = state_filter or 'completed'
+        url_args = {key: value for key, value in {'sortby': sortby, 'state': state_filter}.items() if value}
+        lists = dict.fromkeys(VISITOR_STATE_FILTERS, Visitor)
+        view_all_urls = dict.fromkeys(VISITOR_STATE_FILTERS, False)
+        next_cursor = False
+        for key, states in VISITOR_STATE_FILTERS.items():
+            if state_filter and state_filter != key:
+                continue
+            state_domain = domain + [('state', 'in', states)]
+            page_cursor = cursor if key == paged_key else None
+            lists[key], key_cursor = keyset_search(Visitor, state_domain, order, page_cursor, self._items_per_page)
+            if key == paged_key:
+                next_cursor = key_cursor
+            elif key_cursor:
+                view_all_urls[key] = '/my/visitors?%s' % urlencode(dict(url_args, state=key))
+
+        pager = {
+            'first_url': '/my/visitors?%s' % urlencode(url_args) if cursor else False,
+            'next_url': '/my/visitors?%s' % urlencode(dict(url_args, cursor=next_cursor)) if next_cursor else False,
+        }
 
         values.update({
-            'visitors': visitors,
-            'pending_visitors': pending_visitors,
-            'approved_visitors': approved_visitors,
-            'history_visitors': history_visitors,
+            'visitors': lists['pending'] | lists['approved'] | lists['completed'],
+            'pending_visitors': lists['pending'],
+            'approved_visitors': lists['approved'],
+            'history_visitors': lists['completed'],
             'page_name': 'visitors',
             'default_url': '/my/visitors',
             'pager': pager,
+            'view_all_urls': view_all_urls,
             'searchbar_sortings': searchbar_sortings,
             'sortby': sortby,
             'today': fields.Date.today(),
@@ -107,10 +119,6 @@ class MyGatePortal(CustomerPortal):
         except (AccessError, MissingError):
             return request.redirect('/my/visitors')
 
-        # Generate QR code if not exists
-        if visitor_sudo.state == 'approved' and not visitor_sudo.qr_code:
-            visitor_sudo._generate_qr_code()
-
         values = {
             'visitor': visitor_sudo,
             'page_name': 'visitor_detail',
@@ -270,41 +278,29 @@ class MyGatePortal(CustomerPortal):
         }
         return request.render("community_management.mygate_success_page", values)
 
-    @http.route(['/mygate/qr/<string:access_code>'], type='http', auth="public")
+    @http.route(['/mygate/qr/<string:access_code>'], type='http', auth="user")
     def generate_qr_code(self, access_code, **kwargs):
-        """Generate QR code image"""
+        """Serve the QR code image, revalidated through ETag / Last-Modified"""
         try:
-            visitor = request.env['mygate.visitor'].sudo().search([
-                ('access_code', '=', access_code)
-            ], limit=1)
+            # Codes are only unique per community: residents get their own
+            # passes, staff the ones their record rules let them read
+            domain = [('access_code', '=', access_code)]
+            if not request.env.user._is_internal():
+                domain.append(('tenant_id', '=', request.env.user.partner_id.id))
+            visitor = request.env['mygate.visitor'].search(domain, limit=1).sudo()
 
             if not visitor:
                 return Response("Visitor not found", status=404)
 
-            # Generate QR code
-            qr_data = f"VISITOR:{visitor.name}:{visitor.access_code}:{visitor.flat_id.name}"
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(qr_data)
-            qr.make(fit=True)
-
-            img = qr.make_image(fill_color="#2c3e50", back_color="white")
-
-            # Save to response
-            buffered = BytesIO()
-            img.save(buffered, format="PNG")
-
-            return Response(
-                buffered.getvalue(),
+            # Rendering is cached per payload; unchanged images answer 304
+            response = Response(
+                visitor._render_gate_qr_png(visitor._get_gate_qr_payload()),
                 mimetype='image/png',
-                headers=[('Cache-Control', 'no-cache, no-store, must-revalidate'),
-                         ('Pragma', 'no-cache'),
-                         ('Expires', '0')]
+                headers=[('Cache-Control', 'private, max-age=60, must-revalidate')]
             )
+            response.set_etag(visitor._get_gate_qr_etag())
+            response.last_modified = visitor.gate_qr_date or visitor.create_date
+            return response.make_conditional(request.httprequest)
 
         except Exception as e:
             _logger.error(f"Error generating QR code: {e}")
@@ -317,13 +313,15 @@ class MyGatePortal(CustomerPortal):
         if not access_code:
             return request.render("community_management.mygate_verify_form", {})
 
-        visitor = request.env['mygate.visitor'].sudo().search([
-            ('access_code', '=', access_code),
-            ('state', '=', 'approved'),
-        ], limit=1)
+        community = request.env['gate.credential']._get_gate_community()
+        credential = request.env['gate.credential'].sudo()._resolve(access_code, community)
+        visitor = request.env['mygate.visitor'].sudo()
+        if credential.pass_type == 'visitor' and credential.pass_state == 'approved':
+            visitor = credential._get_pass()
 
         current_time = fields.Datetime.now()
         is_valid = visitor and visitor.valid_until and visitor.valid_until >= current_time
+        request.env['gate.event']._log_scan(access_code, credential, community.id, allowed=bool(is_valid))
 
         values = {
             'visitor': visitor,
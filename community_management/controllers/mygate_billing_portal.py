@@ -23,12 +23,6 @@ class MyGateBillingPortal(CustomerPortal):
         partner = request.env.user.partner_id
         AccountMove = request.env['account.move']
 
-        domain = [
-            ('move_type', '=', 'out_invoice'),
-            ('partner_id', '=', partner.id),
-            ('state', '=', 'posted')
-        ]
-
         searchbar_sortings = {
             'date': {'label': 'Date', 'order': 'invoice_date desc'},
             'name': {'label': 'Reference', 'order': 'name desc'},
@@ -38,39 +32,37 @@ class MyGateBillingPortal(CustomerPortal):
             sortby = 'date'
         order = searchbar_sortings[sortby]['order']
 
-        invoice_count = AccountMove.search_count(domain)
+        # Totals come from one grouped query (or the balance cache); only the
+        # outstanding bills and one page of paid bills are loaded
+        Balance = request.env['portal.balance.cache'].sudo()
+        balance = Balance._get_balance(partner)
 
         pager = portal_pager(
             url="/my/bills",
             url_args={'date_begin': date_begin, 'date_end': date_end, 'sortby': sortby},
-            total=invoice_count,
+            total=balance['paid_count'],
             page=page,
             step=self._items_per_page
         )
 
-        invoices = AccountMove.search(domain, order=order, limit=self._items_per_page, offset=pager['offset'])
-
-        # Separating Paid vs Unpaid for the dashboard
-        unpaid_invoices = request.env['account.move'].sudo().search(
-            domain + [('payment_state', 'in', ['not_paid', 'partial'])])
-        paid_invoices = request.env['account.move'].sudo().search(
-            domain + [('payment_state', 'in', ['paid', 'in_payment', 'reversed'])])
+        unpaid_domain = Balance._get_invoice_domain(partner, paid=False)
+        unpaid_invoices = AccountMove.sudo().search(unpaid_domain, order=order)
+        paid_invoices = AccountMove.sudo().search(
+            Balance._get_invoice_domain(partner, paid=True),
+            order=order, limit=self._items_per_page, offset=pager['offset'])
 
         # CRASH FIX: Calculate Overdue Invoices to satisfy Odoo's native breadcrumb logic
         today = fields.Date.today()
-        overdue_invoice_count = len(
-            unpaid_invoices.filtered(lambda inv: inv.invoice_date_due and inv.invoice_date_due < today))
-
-        total_due = sum((inv.amount_residual or 0.0) for inv in unpaid_invoices)
-        total_paid = sum((inv.amount_total or 0.0) for inv in paid_invoices)
+        overdue_invoice_count = AccountMove.sudo().search_count(
+            unpaid_domain + [('invoice_date_due', '<', today)])
 
         values.update({
             'date': date_begin,
-            'invoices': invoices,
+            'invoices': paid_invoices,
             'unpaid_invoices': unpaid_invoices,
             'paid_invoices': paid_invoices,
-            'total_due': total_due,
-            'total_paid': total_paid,
+            'total_due': balance['amount_due'],
+            'total_paid': balance['amount_paid'],
             'page_name': 'invoice',
             'overdue_invoice_count': overdue_invoice_count,  # Fixes the NoneType Error
             'filterby': filterby or 'all',  # Fixes the Filterby Error
@@ -1,6 +1,6 @@
 import base64
 from odoo import http
-from odoo.http import request
+from odoo.http import request, Response
 
 
 class ResidentAccessRequestPortal(http.Controller):
@@ -72,6 +72,19 @@ class ResidentAccessRequestPortal(http.Controller):
         except Exception as e:
             return request.redirect(f"/resident/request?error={str(e)}")
 
+    @http.route('/resident/hierarchy', type='http', auth='public', methods=['GET'])
+    def get_hierarchy(self, **kw):
+        """Community/building/floor/vacant flat tree of the request form, revalidated through ETag"""
+        Community = request.env['community.management'].sudo()
+        version = Community._get_access_hierarchy_version()
+        if request.httprequest.if_none_match.contains(version):
+            response = Response(status=304)
+        else:
+            response = request.make_json_response(Community._get_access_hierarchy(version))
+        response.set_etag(version)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
     # JSON endpoints for dynamic dropdowns
     @http.route('/resident/get_buildings', type='json', auth='public')
     def get_buildings(self, community_id):
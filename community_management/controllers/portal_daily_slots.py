@@ -11,27 +11,9 @@ class PortalDailySlots(http.Controller):
         search_name = kw.get('search_name', '').strip()
         search_category = kw.get('search_category', '').strip()
 
-        domain = [('category_custom_id', '!=', False)]
-
-        # 🔍 NEW: NAME SEARCH
-        if search_name:
-            domain += [('name', 'ilike', search_name)]
-
-        # 🔍 NEW: CATEGORY SEARCH
-        if search_category:
-            domain += [('category_custom_id.name', 'ilike', search_category)]
-
-        # YOUR EXISTING CODE (unchanged)
-        contacts = request.env['res.partner'].sudo().search(domain)
-
-        slots_data = []
-        for contact in contacts:
-            available_slots = contact.daily_slot_ids.filtered('is_available')
-            if available_slots:
-                slots_data.append({
-                    'contact': contact,
-                    'slots': available_slots,
-                })
+        # Name, category and availability are matched in a single query
+        slots_data = request.env['res.partner.daily.slot'].sudo()._search_available(
+            name=search_name, category=search_category)
 
         # 🔍 NEW: Pass search terms to template
         return request.render("community_management.portal_daily_slots_template", {
@@ -0,0 +1,69 @@
+import base64
+import json
+from datetime import date, datetime
+
+from odoo import fields
+
+
+def _encode_cursor(value, record_id):
+    if isinstance(value, datetime):
+        # Full precision: create_date & co. keep microseconds, and rows of
+        # the same second would be skipped by a truncated cursor
+        value = value.isoformat()
+    elif isinstance(value, date):
+        value = fields.Date.to_string(value)
+    payload = json.dumps([value, record_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def _decode_cursor(cursor, field):
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        value, record_id = json.loads(payload)
+        if value and field.type == 'datetime':
+            value = datetime.fromisoformat(value)
+        return value, int(record_id)
+    except (ValueError, TypeError):
+        return None
+
+
+def _keyset_domain(fname, descending, value, record_id):
+    """Rows strictly after (value, id) in ``fname``/``id`` order.
+
+    PostgreSQL sorts NULLs last ascending and first descending, which is
+    where the rows with an empty ``fname`` are placed here as well.
+    """
+    op = '<' if descending else '>'
+    if value in (None, False):
+        if descending:
+            return ['|', (fname, '!=', False), '&', (fname, '=', False), ('id', op, record_id)]
+        return [(fname, '=', False), ('id', op, record_id)]
+    after = ['|', (fname, op, value), '&', (fname, '=', value), ('id', op, record_id)]
+    if descending:
+        return after
+    return ['|', (fname, '=', False)] + after
+
+
+def keyset_search(model, domain, order, cursor=None, limit=20):
+    """Search one page of ``model`` following ``cursor``.
+
+    ``order`` is a single ``"field [asc|desc]"`` clause; ``id`` is appended
+    as tie-breaker so that pages never overlap. Unlike offset paging, the
+    cost of a page does not grow with its position in the history.
+
+    :return: ``(records, next_cursor)``, ``next_cursor`` being ``False`` on
+        the last page
+    """
+    fname, _sep, direction = order.strip().partition(' ')
+    descending = direction.strip().lower() == 'desc'
+    direction = 'desc' if descending else 'asc'
+    if cursor:
+        key = _decode_cursor(cursor, model._fields[fname])
+        if key:
+            domain = list(domain) + _keyset_domain(fname, descending, *key)
+    records = model.search(domain, order='%s %s, id %s' % (fname, direction, direction), limit=limit + 1)
+    if len(records) <= limit:
+        return records, False
+    records = records[:limit]
+    last = records[-1]
+    return records, _encode_cursor(last[fname], last.id)
@@ -3,162 +3,137 @@ from odoo import http, fields
 from odoo.http import request
 import base64
 import logging
-import random
-import string
 import urllib.parse
 from datetime import datetime
 
+from .portal_keyset import keyset_search
+
 _logger = logging.getLogger(__name__)
 
 
+# Records listed on /my/my-properties for the selected flat: section -> (model, order)
+FLAT_SECTION_MODELS = {
+    'family_members': ('family.member', None),
+    'pets': ('pet.management', None),
+    'vehicles': ('vehicle.management', None),
+    'visitors': ('mygate.visitor', 'create_date desc'),
+    'child_permissions': ('child.exit.permission', 'create_date desc'),
+    'delivery_passes': ('community.delivery.pass', 'create_date desc'),
+    'visiting_helps': ('community.visiting.help.entry', 'create_date desc'),
+    'amenity_bookings': ('community.amenity.booking', 'booking_date desc'),
+    'guest_invites': ('guest.invite', 'create_date desc'),
+    'party_invites': ('party.group.invite', 'create_date desc'),
+    'cab_preapprovals': ('cab.preapproval', 'create_date desc'),
+}
+
+# Sections rendered with the page; the others are fetched once scrolled into view
+PROPERTY_PRIMARY_SECTIONS = ('notices', 'visitors', 'family_members')
+PROPERTY_LAZY_SECTIONS = (
+    'amenity_bookings', 'delivery_passes', 'visiting_helps', 'guest_invites', 'party_invites',
+    'cab_preapprovals', 'child_permissions', 'service_providers', 'pets', 'vehicles',
+)
+# Pass history sections, listed by pages of PROPERTY_SECTION_PAGE_SIZE newest first
+PROPERTY_PAGED_SECTIONS = (
+    'visitors', 'child_permissions', 'delivery_passes', 'guest_invites', 'party_invites', 'cab_preapprovals',
+)
+PROPERTY_SECTION_PAGE_SIZE = 20
+
+
 class MultiPropertyPortal(http.Controller):
 
-    @http.route(['/my/my-properties'], type='http', auth="user", website=True)
-    def portal_my_properties(self, property_id=None, **kwargs):
+    def _get_portal_flats(self):
+        """Flats where the current user is tenant or lease owner"""
         partner = request.env.user.partner_id
-
-        # Get all flats where user is tenant or lease owner
-        flats = request.env['flat.management'].sudo().search([
+        return request.env['flat.management'].sudo().search([
             '|',
             ('tenant_id', '=', partner.id),
             ('lease_owner_id', '=', partner.id)
         ])
 
-        selected_flat = None
-        family_members = []
-        pets = []
-        vehicles = []
-        notices = []
-        visitors = []
-        child_permissions = []
-        service_providers = []
-        guest_invites = []
-        amenities = []
-        amenity_bookings = []
-        party_invites = []
-        delivery_passes = []
-        visiting_helps = []
-        visiting_categories = []
-        week_days = []
-
-        cab_preapprovals = []  # <-- NEW VARIABLE FOR CAB PRE-APPROVALS
-
-        if property_id:
-            try:
-                selected_flat = request.env['flat.management'].sudo().browse(int(property_id))
-
-                if selected_flat and selected_flat in flats:
-                    family_members = request.env['family.member'].sudo().search([('flat_id', '=', selected_flat.id)])
-                    pets = request.env['pet.management'].sudo().search([('flat_id', '=', selected_flat.id)])
-                    vehicles = request.env['vehicle.management'].sudo().search([('flat_id', '=', selected_flat.id)])
-
-                    # --- LOAD NOTICES ---
-                    now = fields.Datetime.now()
-                    domain = [
-                        ('active', '=', True),
-                        '|', ('community_id', '=', False), ('community_id', '=', selected_flat.community_id.id),
-                        '|', ('date_start', '=', False), ('date_start', '<=', now),
-                        '|', ('date_end', '=', False), ('date_end', '>=', now),
-                    ]
-                    raw_notices = request.env['property.notice.board'].sudo().search(domain, order='date_start desc')
-                    for n in raw_notices:
-                        if not n.target_flat_ids or selected_flat in n.target_flat_ids:
-                            notices.append(n)
-
-                    # --- LOAD VISITORS ---
-                    visitors = request.env['mygate.visitor'].sudo().search([('flat_id', '=', selected_flat.id)],
-                                                                           order='create_date desc')
-                    for v in visitors:
-                        if v.state == 'approved' and not v.access_code:
-                            v.sudo().write({'access_code': ''.join(random.choices(string.digits, k=6))})
-
-                    # --- LOAD CHILD EXIT PERMISSIONS ---
-                    child_permissions = request.env['child.exit.permission'].sudo().search(
-                        [('flat_id', '=', selected_flat.id)], order='create_date desc')
-
-                    # --- LOAD DELIVERY PASSES ---
-                    delivery_passes = request.env['community.delivery.pass'].sudo().search([
-                        ('flat_id', '=', selected_flat.id)
-                    ], order='create_date desc')
-
-                    # --- LOAD VISITING HELPS ---
-                    visiting_helps = request.env['community.visiting.help.entry'].sudo().search([
-                        ('flat_id', '=', selected_flat.id)
-                    ], order='create_date desc')
-
-                    # Load Dropdowns for forms
-                    visiting_categories = request.env['community.visiting.help.category'].sudo().search(
-                        [('active', '=', True)])
-                    week_days = request.env['community.week.day'].sudo().search([])
-
-
-
-
-
-
-
-                    # --- LOAD SERVICE PROVIDERS ---
-                    service_providers = request.env['res.partner'].sudo().search([
-                        ('community_id', '=', selected_flat.community_id.id),
-                        ('category_custom_id', '!=', False),
-                        ('daily_slot_ids', '!=', False)
-                    ])
-
-                    # --- LOAD AMENITIES & BOOKINGS ---
-                    amenities = request.env['community.amenity'].sudo().search([
-                        ('active', '=', True),
-                        '|', ('community_id', '=', False), ('community_id', '=', selected_flat.community_id.id)
-                    ])
-                    amenity_bookings = request.env['community.amenity.booking'].sudo().search([
-                        ('flat_id', '=', selected_flat.id)
-                    ], order='booking_date desc')
-
-                    # --- LOAD GUEST INVITES ---
-                    guest_invites = request.env['guest.invite'].sudo().search([
-                        ('flat_id', '=', selected_flat.id)
-                    ], order='create_date desc')
-
-                    # --- LOAD PARTY GROUP INVITES ---
-                    party_invites = request.env['party.group.invite'].sudo().search([
-                        ('flat_id', '=', selected_flat.id)
-                    ], order='create_date desc')
-
-                    # --- LOAD CAB PRE-APPROVALS ---
-                    cab_preapprovals = request.env['cab.preapproval'].sudo().search([
-                        ('flat_id', '=', selected_flat.id)
-                    ], order='create_date desc')
-
+    def _get_portal_flat(self, flat_id, flats=None):
+        """The flat ``flat_id`` if the current user may see it, else an empty recordset"""
+        if flats is None:
+            flats = self._get_portal_flats()
+        try:
+            flat_id = int(flat_id)
+        except (ValueError, TypeError):
+            return flats.browse()
+        return flats.filtered(lambda f: f.id == flat_id)
+
+    def _load_property_sections(self, flat, sections, cursors=None):
+        """Fetch the records of the given /my/my-properties sections for a flat.
+
+        Each section is a single query on its model, whatever the number of
+        records; the related fields the templates read are then prefetched
+        for the whole section at once. Paged sections start after their
+        cursor in ``cursors`` and also get a ``<section>_pager`` value.
+        """
+        cursors = cursors or {}
+        values = {}
+        for section in sections:
+            if section == 'notices':
+                Notice = request.env['property.notice.board'].sudo()
+                values[section] = Notice.search(Notice._get_visible_domain(flat), order='date_start desc')
+            elif section == 'service_providers':
+                values[section] = request.env['res.partner'].sudo().search([
+                    ('community_id', '=', flat.community_id.id),
+                    ('category_custom_id', '!=', False),
+                    ('daily_slot_ids', '!=', False)
+                ])
+            else:
+                model, order = FLAT_SECTION_MODELS[section]
+                Model = request.env[model].sudo()
+                domain = [('flat_id', '=', flat.id)]
+                if section in PROPERTY_PAGED_SECTIONS:
+                    cursor = cursors.get(section)
+                    values[section], next_cursor = keyset_search(
+                        Model, domain, order, cursor, PROPERTY_SECTION_PAGE_SIZE)
+                    values['%s_pager' % section] = {'cursor': cursor, 'next_cursor': next_cursor}
                 else:
-                    selected_flat = None
-            except (ValueError, TypeError):
-                selected_flat = None
+                    values[section] = Model.search(domain, order=order)
+        return values
+
+    @http.route(['/my/my-properties'], type='http', auth="user", website=True)
+    def portal_my_properties(self, property_id=None, **kwargs):
+        flats = self._get_portal_flats()
+        selected_flat = self._get_portal_flat(property_id, flats) if property_id else None
+
+        values = dict.fromkeys(PROPERTY_PRIMARY_SECTIONS + PROPERTY_LAZY_SECTIONS, [])
+        if selected_flat:
+            values.update(self._load_property_sections(selected_flat, PROPERTY_PRIMARY_SECTIONS))
+        else:
+            selected_flat = None
 
-        return request.render('community_management.portal_my_properties_template', {
+        values.update({
             'flats': flats,
             'selected_flat': selected_flat,
-            'family_members': family_members,
-            'pets': pets,
-            'vehicles': vehicles,
-            'notices': notices,
-            'visitors': visitors,
-            'child_permissions': child_permissions,
-            'service_providers': service_providers,
-            'guest_invites': guest_invites,
-            'party_invites': party_invites,
-            'cab_preapprovals': cab_preapprovals,
+            'unread_notice_count': request.env.user.partner_id.get_unread_notice_count() if flats else 0,
             'page_name': 'my_properties',
-            'pet_types': request.env['pet.management']._fields['pet_type'].selection,
-            'genders': request.env['pet.management']._fields['gender'].selection,
-            'vehicle_types': request.env['vehicle.management']._fields['vehicle_type'].selection,
-            'delivery_passes': delivery_passes,
-            'visiting_helps': visiting_helps,
-            'visiting_categories': visiting_categories,
-            'week_days': week_days,
-            'delivery_modes': request.env['community.delivery.pass']._fields['mode'].selection,
-            'visiting_entry_types': request.env['community.visiting.help.entry']._fields['entry_type'].selection,
-            'amenities': amenities,
-            'amenity_bookings': amenity_bookings,
         })
+        return request.render('community_management.portal_my_properties_template', values)
+
+    @http.route(['/my/my-properties/<int:flat_id>/sections'], type='json', auth="user", website=True)
+    def portal_my_properties_sections(self, flat_id, sections=None, cursors=None, **kwargs):
+        """Render the requested sections of /my/my-properties, as ``{section: html}``.
+
+        Secondary sections are loaded here once scrolled into view; paged
+        sections are re-rendered from the given ``{section: cursor}``.
+        """
+        flat = self._get_portal_flat(flat_id)
+        sections = [
+            section for section in (sections or [])
+            if section in PROPERTY_LAZY_SECTIONS or section in PROPERTY_PAGED_SECTIONS
+        ]
+        if not flat or not sections:
+            return {}
+        values = self._load_property_sections(flat, sections, cursors if isinstance(cursors, dict) else None)
+        return {
+            section: request.env['ir.ui.view']._render_template(
+                'community_management.portal_my_properties_section_%s' % section,
+                {'selected_flat': flat, section: values[section], 'section_pager': values.get('%s_pager' % section)},
+            )
+            for section in sections
+        }
 
     # =====================================================
     # CAB PRE-APPROVAL PORTAL
@@ -552,8 +527,6 @@ class MultiPropertyPortal(http.Controller):
         if not visitor.exists(): return request.redirect('/my/my-properties?error=visitor_not_found')
         if visitor.flat_id.tenant_id != partner and visitor.flat_id.lease_owner_id != partner:
             return request.redirect('/my/my-properties?error=access_denied')
-        if visitor.state == 'approved' and not visitor.access_code:
-            visitor.sudo().write({'access_code': ''.join(random.choices(string.digits, k=6))})
         return request.render('community_management.portal_visitor_detail', {
             'visitor': visitor, 'flat': visitor.flat_id, 'page_name': 'visitor_detail',
         })
@@ -564,11 +537,7 @@ class MultiPropertyPortal(http.Controller):
         visitor = request.env['mygate.visitor'].sudo().browse(visitor_id)
         if visitor.exists() and (visitor.flat_id.tenant_id == partner or visitor.flat_id.lease_owner_id == partner):
             if visitor.state == 'pending':
-                if hasattr(visitor, 'action_approve'):
-                    visitor.action_approve()
-                else:
-                    access_code = ''.join(random.choices(string.digits, k=6))
-                    visitor.sudo().write({'state': 'approved', 'access_code': access_code})
+                visitor.action_approve()
             return request.redirect('/my/visitor/%s?success=approved' % visitor.id)
         return request.redirect('/my/my-properties?error=access_denied')
 
@@ -602,6 +571,20 @@ class MultiPropertyPortal(http.Controller):
             'notice': notice, 'flat': flat, 'page_name': 'notice_detail',
         })
 
+    @http.route(['/my/notice/<int:notice_id>/read'], type='json', auth="user", methods=['POST'], website=True)
+    def portal_notice_mark_read(self, notice_id, **kwargs):
+        """Mark a notice read once its page is displayed, keeping the detail page GET read-only"""
+        partner = request.env.user.partner_id
+        flats = request.env['flat.management'].sudo().search([
+            '|', ('tenant_id', '=', partner.id), ('lease_owner_id', '=', partner.id),
+        ])
+        notice = request.env['property.notice.board'].sudo().search([
+            ('id', '=', notice_id),
+            ('visibility_ids.flat_id', 'in', flats.ids),
+        ], limit=1)
+        notice._mark_read(partner)
+        return bool(notice)
+
     # =====================================================
     # FAMILY MEMBER MANAGEMENT
     # =====================================================
@@ -738,16 +721,15 @@ class MultiPropertyPortal(http.Controller):
     @http.route(['/my/family-member/generate-all-qr'], type='http', auth="user", website=True)
     def generate_all_qr_codes(self, **kwargs):
         partner = request.env.user.partner_id
-        family_members = request.env['family.member'].sudo().search([('tenant_id', '=', partner.id)])
-        count = 0
-        for member in family_members:
-            try:
-                if not member.qr_code_image and member.resident_id:
-                    member.generate_qr_code_image()
-                    count += 1
-            except Exception as e:
-                _logger.error("Error generating QR for member %s: %s", member.name, str(e))
-        return request.redirect('/my/my-properties?success=qr_generated&count=%s' % count)
+        family_members = request.env['family.member'].sudo().search([
+            ('tenant_id', '=', partner.id),
+            ('qr_code_image', '=', False),
+            ('qr_pending', '=', False),
+            ('resident_id', '!=', False),
+        ])
+        # Rendered by the QR cron, the request only queues them
+        family_members._queue_qr_code_image()
+        return request.redirect('/my/my-properties?success=qr_queued&count=%s' % len(family_members))
 
     # =====================================================
     # PET MANAGEMENT PORTAL
@@ -4,35 +4,35 @@ from odoo.http import request
 
 class PortalSecurityGuards(http.Controller):
 
-    @http.route(['/my/community_management', '/my/community_management/<int:page>'],
+    # /my/community_management/<page> is the former pager URL, kept for existing links
+    @http.route(['/my/community_management', '/my/community_management/page/<int:page>',
+                 '/my/community_management/<int:page>'],
                 type='http', auth="user", website=True)
     def portal_community_management(self, page=1, **kw):
+        Partner = request.env['res.partner'].sudo()
+
         # Community Roles
         community_domain = [('community_role', '!=', False),
                             ('community_role', '!=', ''),
                             ('active', '=', True)]
-        all_community_members = request.env['res.partner'].sudo().search(community_domain)
+        community_members = Partner.search(community_domain)
 
-        # Security Guards
+        # Security Guards, paged in the database
         security_domain = [('is_security_guard', '=', True), ('active', '=', True)]
-        all_security_guards = request.env['res.partner'].sudo().search(security_domain)
+        security_guard_count = Partner.search_count(security_domain)
 
         pager = request.website.pager(
             url="/my/community_management",
-            total=len(all_community_members) + len(all_security_guards),
+            total=security_guard_count,
             page=page,
             step=12
         )
-
-        offset = pager.get('offset', 0)
-        limit = pager.get('limit', 12)
-
-        community_members = all_community_members[offset:offset + limit]
-        security_guards = all_security_guards[offset:offset + limit]
+        security_guards = Partner.search(security_domain, limit=12, offset=pager['offset'])
 
         return request.render("community_management.portal_community_management_template", {
-            'community_members': all_community_members,
-            'security_guards': all_security_guards,
+            'community_members': community_members,
+            'security_guards': security_guards,
+            'security_guard_count': security_guard_count,
             'pager': pager,
         })
 
@@ -21,6 +21,11 @@ from . import resident_request
 from . import festival
 from . import res_partner
 from . import daily_slot
+from . import gate_code_allocator
+from . import gate_credential
+from . import gate_event
+from . import gate_audit
+from . import portal_balance
 from . import guest_invite
 from . import party_group_invite
 from . import cab_preapproval
@@ -41,4 +46,5 @@ from . import saas_dashboard
 # from . import conctable_data
 from . import mygate_room_booking
 from . import membership_card
-from . import property_venture
\ No newline at end of file
+from . import property_venture
+from . import community_kpi_snapshot
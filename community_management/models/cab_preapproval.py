@@ -1,12 +1,19 @@
 from odoo import models, fields, api
+from odoo.tools import SQL
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
 
 class CabPreapproval(models.Model):
     _name = 'cab.preapproval'
     _description = 'Cab Pre-Approval'
+    _inherit = ['gate.credential.mixin']
     _order = 'create_date desc'
 
+    # Gate credential registry
+    _gate_pass_type = 'cab'
+    _gate_auto_code = True
+    _gate_expire_states = {'active': 'expired'}
+
     resident_id = fields.Many2one(
         'res.partner', string='Resident', required=True,
         default=lambda self: self.env.user.partner_id, ondelete='cascade'
@@ -42,7 +49,9 @@ class CabPreapproval(models.Model):
 
     state = fields.Selection([('draft', 'Draft'), ('active', 'Active'), ('cancelled', 'Cancelled'), ('expired', 'Expired')], default='draft')
     start_datetime = fields.Datetime(string='Valid From', readonly=True)
-    end_datetime = fields.Datetime(string='Valid Till', readonly=True)
+    end_datetime = fields.Datetime(string='Valid Till', readonly=True, index=True)
+
+    access_code = fields.Char(string='Gate Code', readonly=True, copy=False)
 
     def _compute_range(self):
         self.ensure_one()
@@ -68,18 +77,100 @@ class CabPreapproval(models.Model):
             return start_dt, end_dt
 
     def action_activate(self):
+        self._ensure_gate_codes()
         for rec in self:
             start_dt, end_dt = rec._compute_range()
-            rec.write({'start_datetime': start_dt, 'end_datetime': end_dt, 'state': 'active'})
+            rec.write({
+                'start_datetime': start_dt,
+                'end_datetime': end_dt,
+                'state': 'active',
+            })
 
     def action_cancel(self):
         self.write({'state': 'cancelled'})
 
     @api.model
     def cron_expire_cab_approvals(self):
-        now = fields.Datetime.now()
-        expired = self.search([('state', '=', 'active'), ('end_datetime', '<', now)])
-        expired.write({'state': 'expired'})
+        return self._expire_gate_passes()
+
+    def _on_gate_passes_expired(self, from_state):
+        super()._on_gate_passes_expired(from_state)
+        self.env['cab.preapproval.entry'].sudo().search([('preapproval_id', 'in', self.ids)]).unlink()
+
+    def _get_entry_limit(self):
+        """Entries allowed per day, or False when unlimited"""
+        self.ensure_one()
+        if self.mode == 'once':
+            return 1
+        if self.entries_per_day == 'multi':
+            return False
+        return int(self.entries_per_day or 1)
+
+    def _get_gate_local_time(self, now):
+        """``now`` (naive UTC) in the time zone of the gate.
+
+        Allowed hours and daily quotas are local: the guard's time zone is
+        used, else the resident's.
+        """
+        self.ensure_one()
+        tz = self.env.user.tz or self.resident_id.tz or 'UTC'
+        return fields.Datetime.context_timestamp(self.with_context(tz=tz), now)
+
+    def _check_gate_admission(self, now):
+        allowed, reason = super()._check_gate_admission(now)
+        if not allowed:
+            return allowed, reason
+        local_now = self._get_gate_local_time(now)
+        if self.mode == 'frequent':
+            if self.freq_days == 'weekdays' and local_now.weekday() >= 5:
+                return False, 'Pass is only valid on weekdays'
+            hour = local_now.hour + local_now.minute / 60.0
+            if not self.freq_time_from <= hour <= self.freq_time_to:
+                return False, 'Pass is outside its allowed hours'
+        if not self.env['cab.preapproval.entry']._consume(self, local_now.date(), self._get_entry_limit()):
+            return False, 'Daily entry limit reached'
+        return True, ''
+
+
+class CabPreapprovalEntry(models.Model):
+    """Entries used by a cab pre-approval on a given day"""
+    _name = 'cab.preapproval.entry'
+    _description = 'Cab Pre-Approval Daily Entries'
+    _order = 'date desc'
+
+    _sql_constraints = [
+        ('preapproval_date_uniq', 'unique(preapproval_id, date)', 'Only one entry counter per pass and day!'),
+    ]
+
+    preapproval_id = fields.Many2one('cab.preapproval', string='Cab Pre-Approval', required=True,
+                                     ondelete='cascade', readonly=True)
+    date = fields.Date(string='Date', required=True, readonly=True)
+    entry_count = fields.Integer(string='Entries', readonly=True)
+
+    @api.model
+    def _consume(self, preapproval, date, limit):
+        """Check and count one entry in a single statement.
+
+        The upsert locks the counter row, so concurrent guards cannot both
+        take the last entry. Returns False once ``limit`` is reached.
+        """
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO cab_preapproval_entry (preapproval_id, date, entry_count, create_uid, create_date,
+                                               write_uid, write_date)
+            VALUES (%(preapproval_id)s, %(date)s, 1, %(uid)s, NOW() AT TIME ZONE 'UTC',
+                    %(uid)s, NOW() AT TIME ZONE 'UTC')
+            ON CONFLICT (preapproval_id, date) DO UPDATE
+               SET entry_count = cab_preapproval_entry.entry_count + 1,
+                   write_date = EXCLUDED.write_date
+             WHERE %(limit)s IS NULL OR cab_preapproval_entry.entry_count < %(limit)s
+         RETURNING entry_count
+            """,
+            preapproval_id=preapproval.id, date=date, uid=self.env.uid, limit=limit or None,
+        ))
+        consumed = bool(self.env.cr.fetchone())
+        self.invalidate_model(['entry_count'])
+        return consumed
 
 # from odoo import models, fields, api
 # from datetime import datetime
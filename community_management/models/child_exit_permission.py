@@ -9,9 +9,19 @@ _logger = logging.getLogger(__name__)
 class ChildExitPermission(models.Model):
     _name = 'child.exit.permission'
     _description = 'Child Exit Permission'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    # gate.audit.mixin must precede mail.thread to switch its tracking off
+    _inherit = ['gate.audit.mixin', 'mail.thread', 'mail.activity.mixin', 'gate.credential.mixin']
     _order = 'create_date desc'
 
+    # Gate credential registry
+    _gate_pass_type = 'child_exit'
+    _gate_auto_code = True
+    _gate_live_states = ('draft', 'active', 'used')
+    _gate_valid_from_field = 'allowed_exit_time'
+    _gate_valid_until_field = 'valid_until'
+    _gate_sync_depends = ('duration_hours', 'custom_duration_hours')
+    _gate_expire_states = {'active': 'expired'}
+
     # Basic Information
     name = fields.Char(
         string='Permission Name',
@@ -98,6 +108,7 @@ class ChildExitPermission(models.Model):
         string='Valid Until',
         compute='_compute_valid_until',
         store=True,
+        index=True,
         tracking=True
     )
 
@@ -132,7 +143,6 @@ class ChildExitPermission(models.Model):
         string='Access Code',
         copy=False,
         tracking=True,
-        default=lambda self: self._generate_access_code()
     )
 
     # Quick reference fields
@@ -216,11 +226,6 @@ class ChildExitPermission(models.Model):
                 raise ValidationError(_('Allowed exit time must be in the future.'))
 
     # Methods
-    def _generate_access_code(self):
-        """Generate unique 6-digit access code"""
-        import random
-        return str(random.randint(100000, 999999))
-
     # Action Methods
     def action_activate(self):
         """Activate the permission"""
@@ -232,19 +237,21 @@ class ChildExitPermission(models.Model):
 
     def action_mark_exited(self):
         """Mark child as exited"""
-        for record in self:
-            if record.state == 'active':
-                record.state = 'used'
-                record.exit_time = fields.Datetime.now()
-                record._send_notification('exited')
+        exited = self.filtered(lambda r: r.state == 'active')
+        for record in exited:
+            record.state = 'used'
+            record.exit_time = fields.Datetime.now()
+            record._send_notification('exited')
+        exited._log_gate_events('exit')
 
     def action_mark_returned(self):
         """Mark child as returned"""
-        for record in self:
-            if record.state == 'used':
-                record.state = 'expired'
-                record.return_time = fields.Datetime.now()
-                record._send_notification('returned')
+        returned = self.filtered(lambda r: r.state == 'used')
+        for record in returned:
+            record.state = 'expired'
+            record.return_time = fields.Datetime.now()
+            record._send_notification('returned')
+        returned._log_gate_events('entry')
 
     def action_cancel(self):
         """Cancel the permission"""
@@ -268,15 +275,12 @@ class ChildExitPermission(models.Model):
     # Cron job to expire permissions
     def _cron_check_expired_permissions(self):
         """Check and expire permissions"""
-        expired_permissions = self.search([
-            ('state', '=', 'active'),
-            ('valid_until', '<', fields.Datetime.now())
-        ])
+        return self._expire_gate_passes()
 
-        for permission in expired_permissions:
-            permission.state = 'expired'
+    def _on_gate_passes_expired(self, from_state):
+        super()._on_gate_passes_expired(from_state)
+        for permission in self:
             permission._send_notification('expired')
-            _logger.info(f"Auto-expired permission: {permission.name}")
 
     # Portal access control
     def _portal_can_access(self):
@@ -1,4 +1,11 @@
-from odoo import models, fields, api
+import hashlib
+
+from odoo import models, fields, api, tools
+from odoo.tools import SQL
+
+# Models whose rows make up the hierarchy served to the access-request form
+ACCESS_HIERARCHY_MODELS = ('community.management', 'building.management', 'floor.management', 'flat.management')
+
 
 class Community(models.Model):
     _name = 'community.management'
@@ -89,7 +96,39 @@ class Community(models.Model):
             'target': 'current',
         }
 
-
+    @api.model
+    def _get_access_hierarchy_version(self):
+        """Stamp of the hierarchy tables, changing with any creation, edit, deletion or occupancy change"""
+        self.env.cr.execute(SQL(" UNION ALL ").join(
+            SQL("SELECT %s, COUNT(*), MAX(write_date) FROM %s", index, SQL.identifier(self.env[model]._table))
+            for index, model in enumerate(ACCESS_HIERARCHY_MODELS)
+        ))
+        stamp = sorted(self.env.cr.fetchall())
+        return hashlib.sha256(repr(stamp).encode()).hexdigest()[:32]
+
+    @api.model
+    @tools.ormcache('version')
+    def _get_access_hierarchy(self, version):
+        """Communities with their buildings, floors and vacant flats, cached per hierarchy version"""
+        env = self.sudo().env
+        communities = {
+            community.id: {'id': community.id, 'name': community.name, 'buildings': []}
+            for community in env['community.management'].search_fetch([], ['name'])
+        }
+        buildings = {}
+        for building in env['building.management'].search_fetch(
+                [('community_id', 'in', list(communities))], ['name', 'community_id']):
+            buildings[building.id] = {'id': building.id, 'name': building.name, 'floors': [], 'flats': []}
+            communities[building.community_id.id]['buildings'].append(buildings[building.id])
+        for floor in env['floor.management'].search_fetch(
+                [('building_id', 'in', list(buildings))], ['name', 'building_id']):
+            buildings[floor.building_id.id]['floors'].append({'id': floor.id, 'name': floor.name})
+        for flat in env['flat.management'].search_fetch(
+                [('building_id', 'in', list(buildings)), ('status', '=', 'available')],
+                ['name', 'building_id', 'floor_id']):
+            buildings[flat.building_id.id]['flats'].append(
+                {'id': flat.id, 'name': flat.name, 'floor_id': flat.floor_id.id})
+        return list(communities.values())
 
 
 
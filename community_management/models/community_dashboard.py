@@ -3,6 +3,9 @@ import logging
 
 _logger = logging.getLogger(__name__)
 
+# Flats rendered per page of the explorer grid
+EXPLORER_PAGE_SIZE = 24
+
 
 class CommunityDashboard(models.TransientModel):
     _name = 'community.dashboard'
@@ -25,25 +28,112 @@ class CommunityDashboard(models.TransientModel):
     # Dynamic UI Elements
     explorer_html = fields.Html(string='Explorer Content')
 
+    # Paging of the flat grid
+    flat_page = fields.Integer(string='Flat Page', default=0)
+    has_previous_flats = fields.Boolean(string='Has Previous Flats')
+    has_next_flats = fields.Boolean(string='Has Next Flats')
+
     @api.onchange('community_id')
     def _onchange_community(self):
         self.building_id = self.floor_id = self.flat_id = False
+        self.flat_page = 0
         self._compute_explorer_data()
 
     @api.onchange('building_id')
     def _onchange_building(self):
         self.floor_id = self.flat_id = False
+        self.flat_page = 0
         self._compute_explorer_data()
 
     @api.onchange('floor_id')
     def _onchange_floor(self):
         self.flat_id = False
+        self.flat_page = 0
         self._compute_explorer_data()
 
     @api.onchange('flat_id')
     def _onchange_flat(self):
         self._compute_explorer_data()
 
+    def action_next_flats(self):
+        self.flat_page += 1
+        self._compute_explorer_data()
+
+    def action_previous_flats(self):
+        self.flat_page = max(self.flat_page - 1, 0)
+        self._compute_explorer_data()
+
+    # Explorer API: each call only reads the level being displayed
+
+    @api.model
+    def _get_explorer_flat_domain(self, community_id, building_id=False, floor_id=False):
+        domain = [('community_id', '=', community_id)]
+        if building_id:
+            domain.append(('building_id', '=', building_id))
+        if floor_id:
+            domain.append(('floor_id', '=', floor_id))
+        return domain
+
+    @api.model
+    def get_explorer_level(self, community_id, building_id=False, floor_id=False):
+        """Occupancy of the current level and of each of its children.
+
+        Children are the buildings of a community or the floors of a
+        building; a floor has none. Counts come from one grouped query.
+
+        :return: ``{'flats', 'occupied', 'children': [{'id', 'name', 'flats', 'occupied'}]}``
+        """
+        if floor_id:
+            children = self.env['floor.management']
+            child_field = False
+        elif building_id:
+            children = self.env['floor.management'].search_fetch([('building_id', '=', building_id)], ['name'])
+            child_field = 'floor_id'
+        else:
+            children = self.env['building.management'].search_fetch([('community_id', '=', community_id)], ['name'])
+            child_field = 'building_id'
+
+        groupby = [child_field, 'status'] if child_field else ['status']
+        counts = {}
+        for *child, status, count in self.env['flat.management']._read_group(
+                self._get_explorer_flat_domain(community_id, building_id, floor_id), groupby, ['__count']):
+            child_counts = counts.setdefault(child[0].id if child else False, {'flats': 0, 'occupied': 0})
+            child_counts['flats'] += count
+            if status == 'occupied':
+                child_counts['occupied'] += count
+
+        return {
+            'flats': sum(child_counts['flats'] for child_counts in counts.values()),
+            'occupied': sum(child_counts['occupied'] for child_counts in counts.values()),
+            'children': [
+                dict({'id': child.id, 'name': child.name}, **counts.get(child.id, {'flats': 0, 'occupied': 0}))
+                for child in children
+            ],
+        }
+
+    @api.model
+    def get_explorer_flats(self, community_id, building_id=False, floor_id=False, offset=0,
+                           limit=EXPLORER_PAGE_SIZE):
+        """One page of the flats of the current level, as plain values"""
+        Flat = self.env['flat.management']
+        domain = self._get_explorer_flat_domain(community_id, building_id, floor_id)
+        flats = Flat.search_fetch(domain, ['name', 'status', 'area', 'building_id', 'floor_id', 'flat_type_id'],
+                                  offset=offset, limit=limit, order='name, id')
+        return {
+            'total': Flat.search_count(domain),
+            'offset': offset,
+            'limit': limit,
+            'flats': [{
+                'id': flat.id,
+                'name': flat.name,
+                'status': flat.status,
+                'area': flat.area,
+                'building': flat.building_id.name or '',
+                'floor': flat.floor_id.name or '',
+                'flat_type': flat.flat_type_id.name or '',
+            } for flat in flats],
+        }
+
     def _compute_explorer_data(self):
         if not self.community_id:
             self.kpi_buildings = self.kpi_floors = self.kpi_flats = self.kpi_occupied = 0
@@ -51,25 +141,19 @@ class CommunityDashboard(models.TransientModel):
             self.explorer_html = "<div style='text-align:center; padding: 50px; color: #94a3b8;'><i class='fa fa-map-o fa-4x mb-3'></i><h2>Select a Community to begin exploring.</h2></div>"
             return
 
-        cid = self.community_id.id
-
-        # Base Data
-        buildings = self.env['building.management'].search([('community_id', '=', cid)])
-        floors = self.env['floor.management'].search([('building_id', 'in', buildings.ids)])
-        flats = self.env['flat.management'].search([('community_id', '=', cid)])
+        cid = self.community_id._origin.id
+        building_id = self.building_id._origin.id
+        floor_id = self.floor_id._origin.id
 
         # Calculate KPIs based on the current drill-down level
-        if self.building_id:
-            flats = flats.filtered(lambda f: f.building_id.id == self.building_id.id)
-            floors = floors.filtered(lambda f: f.building_id.id == self.building_id.id)
-        if self.floor_id:
-            flats = flats.filtered(lambda f: f.floor_id.id == self.floor_id.id)
-
-        self.kpi_buildings = len(buildings)
-        self.kpi_floors = len(floors)
-        self.kpi_flats = len(flats)
-        self.kpi_occupied = len(flats.filtered(lambda f: f.status == 'occupied'))
+        level = self.get_explorer_level(cid, building_id, floor_id)
+        self.kpi_buildings = self.env['building.management'].search_count([('community_id', '=', cid)])
+        floor_domain = [('building_id', '=', building_id)] if building_id else [('building_id.community_id', '=', cid)]
+        self.kpi_floors = self.env['floor.management'].search_count(floor_domain)
+        self.kpi_flats = level['flats']
+        self.kpi_occupied = level['occupied']
         self.occupancy_rate = (self.kpi_occupied / self.kpi_flats * 100) if self.kpi_flats else 0.0
+        self.has_previous_flats = self.has_next_flats = False
 
         # Build Premium HTML Explorer
         html_output = ""
@@ -118,26 +202,47 @@ class CommunityDashboard(models.TransientModel):
 
         # SCENARIO 2: Viewing Multiple Flats/Floors
         else:
+            # Occupancy of the buildings (or floors) of the current level
+            if level['children']:
+                child_label = 'Floors' if building_id else 'Buildings'
+                html_output += f"<h3 style='color: #0f172a; font-weight: 800; margin-bottom: 20px;'><i class='fa fa-building-o text-primary'></i> {child_label}</h3>"
+                html_output += "<div style='display: grid; grid-template-columns: repeat(auto-fill, minmax(200px, 1fr)); gap: 15px; margin-bottom: 30px;'>"
+                for child in level['children']:
+                    rate = (child['occupied'] / child['flats'] * 100) if child['flats'] else 0.0
+                    html_output += f"""
+                    <div style="background: white; border: 1px solid #e2e8f0; border-radius: 16px; padding: 16px; box-shadow: 0 4px 6px rgba(0,0,0,0.02);">
+                        <h4 style="margin: 0; font-weight: 800; color: #1e293b;">{child['name']}</h4>
+                        <p style="color: #64748b; font-weight: 600; font-size: 0.85rem; margin: 5px 0 10px 0;">{child['occupied']} / {child['flats']} occupied</p>
+                        <div style="height: 8px; background: #fef3c7; border-radius: 4px; overflow: hidden;"><div style="width: {rate}%; height: 100%; background: #10b981;"></div></div>
+                    </div>
+                    """
+                html_output += "</div>"
+
+            # Only the current page of flats is read and rendered
+            page = self.get_explorer_flats(cid, building_id, floor_id, offset=self.flat_page * EXPLORER_PAGE_SIZE)
+            self.has_previous_flats = page['offset'] > 0
+            self.has_next_flats = page['offset'] + len(page['flats']) < page['total']
+
             html_output += "<h3 style='color: #0f172a; font-weight: 800; margin-bottom: 20px;'><i class='fa fa-th-large text-primary'></i> Property Grid View</h3>"
             html_output += "<div style='display: grid; grid-template-columns: repeat(auto-fill, minmax(250px, 1fr)); gap: 20px;'>"
 
-            for flat in flats[:20]:  # Show top 20 to prevent lag
-                status_bg = "#d1fae5" if flat.status == 'occupied' else "#fef3c7"
-                status_txt = "#059669" if flat.status == 'occupied' else "#d97706"
+            for flat in page['flats']:
+                status_bg = "#d1fae5" if flat['status'] == 'occupied' else "#fef3c7"
+                status_txt = "#059669" if flat['status'] == 'occupied' else "#d97706"
                 html_output += f"""
                 <div style="background: white; border: 1px solid #e2e8f0; border-radius: 16px; padding: 20px; text-align: center; transition: transform 0.2s; box-shadow: 0 4px 6px rgba(0,0,0,0.02);">
-                    <div style="display:inline-block; padding: 4px 12px; background: {status_bg}; color: {status_txt}; border-radius: 15px; font-weight: 800; font-size: 0.7rem; text-transform: uppercase; margin-bottom: 15px;">{flat.status}</div>
-                    <h2 style="margin: 0; font-weight: 900; color: #1e293b; font-size: 1.8rem;">{flat.name}</h2>
-                    <p style="color: #64748b; font-weight: 600; font-size: 0.9rem; margin: 5px 0 15px 0;">{flat.building_id.name} • {flat.floor_id.name}</p>
+                    <div style="display:inline-block; padding: 4px 12px; background: {status_bg}; color: {status_txt}; border-radius: 15px; font-weight: 800; font-size: 0.7rem; text-transform: uppercase; margin-bottom: 15px;">{flat['status']}</div>
+                    <h2 style="margin: 0; font-weight: 900; color: #1e293b; font-size: 1.8rem;">{flat['name']}</h2>
+                    <p style="color: #64748b; font-weight: 600; font-size: 0.9rem; margin: 5px 0 15px 0;">{flat['building']} • {flat['floor']}</p>
                     <div style="border-top: 1px solid #f1f5f9; padding-top: 15px; display: flex; justify-content: space-around;">
-                        <span style="color: #94a3b8; font-size: 0.8rem; font-weight:700;"><i class="fa fa-square-o"></i> {flat.area} sq.ft</span>
-                        <span style="color: #94a3b8; font-size: 0.8rem; font-weight:700;"><i class="fa fa-bed"></i> {flat.flat_type_id.name if flat.flat_type_id else 'N/A'}</span>
+                        <span style="color: #94a3b8; font-size: 0.8rem; font-weight:700;"><i class="fa fa-square-o"></i> {flat['area']} sq.ft</span>
+                        <span style="color: #94a3b8; font-size: 0.8rem; font-weight:700;"><i class="fa fa-bed"></i> {flat['flat_type'] or 'N/A'}</span>
                     </div>
                 </div>
                 """
             html_output += "</div>"
-            if len(flats) > 20:
-                html_output += f"<p style='text-align:center; margin-top:20px; color:#64748b; font-weight:700;'>+ {len(flats) - 20} more flats hidden. Use filters to narrow down.</p>"
+            if page['total']:
+                html_output += f"<p style='text-align:center; margin-top:20px; color:#64748b; font-weight:700;'>Showing {page['offset'] + 1}-{page['offset'] + len(page['flats'])} of {page['total']} flats</p>"
 
         self.explorer_html = html_output
 
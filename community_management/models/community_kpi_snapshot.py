@@ -0,0 +1,462 @@
+import hashlib
+import json
+from datetime import timedelta
+
+from odoo import models, fields, api, _
+from odoo.tools import SQL
+from odoo.tools.misc import format_datetime
+
+# Dashboards whose values are served from community.kpi.snapshot
+KPI_DASHBOARD_MODELS = ('community.access.dashboard', 'real.estate.dashboard', 'saas.master.dashboard')
+
+KPI_FIELD_TYPES = ('integer', 'float', 'monetary', 'html')
+
+# Snapshots whose scope was not opened for this many days are no longer
+# recomputed, and dropped after KPI_SNAPSHOT_RETENTION days
+KPI_SCOPE_IDLE_DAYS = 7
+KPI_SNAPSHOT_RETENTION = 30
+
+
+class CommunityKpiSnapshot(models.Model):
+    """Dashboard values of a community for a day and an access scope.
+
+    Values are computed with the access rights of the user who requested
+    them and shared by the users of the same scope, i.e. with the same
+    access rights and effective record rules on the counted models.
+    Snapshots are marked stale when a counted record changes in their
+    community and recomputed by a cron, triggered on change: dashboards
+    keep showing the last values with their time meanwhile. A nightly run
+    requests the new day's snapshots of the scopes in use.
+    """
+    _name = 'community.kpi.snapshot'
+    _description = 'Community KPI Snapshot'
+    _order = 'date desc, id desc'
+    _rec_name = 'community_id'
+    _log_access = False
+
+    _sql_constraints = [
+        ('snapshot_uniq', 'unique(dashboard, community_id, scope, date)',
+         'Only one snapshot per dashboard, community, access scope and day!'),
+    ]
+
+    dashboard = fields.Char(string='Dashboard', required=True, readonly=True)
+    community_id = fields.Many2one('community.management', string='Community', required=True,
+                                   ondelete='cascade', readonly=True)
+    scope = fields.Char(string='Access Scope', required=True, readonly=True)
+    user_id = fields.Many2one('res.users', string='Computed As', required=True, ondelete='cascade',
+                              readonly=True)
+    date = fields.Date(string='Date', required=True, readonly=True)
+    kpi_values = fields.Json(string='Values', readonly=True)
+    computed_at = fields.Datetime(string='As Of', readonly=True)
+    stale = fields.Boolean(string='Stale', readonly=True)
+
+    @api.model
+    def _get_kpi_fields(self, dashboard):
+        """Fields of ``dashboard`` stored in its snapshots"""
+        return [
+            fname for fname, field in dashboard._fields.items()
+            if field.type in KPI_FIELD_TYPES and not field.automatic
+            and fname not in dashboard._kpi_live_fields
+        ]
+
+    @api.model
+    def _get_source_models(self):
+        return sorted(
+            name for name, model in self.env.registry.items()
+            if not model._abstract and getattr(model, '_kpi_community_field', False)
+        )
+
+    @api.model
+    def _get_scope(self):
+        """Key of the current user's read access to the counted models.
+
+        It covers the model access rights and the record rule domains as
+        evaluated for the user, so users only share snapshots computed on
+        the very same records.
+        """
+        if self.env.su:
+            return 'superuser'
+        Access = self.env['ir.model.access']
+        Rule = self.env['ir.rule']
+        scope = []
+        for model_name in self._get_source_models():
+            readable = Access.check(model_name, 'read', raise_exception=False)
+            scope.append((model_name, readable, str(Rule._compute_domain(model_name, 'read')) if readable else ''))
+        return hashlib.sha1(repr(scope).encode()).hexdigest()
+
+    @api.model
+    def _load(self, dashboard):
+        """Fill ``dashboard`` with the last snapshot of its community for the user's scope.
+
+        A missing, stale or past day's snapshot is only requested here, to
+        be computed by the refresh cron; live fields are rendered as the user.
+        """
+        community = dashboard.community_id._origin
+        scope = self._get_scope()
+        today = fields.Date.context_today(self)
+        snapshot = self.sudo().search([
+            ('dashboard', '=', dashboard._name),
+            ('community_id', '=', community.id),
+            ('scope', '=', scope),
+            ('computed_at', '!=', False),
+        ], limit=1)
+        pending = not snapshot or snapshot.stale or snapshot.date != today
+        if pending:
+            self._request_refresh(dashboard._name, community, scope, today)
+        dashboard.update(snapshot.kpi_values or {
+            fname: False if dashboard._fields[fname].type == 'html' else 0
+            for fname in self._get_kpi_fields(dashboard)
+        })
+        dashboard.kpi_as_of = snapshot.computed_at
+        dashboard.kpi_stale = pending
+        dashboard._compute_feeds()
+
+    @api.model
+    def _request_refresh(self, dashboard_name, community, scope, date):
+        """Flag the ``date`` snapshot of a scope for the refresh cron, creating it if needed"""
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO community_kpi_snapshot (dashboard, community_id, scope, user_id, date, stale)
+            VALUES (%(dashboard)s, %(community_id)s, %(scope)s, %(uid)s, %(date)s, TRUE)
+            ON CONFLICT (dashboard, community_id, scope, date) DO UPDATE
+               SET stale = TRUE
+             WHERE NOT community_kpi_snapshot.stale
+         RETURNING id
+            """,
+            dashboard=dashboard_name, community_id=community.id, scope=scope, uid=self.env.uid, date=date,
+        ))
+        if self.env.cr.fetchone():
+            self.invalidate_model(['stale'])
+            self._trigger_refresh()
+
+    @api.model
+    def _trigger_refresh(self):
+        cron = self.env.ref('community_management.ir_cron_community_kpi_snapshot_refresh', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+
+    def _refresh(self):
+        """Recompute these snapshots with the access rights of the user each was requested by"""
+        for snapshot in self:
+            # Cleared first: a change committed while computing marks it stale again
+            self.env.cr.execute(SQL(
+                "UPDATE community_kpi_snapshot SET stale = FALSE WHERE id = %s", snapshot.id,
+            ))
+            user = snapshot.user_id
+            env = self.env(user=user.id, context=dict(self.env.context, tz=user.tz), su=False)
+            dashboard = env[snapshot.dashboard].new({'community_id': snapshot.community_id.id})
+            dashboard._compute_kpis()
+            values = {fname: dashboard[fname] for fname in self._get_kpi_fields(dashboard)}
+            self.env.cr.execute(SQL(
+                """
+                UPDATE community_kpi_snapshot
+                   SET kpi_values = %s::jsonb, computed_at = %s
+                 WHERE id = %s
+                """,
+                json.dumps(values), fields.Datetime.now(), snapshot.id,
+            ))
+        self.invalidate_recordset()
+
+    @api.model
+    def _mark_stale(self, communities):
+        """Flag the current snapshots of ``communities`` and trigger their recomputation"""
+        if not communities:
+            return
+        # Yesterday too: the current day of the dashboard users may still be
+        # yesterday in UTC
+        self.env.cr.execute(SQL(
+            """
+            UPDATE community_kpi_snapshot
+               SET stale = TRUE
+             WHERE community_id = ANY(%s)
+               AND date >= %s
+               AND NOT stale
+         RETURNING id
+            """,
+            communities.ids,
+            fields.Date.today() - timedelta(days=1),
+        ))
+        if self.env.cr.fetchall():
+            self.invalidate_model(['stale'])
+            self._trigger_refresh()
+
+    @api.model
+    def _cron_refresh(self, batch_size=50):
+        """Recompute the stale snapshots of the current days, one committed batch per run"""
+        domain = [('stale', '=', True), ('date', '>=', fields.Date.today() - timedelta(days=1))]
+        snapshots = self.search(domain, limit=batch_size)
+        snapshots._refresh()
+        self.env['ir.cron']._notify_progress(done=len(snapshots), remaining=self.search_count(domain))
+
+    @api.model
+    def _cron_reconcile(self):
+        """Request the new day's snapshots of the scopes in use and drop the old ones"""
+        today = fields.Date.today()
+        self.env.cr.execute(SQL(
+            "DELETE FROM community_kpi_snapshot WHERE date < %s", today - timedelta(days=KPI_SNAPSHOT_RETENTION),
+        ))
+        self.env.cr.execute(SQL(
+            """
+            SELECT DISTINCT ON (dashboard, community_id, scope) dashboard, community_id, scope, user_id
+              FROM community_kpi_snapshot
+             WHERE date >= %s
+          ORDER BY dashboard, community_id, scope, date DESC
+            """,
+            today - timedelta(days=KPI_SCOPE_IDLE_DAYS),
+        ))
+        for dashboard, community_id, scope, user_id in self.env.cr.fetchall():
+            user = self.env['res.users'].browse(user_id)
+            if not user.active:
+                continue
+            Snapshot = self.with_user(user).with_context(tz=user.tz)
+            # The user's access changed since: the scope is requested again on their next visit
+            if Snapshot._get_scope() != scope:
+                continue
+            Snapshot._request_refresh(dashboard, self.env['community.management'].browse(community_id),
+                                      scope, fields.Date.context_today(Snapshot))
+
+
+class CommunityKpiDashboardMixin(models.AbstractModel):
+    """Dashboard whose values are served from ``community.kpi.snapshot``.
+
+    Inheriting dashboards compute their values in ``_compute_kpis`` and
+    render the fields listed in ``_kpi_live_fields`` (e.g. recent activity
+    feeds) in ``_compute_feeds``; those are not stored in the snapshot but
+    rendered on each load with the access rights of the user.
+    """
+    _name = 'community.kpi.dashboard.mixin'
+    _description = 'Community KPI Dashboard Mixin'
+
+    _kpi_live_fields = ()
+
+    community_id = fields.Many2one('community.management', string='Community', required=True)
+    kpi_as_of = fields.Datetime(string="As Of", readonly=True)
+    kpi_stale = fields.Boolean(string="Refreshing", readonly=True)
+    kpi_status = fields.Char(string="Figures", compute='_compute_kpi_status')
+
+    @api.depends('community_id', 'kpi_as_of', 'kpi_stale')
+    def _compute_kpi_status(self):
+        for dashboard in self:
+            if not dashboard.community_id:
+                dashboard.kpi_status = False
+            elif not dashboard.kpi_as_of:
+                dashboard.kpi_status = _("Figures are being computed, check back in a moment.")
+            elif dashboard.kpi_stale:
+                dashboard.kpi_status = _("As of %s, refreshing", format_datetime(self.env, dashboard.kpi_as_of))
+            else:
+                dashboard.kpi_status = _("As of %s", format_datetime(self.env, dashboard.kpi_as_of))
+
+    def _compute_kpis(self):
+        """Compute the snapshot values of the selected community"""
+
+    def _compute_feeds(self):
+        """Render the live fields of the selected community"""
+
+
+class CommunityKpiSourceMixin(models.AbstractModel):
+    """Records counted by the community dashboards.
+
+    Creating or deleting a record marks the snapshots of its community
+    stale, and so does changing one of its ``_kpi_fields`` (the fields the
+    snapshot values depend on) or its community.
+    """
+    _name = 'community.kpi.source.mixin'
+    _description = 'Community KPI Source Mixin'
+
+    _kpi_community_field = 'community_id'
+    _kpi_fields = ()
+
+    def _mark_kpi_snapshots_stale(self):
+        self.env['community.kpi.snapshot']._mark_stale(self.mapped(self._kpi_community_field))
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        records._mark_kpi_snapshots_stale()
+        return records
+
+    def write(self, vals):
+        if not vals.keys() & {*self._kpi_fields, self._kpi_community_field.split('.')[0]}:
+            return super().write(vals)
+        # The community may follow the written fields: mark the previous and the new ones
+        communities = self.mapped(self._kpi_community_field)
+        res = super().write(vals)
+        communities |= self.mapped(self._kpi_community_field)
+        self.env['community.kpi.snapshot']._mark_stale(communities)
+        return res
+
+    def unlink(self):
+        self._mark_kpi_snapshots_stale()
+        return super().unlink()
+
+
+class Flat(models.Model):
+    _name = 'flat.management'
+    _inherit = ['flat.management', 'community.kpi.source.mixin']
+
+    _kpi_fields = ('status', 'tenant_id', 'lease_owner_id')
+
+
+class FamilyMember(models.Model):
+    _name = 'family.member'
+    _inherit = ['family.member', 'community.kpi.source.mixin']
+
+    _kpi_fields = ('flat_id',)
+
+
+class Pet(models.Model):
+    _name = 'pet.management'
+    _inherit = ['pet.management', 'community.kpi.source.mixin']
+
+    _kpi_fields = ('flat_id', 'active')
+
+
+class Vehicle(models.Model):
+    _name = 'vehicle.management'
+    _inherit = ['vehicle.management', 'community.kpi.source.mixin']
+
+    _kpi_fields = ('flat_id', 'active')
+
+
+class FlatMaintenance(models.Model):
+    _name = 'flat.maintenance'
+    _inherit = ['flat.maintenance', 'community.kpi.source.mixin']
+
+    _kpi_fields = ('status', 'invoice_ids')
+
+
+class CorpusFundInvoice(models.Model):
+    _name = 'corpus.fund.invoice'
+    _inherit = ['corpus.fund.invoice', 'community.kpi.source.mixin']
+
+    _kpi_fields = ('state', 'amount', 'invoice_id')
+
+
+class CommunityFestival(models.Model):
+    _name = 'community.festival'
+    _inherit = ['community.festival', 'community.kpi.source.mixin']
+
+    _kpi_fields = ('state', 'expense_ids')
+
+
+class CommunityExpenseLine(models.Model):
+    _name = 'community.expense.line'
+    _inherit = ['community.expense.line', 'community.kpi.source.mixin']
+
+    _kpi_fields = ('festival_id', 'amount')
+
+
+class PropertyNoticeBoard(models.Model):
+    _name = 'property.notice.board'
+    _inherit = ['property.notice.board', 'community.kpi.source.mixin']
+
+    _kpi_fields = ('active', 'notice_type')
+
+
+class ResidentAccessRequest(models.Model):
+    _name = 'resident.access.request'
+    _inherit = ['resident.access.request', 'community.kpi.source.mixin']
+
+    _kpi_fields = ('state',)
+
+
+class CommunityAmenityBooking(models.Model):
+    _name = 'community.amenity.booking'
+    _inherit = ['community.amenity.booking', 'community.kpi.source.mixin']
+
+    _kpi_fields = ('state',)
+
+
+class MyGateVisitor(models.Model):
+    _name = 'mygate.visitor'
+    _inherit = ['mygate.visitor', 'community.kpi.source.mixin']
+
+    _kpi_fields = ('flat_id', 'state', 'expected_arrival')
+
+
+class CabPreapproval(models.Model):
+    _name = 'cab.preapproval'
+    _inherit = ['cab.preapproval', 'community.kpi.source.mixin']
+
+    _kpi_fields = ('resident_id', 'state', 'mode')
+
+
+class DeliveryPass(models.Model):
+    _name = 'community.delivery.pass'
+    _inherit = ['community.delivery.pass', 'community.kpi.source.mixin']
+
+    _kpi_fields = ('resident_id', 'state', 'is_surprise', 'allow_leave_at_gate')
+
+
+class GuestInvite(models.Model):
+    _name = 'guest.invite'
+    _inherit = ['guest.invite', 'community.kpi.source.mixin']
+
+    _kpi_fields = ('resident_id', 'state', 'invite_type')
+
+
+class GuestInviteLine(models.Model):
+    _name = 'guest.invite.line'
+    _inherit = ['guest.invite.line', 'community.kpi.source.mixin']
+
+    _kpi_community_field = 'invite_id.community_id'
+    _kpi_fields = ('invite_id',)
+
+
+class PartyGroupInvite(models.Model):
+    _name = 'party.group.invite'
+    _inherit = ['party.group.invite', 'community.kpi.source.mixin']
+
+    _kpi_fields = ('host_id', 'state', 'event_date')
+
+
+class ChildExitPermission(models.Model):
+    _name = 'child.exit.permission'
+    _inherit = ['child.exit.permission', 'community.kpi.source.mixin']
+
+    _kpi_fields = ('tenant_id', 'state', 'allowed_exit_time')
+
+
+class VisitingHelpEntry(models.Model):
+    _name = 'community.visiting.help.entry'
+    _inherit = ['community.visiting.help.entry', 'community.kpi.source.mixin']
+
+    _kpi_fields = ('tenant_id', 'state', 'entry_type')
+
+
+class AccountMove(models.Model):
+    _inherit = 'account.move'
+
+    def _mark_kpi_snapshots_stale(self):
+        """Maintenance and corpus fund totals follow the payment state of their invoices"""
+        if not self.ids:
+            return
+        invoice_ids = self.env['flat.maintenance']._fields['invoice_ids']
+        self.env.cr.execute(SQL(
+            """
+            SELECT maintenance.community_id
+              FROM flat_maintenance maintenance
+              JOIN %(relation)s rel ON rel.%(column1)s = maintenance.id
+             WHERE rel.%(column2)s = ANY(%(move_ids)s)
+             UNION
+            SELECT corpus.community_id
+              FROM corpus_fund_invoice corpus
+             WHERE corpus.invoice_id = ANY(%(move_ids)s)
+            """,
+            relation=SQL.identifier(invoice_ids.relation),
+            column1=SQL.identifier(invoice_ids.column1),
+            column2=SQL.identifier(invoice_ids.column2),
+            move_ids=self.ids,
+        ))
+        community_ids = [community_id for community_id, in self.env.cr.fetchall() if community_id]
+        self.env['community.kpi.snapshot']._mark_stale(self.env['community.management'].browse(community_ids))
+
+    def _compute_payment_state(self):
+        super()._compute_payment_state()
+        self.filtered('id')._mark_kpi_snapshots_stale()
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'state' in vals:
+            self._mark_kpi_snapshots_stale()
+        return res
@@ -1,4 +1,19 @@
-from odoo import models, fields, api
+import hashlib
+import logging
+from collections import Counter
+
+from odoo import models, fields, api, tools
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+# Counters of community.post kept in sync by community.post.counter.mixin
+POST_COUNTER_FIELDS = ('like_count', 'view_count', 'comment_count')
+
+# Unlogged, unindexed staging table of the post views not counted yet,
+# drained by the view ingestion cron
+VIEW_QUEUE_TABLE = 'community_post_view_queue'
+
 
 class CommunityPost(models.Model):
     _name = 'community.post'
@@ -8,7 +23,10 @@ class CommunityPost(models.Model):
 
     name = fields.Char(string="Title", required=True, tracking=True)
     description = fields.Html(string="Content", required=True, sanitize=True)
-    image = fields.Binary(string="Image", attachment=True)
+    image = fields.Image(string="Image", max_width=1920, max_height=1920)
+    # Pre-generated sizes served to the post page and the feed cards
+    image_1024 = fields.Image(string="Image 1024", related='image', max_width=1024, max_height=1024, store=True)
+    image_512 = fields.Image(string="Image 512", related='image', max_width=512, max_height=512, store=True)
 
     author_id = fields.Many2one(
         'res.users',
@@ -23,45 +41,10 @@ class CommunityPost(models.Model):
         required=True
     )
 
-    like_count = fields.Integer(
-        string="Likes",
-        compute="_compute_like_count",
-        store=True
-    )
-
-    @api.depends()
-    def _compute_like_count(self):
-        for post in self:
-            post.like_count = self.env['community.post.like'].search_count([
-                ('post_id', '=', post.id)
-            ])
-
-    view_count = fields.Integer(
-        string="Views",
-        compute="_compute_view_count",
-        store=True
-    )
-
-    @api.depends()
-    def _compute_view_count(self):
-        for post in self:
-            post.view_count = self.env['community.post.view'].search_count([
-                ('post_id', '=', post.id)
-            ])
-
-    comment_count = fields.Integer(
-        string="Comments",
-        compute="_compute_comment_count",
-        store=True
-    )
-
-    @api.depends()
-    def _compute_comment_count(self):
-        for post in self:
-            post.comment_count = self.env['community.post.comment'].search_count([
-                ('post_id', '=', post.id),
-                ('active', '=', True)
-            ])
+    # Maintained by increments from likes, views and comments
+    like_count = fields.Integer(string="Likes", readonly=True, copy=False)
+    view_count = fields.Integer(string="Views", readonly=True, copy=False)
+    comment_count = fields.Integer(string="Comments", readonly=True, copy=False)
 
     active = fields.Boolean(default=True)
 
@@ -70,24 +53,114 @@ class CommunityPost(models.Model):
         compute="_compute_image_url",
         store=False
     )
+    image_large_url = fields.Char(
+        string="Large Image URL",
+        compute="_compute_image_url",
+        store=False
+    )
 
+    @api.depends('image_512', 'write_date')
     def _compute_image_url(self):
+        # bin_size only reads the attachment sizes, not the images
+        has_image = {post.id: bool(post.image_512) for post in self.with_context(bin_size=True)}
         for post in self:
-            if post.image:
-                try:
-                    if isinstance(post.image, bytes):
-                        post.image_url = f"data:image/png;base64,{post.image.decode('utf-8')}"
-                    else:
-                        post.image_url = f"data:image/png;base64,{post.image}"
-                except:
-                    post.image_url = False
+            if has_image.get(post.id):
+                post.image_url = post._get_image_url('image_512')
+                post.image_large_url = post._get_image_url('image_1024')
             else:
                 post.image_url = False
+                post.image_large_url = False
+
+    def _get_image_url(self, field_name):
+        """URL of an image size of the post, changing whenever the post is written so it can be cached"""
+        self.ensure_one()
+        unique = hashlib.sha512(str(self.write_date).encode()).hexdigest()[:7]
+        return f'/community/post/{self.id}/image/{field_name}?unique={unique}'
+
+    @api.model
+    def _increment_counters(self, fname, deltas):
+        """Atomically add ``deltas`` (``{post_id: delta}``) to the ``fname`` counter of the posts"""
+        deltas = {post_id: delta for post_id, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        self.env.cr.execute(SQL(
+            """
+            UPDATE community_post AS post
+               SET %(column)s = GREATEST(COALESCE(post.%(column)s, 0) + delta.value, 0)
+              FROM (SELECT unnest(%(post_ids)s::int[]) AS id, unnest(%(values)s::int[]) AS value) AS delta
+             WHERE post.id = delta.id
+            """,
+            column=SQL.identifier(fname),
+            post_ids=list(deltas),
+            values=list(deltas.values()),
+        ))
+        self.browse(deltas).invalidate_recordset([fname])
+
+    @api.model
+    def _recompute_counters(self):
+        """Resynchronise the counters of all posts with their likes, views and active comments"""
+        self.env.flush_all()
+        self.env.cr.execute(SQL(
+            """
+            UPDATE community_post AS post
+               SET like_count = (SELECT COUNT(*) FROM community_post_like l WHERE l.post_id = post.id),
+                   view_count = (SELECT COUNT(*) FROM community_post_view v WHERE v.post_id = post.id),
+                   comment_count = (SELECT COUNT(*) FROM community_post_comment c
+                                     WHERE c.post_id = post.id AND c.active)
+            """
+        ))
+        self.invalidate_model(list(POST_COUNTER_FIELDS))
+
+
+class CommunityPostCounterMixin(models.AbstractModel):
+    """Records counted on their ``post_id`` by the ``_post_counter_field`` counter.
+
+    Creations, deletions and changes of post or counted state adjust the
+    counter in place instead of recounting the post's records.
+    """
+    _name = 'community.post.counter.mixin'
+    _description = 'Community Post Counter Mixin'
+
+    _post_counter_field = None
+
+    def _is_post_counted(self):
+        self.ensure_one()
+        return True
+
+    def _post_counter_deltas(self, sign):
+        deltas = Counter()
+        for rec in self:
+            if rec.post_id and rec._is_post_counted():
+                deltas[rec.post_id.id] += sign
+        return deltas
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env['community.post']._increment_counters(self._post_counter_field, records._post_counter_deltas(1))
+        return records
+
+    def write(self, vals):
+        if 'post_id' not in vals and 'active' not in vals:
+            return super().write(vals)
+        deltas = self._post_counter_deltas(-1)
+        res = super().write(vals)
+        deltas.update(self._post_counter_deltas(1))
+        self.env['community.post']._increment_counters(self._post_counter_field, deltas)
+        return res
+
+    def unlink(self):
+        deltas = self._post_counter_deltas(-1)
+        res = super().unlink()
+        self.env['community.post']._increment_counters(self._post_counter_field, deltas)
+        return res
 
 
 class CommunityPostLike(models.Model):
     _name = 'community.post.like'
+    _inherit = ['community.post.counter.mixin']
     _description = 'Community Post Like'
+    _post_counter_field = 'like_count'
     _rec_name = 'post_id'
 
     _sql_constraints = [
@@ -103,7 +176,9 @@ class CommunityPostLike(models.Model):
 
 class CommunityPostView(models.Model):
     _name = 'community.post.view'
+    _inherit = ['community.post.counter.mixin']
     _description = 'Community Post View'
+    _post_counter_field = 'view_count'
     _rec_name = 'post_id'
 
     _sql_constraints = [
@@ -116,10 +191,101 @@ class CommunityPostView(models.Model):
     user_id = fields.Many2one('res.users', ondelete='cascade', required=True, default=lambda self: self.env.user)
     view_date = fields.Datetime(default=lambda self: fields.Datetime.now())
 
+    def init(self):
+        super().init()
+        self.env.cr.execute(SQL(
+            """
+            CREATE UNLOGGED TABLE IF NOT EXISTS %s (
+                post_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                view_date TIMESTAMP NOT NULL
+            )
+            """,
+            SQL.identifier(VIEW_QUEUE_TABLE),
+        ))
+        # One staged row per viewer: drop the duplicates queued before the index existed
+        self.env.cr.execute(SQL(
+            """
+            DELETE FROM %(queue)s a
+             USING %(queue)s b
+             WHERE a.ctid > b.ctid
+               AND a.post_id = b.post_id
+               AND a.user_id = b.user_id
+            """,
+            queue=SQL.identifier(VIEW_QUEUE_TABLE),
+        ))
+        tools.create_unique_index(self.env.cr, '%s_post_user_uniq' % VIEW_QUEUE_TABLE, VIEW_QUEUE_TABLE,
+                                  ['post_id', 'user_id'])
+
+    @api.model
+    def _buffer_view(self, post_id, user_id):
+        """Record that ``user_id`` viewed ``post_id``.
+
+        The view is staged in a table apart from the view rows and the post
+        counters, so concurrent readers never wait on them. Views are only
+        staged once per viewer: refreshes and views already counted write
+        nothing, so the counter counts viewers rather than requests.
+        """
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO %(queue)s (post_id, user_id, view_date)
+            SELECT %(post_id)s, %(user_id)s, %(now)s
+             WHERE NOT EXISTS (SELECT 1 FROM community_post_view
+                                WHERE post_id = %(post_id)s AND user_id = %(user_id)s)
+            ON CONFLICT (post_id, user_id) DO NOTHING
+            """,
+            queue=SQL.identifier(VIEW_QUEUE_TABLE),
+            post_id=post_id,
+            user_id=user_id,
+            now=fields.Datetime.now(),
+        ))
+
+    @api.model
+    def _cron_ingest_views(self):
+        """Drain the staged views into the view rows and the post counters"""
+        self.env.cr.execute(SQL(
+            "DELETE FROM %s RETURNING post_id, user_id, view_date",
+            SQL.identifier(VIEW_QUEUE_TABLE),
+        ))
+        views = {(post_id, user_id): view_date for post_id, user_id, view_date in self.env.cr.fetchall()}
+        if views:
+            self._ingest_views(views)
+
+    @api.model
+    def _ingest_views(self, views):
+        """Insert ``views`` (``{(post_id, user_id): view_date}``) and bump the view counters.
+
+        Views of deleted posts or users and views already stored are
+        skipped; only the inserted rows are counted.
+        """
+        keys = list(views)
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO community_post_view (post_id, user_id, view_date, create_uid, create_date,
+                                             write_uid, write_date)
+            SELECT v.post_id, v.user_id, v.view_date, %(uid)s, NOW() AT TIME ZONE 'UTC',
+                   %(uid)s, NOW() AT TIME ZONE 'UTC'
+              FROM unnest(%(post_ids)s::int[], %(user_ids)s::int[], %(view_dates)s::timestamp[])
+                   AS v(post_id, user_id, view_date)
+              JOIN community_post post ON post.id = v.post_id
+              JOIN res_users usr ON usr.id = v.user_id
+            ON CONFLICT (post_id, user_id) DO NOTHING
+            RETURNING post_id
+            """,
+            uid=self.env.uid,
+            post_ids=[post_id for post_id, _user_id in keys],
+            user_ids=[user_id for _post_id, user_id in keys],
+            view_dates=[views[key] for key in keys],
+        ))
+        counts = Counter(post_id for post_id, in self.env.cr.fetchall())
+        self.env['community.post']._increment_counters('view_count', counts)
+
 
 class CommunityPostComment(models.Model):
     _name = 'community.post.comment'
+    _inherit = ['community.post.counter.mixin']
     _description = 'Community Post Comment'
+    _post_counter_field = 'comment_count'
     _rec_name = 'post_id'
     _order = 'create_date asc'
 
@@ -127,4 +293,8 @@ class CommunityPostComment(models.Model):
     user_id = fields.Many2one('res.users', ondelete='cascade', required=True, default=lambda self: self.env.user)
     content = fields.Text(string="Comment", required=True)
     create_date = fields.Datetime(default=lambda self: fields.Datetime.now())
-    active = fields.Boolean(default=True)
\ No newline at end of file
+    active = fields.Boolean(default=True)
+
+    def _is_post_counted(self):
+        self.ensure_one()
+        return self.active
\ No newline at end of file
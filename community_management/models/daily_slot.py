@@ -1,5 +1,5 @@
 # models/daily_slot.py
-from odoo import models, fields, api
+from odoo import models, fields, api, tools
 
 
 # models/daily_slot.py (add booking fields + method)
@@ -18,6 +18,34 @@ class DailySlot(models.Model):
     booking_date = fields.Datetime(string='Booked Date')
     booking_notes = fields.Text(string='Booking Notes')
 
+    def init(self):
+        tools.create_index(self.env.cr, 'res_partner_daily_slot_available_idx', self._table,
+                           ['partner_id'], where='is_available')
+
+    @api.model
+    def _search_available(self, name=None, category=None):
+        """Available slots of the service providers matching ``name`` and ``category``.
+
+        Provider, category and availability filters run as one query, the
+        name match being served by the provider name trigram index.
+
+        :return: list of ``{'contact': partner, 'slots': slots}``, in
+            provider order
+        """
+        partner_domain = [('category_custom_id', '!=', False)]
+        if name:
+            partner_domain.append(('name', 'ilike', name))
+        if category:
+            partner_domain.append(('category_custom_id.name', 'ilike', category))
+        slots = self.search([
+            ('is_available', '=', True),
+            ('partner_id', 'in', self.env['res.partner']._search(partner_domain)),
+        ], order='partner_id, id')
+        return [
+            {'contact': contact, 'slots': contact_slots}
+            for contact, contact_slots in slots.grouped('partner_id').items()
+        ]
+
     def action_book_slot(self, user_id):
         """Book this slot for user"""
         self.write({
@@ -6,6 +6,16 @@ from odoo import api, fields, models
 class DeliveryPass(models.Model):
     _name = 'community.delivery.pass'
     _description = 'Delivery Pre‑Approval'
+    _inherit = ['gate.credential.mixin']
+
+    # Gate credential registry
+    _gate_pass_type = 'delivery'
+    _gate_auto_code = True
+    _gate_expire_states = {'active': 'expired'}
+    _gate_sync_depends = (
+        'mode', 'once_date', 'once_start_time', 'once_valid_hours',
+        'freq_time_from', 'freq_time_to', 'freq_valid_till', 'freq_validity',
+    )
 
     MODE_SELECTION = [
         ('once', 'Once'),
@@ -90,6 +100,7 @@ class DeliveryPass(models.Model):
         string='To',
         compute='_compute_window',
         store=True,
+        index=True,
     )
 
     state = fields.Selection(
@@ -98,6 +109,12 @@ class DeliveryPass(models.Model):
         default='active',
     )
 
+    access_code = fields.Char(
+        string='Gate Code',
+        readonly=True,
+        copy=False,
+    )
+
     @api.depends(
         'mode',
         'once_date',
@@ -10,6 +10,9 @@ import logging
 
 _logger = logging.getLogger(__name__)
 
+# Fields rendered into the resident QR code
+QR_PAYLOAD_FIELDS = ('resident_id', 'name', 'flat_id', 'phone', 'email', 'member_type', 'relationship')
+
 
 class FamilyMember(models.Model):
     _name = 'family.member'
@@ -76,6 +79,12 @@ class FamilyMember(models.Model):
         help="QR Code generated from Resident ID",
         attachment=False  # This ensures it's stored in database directly
     )
+    qr_pending = fields.Boolean(
+        string='QR Code Pending',
+        copy=False,
+        index=True,
+        help="Set when the QR payload changed; the QR code is regenerated in background"
+    )
 
     @api.depends('date_of_birth')
     def _compute_age(self):
@@ -97,58 +106,79 @@ class FamilyMember(models.Model):
                 if not re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', record.email):
                     raise ValidationError("Please enter a valid email address.")
 
-    @api.model
-    def create(self, vals):
-        """Generate unique Resident ID and QR code on create"""
-        # First create the record
-        record = super(FamilyMember, self).create(vals)
-
-        # Then generate resident ID
-        if not record.resident_id:
-            record._generate_resident_id()
-
-        # Then generate QR code
-        record._generate_qr_code_image()
-
-        return record
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Generate unique Resident IDs on create and queue their QR codes"""
+        records = super(FamilyMember, self).create(vals_list)
+        records._generate_resident_id()
+        records._queue_qr_code_image()
+        return records
 
     def write(self, vals):
-        """Update record and regenerate QR code if needed"""
-        result = super(FamilyMember, self).write(vals)
+        """Update record and queue a new QR code if its payload changed"""
+        if 'qr_code_image' not in vals and any(field in vals for field in QR_PAYLOAD_FIELDS):
+            vals = dict(vals, qr_pending=True)
+            result = super(FamilyMember, self).write(vals)
+            self._trigger_qr_cron()
+            return result
+        return super(FamilyMember, self).write(vals)
+
+    def _queue_qr_code_image(self):
+        """Mark QR codes for regeneration by the background worker"""
+        if self:
+            super(FamilyMember, self).write({'qr_pending': True})
+            self._trigger_qr_cron()
 
-        # Regenerate QR code if resident_id or name changed and we're not already updating QR
-        if 'qr_code_image' not in vals:
-            for record in self:
-                if record.resident_id:
-                    record._generate_qr_code_image()
+    @api.model
+    def _trigger_qr_cron(self):
+        cron = self.env.ref('community_management.ir_cron_family_member_qr', raise_if_not_found=False)
+        if cron:
+            cron._trigger()
 
-        return result
+    @api.model
+    def _cron_generate_qr_codes(self, batch_size=500):
+        """Render pending QR codes, one committed batch per run"""
+        members = self.search([('qr_pending', '=', True)], limit=batch_size)
+        members._generate_resident_id()
+        members._generate_qr_code_image()
+        # Do not retry members whose QR code failed to render
+        members.filtered('qr_pending').write({'qr_pending': False})
+        remaining = self.search_count([('qr_pending', '=', True)])
+        self.env['ir.cron']._notify_progress(done=len(members), remaining=remaining)
 
     def _generate_resident_id(self):
         """Generate unique Resident ID"""
-        for record in self:
-            if not record.resident_id:
-                community_code = 'COM'
-                if record.community_id:
-                    community_code = record.community_id.name[:3].upper()
-
-                if record.tenant_id:
-                    sequence = self.env['family.member'].search_count([
-                        ('tenant_id', '=', record.tenant_id.id),
-                        ('id', '<', record.id or 0)
-                    ]) + 1
-                else:
-                    sequence = 1
+        missing = self.filtered(lambda m: not m.resident_id)
+        if not missing:
+            return
+
+        # Rank each member among its tenant's members with a single search
+        tenant_member_ids = {}
+        for member in self.env['family.member'].search(
+                [('tenant_id', 'in', missing.tenant_id.ids)], order='id'):
+            tenant_member_ids.setdefault(member.tenant_id.id, []).append(member.id)
+
+        for record in missing:
+            community_code = 'COM'
+            if record.community_id:
+                community_code = record.community_id.name[:3].upper()
+
+            if record.tenant_id:
+                sequence = tenant_member_ids[record.tenant_id.id].index(record.id) + 1
+            else:
+                sequence = 1
 
-                # Get tenant initials
-                tenant_initials = ''
-                if record.tenant_id and record.tenant_id.name:
-                    tenant_initials = ''.join([word[0].upper() for word in record.tenant_id.name.split() if word])[:3]
+            # Get tenant initials
+            tenant_initials = ''
+            if record.tenant_id and record.tenant_id.name:
+                tenant_initials = ''.join([word[0].upper() for word in record.tenant_id.name.split() if word])[:3]
 
-                random_digits = ''.join(secrets.choice(string.digits) for _ in range(6))
-                record.resident_id = "SOC-%s-%s-%03d-%s" % (community_code, tenant_initials, sequence, random_digits)
+            random_digits = ''.join(secrets.choice(string.digits) for _ in range(6))
+            super(FamilyMember, record).write({
+                'resident_id': "SOC-%s-%s-%03d-%s" % (community_code, tenant_initials, sequence, random_digits),
+            })
 
-                _logger.info("Generated Resident ID: %s for member: %s", record.resident_id, record.name)
+            _logger.info("Generated Resident ID: %s for member: %s", record.resident_id, record.name)
 
     def _generate_qr_code_image(self):
         """
@@ -194,7 +224,7 @@ Relationship: {record.relationship or 'N/A'}"""
                 base64_bytes = base64.b64encode(img_bytes)
 
                 # Update the record
-                record.write({'qr_code_image': base64_bytes})
+                record.write({'qr_code_image': base64_bytes, 'qr_pending': False})
 
                 _logger.info("Generated QR Code for member: %s (resident_id: %s)",
                              record.name, record.resident_id)
@@ -213,25 +243,22 @@ Relationship: {record.relationship or 'N/A'}"""
         return True
 
     def action_generate_missing_ids(self):
-        """Generate resident IDs and QR codes for all members missing them"""
+        """Generate resident IDs and queue QR codes for all members missing them"""
         members_without_id = self.search([
             '|',
             ('resident_id', '=', False),
             ('qr_code_image', '=', False)
         ])
 
-        for member in members_without_id:
-            if not member.resident_id:
-                member._generate_resident_id()
-            if not member.qr_code_image:
-                member._generate_qr_code_image()
+        members_without_id._generate_resident_id()
+        members_without_id.filtered(lambda m: not m.qr_code_image and not m.qr_pending)._queue_qr_code_image()
 
         return {
             'type': 'ir.actions.client',
             'tag': 'display_notification',
             'params': {
                 'title': 'Success',
-                'message': 'Generated resident IDs and QR codes for %d family members' % len(members_without_id),
+                'message': 'Generated resident IDs for %d family members, QR codes are being generated' % len(members_without_id),
                 'type': 'success',
                 'sticky': False,
             }
@@ -94,6 +94,22 @@ class Flat(models.Model):
             self.floor_id = False
         return {'domain': {'floor_id': [('building_id', '=', self.building_id.id)]}}
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        flats = super().create(vals_list)
+        # Community-wide notices become visible to the new flats
+        self.env['property.notice.visibility']._rebuild(flat_ids=flats.ids)
+        return flats
+
+    def write(self, vals):
+        if 'community_id' not in vals:
+            return super().write(vals)
+        communities = {flat.id: flat.community_id for flat in self}
+        res = super().write(vals)
+        moved = self.filtered(lambda flat: communities[flat.id] != flat.community_id)
+        self.env['property.notice.visibility']._rebuild(flat_ids=moved.ids)
+        return res
+
     def action_view_transactions(self):
         """View all lease transactions for this flat"""
         self.ensure_one()
@@ -0,0 +1,166 @@
+import json
+
+from markupsafe import Markup
+
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import UserError
+from odoo.tools import SQL, str2bool
+
+# System parameter switching tracked pass models to the compact audit log
+COMPACT_AUDIT_PARAM = 'community_management.compact_audit'
+
+
+class GateAuditLog(models.Model):
+    """Append-only field deltas of pass records, one row per record write.
+
+    ``changes`` maps each changed field to ``[old, new]`` raw values
+    (ids for relations); names are only resolved when history is read.
+    """
+    _name = 'gate.audit.log'
+    _description = 'Compact Audit Log'
+    _order = 'id'
+
+    res_model = fields.Char(string='Model', required=True, readonly=True)
+    res_id = fields.Many2oneReference(string='Record ID', model_field='res_model', required=True, readonly=True)
+    user_id = fields.Many2one('res.users', string='User', readonly=True)
+    changed_at = fields.Datetime(string='Changed On', readonly=True)
+    changes = fields.Json(string='Changes', readonly=True)
+
+    def init(self):
+        tools.create_index(self.env.cr, 'gate_audit_log_res_idx', self._table, ['res_model', 'res_id'])
+
+    def write(self, vals):
+        raise UserError(_("The audit log is append-only and cannot be modified."))
+
+    @api.model
+    def _flush_buffer(self):
+        """Insert the rows buffered during the transaction with one statement"""
+        rows = self.env.cr.precommit.data.pop('gate.audit.log', [])
+        if not rows:
+            return
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO gate_audit_log (res_model, res_id, user_id, changed_at, changes, create_uid, create_date,
+                                        write_uid, write_date)
+            VALUES %s
+            """,
+            SQL(", ").join(
+                SQL("(%s, %s, %s, %s, %s::jsonb, %s, %s, %s, %s)",
+                    res_model, res_id, uid, changed_at, json.dumps(changes), uid, changed_at, uid, changed_at)
+                for res_model, res_id, uid, changed_at, changes in rows
+            ),
+        ))
+
+
+class GateAuditMixin(models.AbstractModel):
+    """Opt-in replacement of mail tracking for high-churn pass models.
+
+    When the ``community_management.compact_audit`` system parameter is
+    set, writes skip ``mail.tracking.value`` and chatter messages; the
+    deltas of the fields declared with ``tracking=True`` are buffered and
+    inserted into ``gate.audit.log`` once per transaction.
+    """
+    _name = 'gate.audit.mixin'
+    _description = 'Compact Audit Mixin'
+
+    compact_audit_html = fields.Html(string='Audit Trail', compute='_compute_compact_audit_html', sanitize=False)
+
+    @api.model
+    def _compact_audit_enabled(self):
+        return str2bool(self.env['ir.config_parameter'].sudo().get_param(COMPACT_AUDIT_PARAM, 'False'))
+
+    @api.model
+    def _compact_audit_fields(self):
+        return [name for name, field in self._fields.items() if getattr(field, 'tracking', None)]
+
+    def _compact_audit_values(self, fnames):
+        """Raw, JSON-serialisable values of ``fnames`` per record id"""
+        values = {}
+        for rec in self:
+            rec_values = {}
+            for fname in fnames:
+                field = self._fields[fname]
+                value = rec[fname]
+                if field.type == 'many2one':
+                    value = value.id
+                elif field.type in ('one2many', 'many2many'):
+                    value = value.ids
+                elif field.type in ('date', 'datetime'):
+                    value = field.to_string(value)
+                rec_values[fname] = value
+            values[rec.id] = rec_values
+        return values
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        if self._compact_audit_enabled():
+            self = self.with_context(mail_notrack=True, mail_create_nolog=True)
+        return super(GateAuditMixin, self).create(vals_list)
+
+    def write(self, vals):
+        if not self._compact_audit_enabled():
+            return super().write(vals)
+        fnames = [fname for fname in self._compact_audit_fields() if fname in vals]
+        old_values = self._compact_audit_values(fnames)
+        res = super(GateAuditMixin, self.with_context(mail_notrack=True)).write(vals)
+        if fnames:
+            self._buffer_compact_audit(old_values, self._compact_audit_values(fnames))
+        return res
+
+    def _buffer_compact_audit(self, old_values, new_values):
+        cr = self.env.cr
+        buffer = cr.precommit.data.setdefault('gate.audit.log', [])
+        if not buffer:
+            cr.precommit.add(self.env['gate.audit.log'].sudo()._flush_buffer)
+        now = fields.Datetime.now()
+        for rec_id, new in new_values.items():
+            changes = {
+                fname: [old_values[rec_id][fname], value]
+                for fname, value in new.items()
+                if old_values[rec_id][fname] != value
+            }
+            if changes:
+                buffer.append((self._name, rec_id, self.env.uid, now, changes))
+
+    def _format_compact_audit_value(self, fname, value):
+        field = self._fields[fname]
+        if value in (False, None, []):
+            return ''
+        if field.type == 'selection':
+            return dict(field._description_selection(self.env)).get(value, value)
+        if field.type == 'many2one':
+            return self.env[field.comodel_name].browse(value).exists().display_name or ''
+        if field.type in ('one2many', 'many2many'):
+            return ', '.join(self.env[field.comodel_name].browse(value).exists().mapped('display_name'))
+        return value
+
+    def get_compact_audit_history(self):
+        """Rebuild the change history of this record from the compact audit log"""
+        self.ensure_one()
+        logs = self.env['gate.audit.log'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_id', '=', self.id),
+        ])
+        return [{
+            'date': log.changed_at,
+            'user': log.user_id.name or '',
+            'changes': [{
+                'field': self._fields[fname].string,
+                'old': self._format_compact_audit_value(fname, old),
+                'new': self._format_compact_audit_value(fname, new),
+            } for fname, (old, new) in (log.changes or {}).items() if fname in self._fields],
+        } for log in logs]
+
+    def _compute_compact_audit_html(self):
+        for rec in self:
+            if not rec.id:
+                rec.compact_audit_html = False
+                continue
+            lines = [
+                Markup('<li><b>%s</b> %s: %s: %s &#8594; %s</li>') % (
+                    fields.Datetime.to_string(entry['date']), entry['user'],
+                    change['field'], change['old'], change['new'])
+                for entry in rec.get_compact_audit_history()
+                for change in entry['changes']
+            ]
+            rec.compact_audit_html = Markup('<ul>%s</ul>') % Markup('').join(lines) if lines else False
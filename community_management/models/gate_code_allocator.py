@@ -0,0 +1,112 @@
+import hashlib
+import hmac
+import secrets
+
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import UserError
+
+CODE_DIGITS = 6
+CODE_SPACE = 10 ** CODE_DIGITS
+
+# Two 10-bit halves cover the 6-digit space (2^20 >= 10^6)
+_HALF_BITS = 10
+_HALF_MASK = (1 << _HALF_BITS) - 1
+_FEISTEL_ROUNDS = 4
+
+
+def _permute_index(secret, index):
+    """Keyed bijection on [0, CODE_SPACE).
+
+    A small Feistel network permutes 20-bit values; cycle walking keeps the
+    result inside the 6-digit space. Distinct indexes always give distinct
+    codes, while consecutive indexes do not give guessable codes.
+    """
+    key = secret.encode()
+    value = index
+    while True:
+        left, right = value >> _HALF_BITS, value & _HALF_MASK
+        for rnd in range(_FEISTEL_ROUNDS):
+            digest = hmac.new(key, b'%d:%d' % (rnd, right), hashlib.sha256).digest()
+            left, right = right, left ^ (int.from_bytes(digest[:4], 'big') & _HALF_MASK)
+        value = (left << _HALF_BITS) | right
+        if value < CODE_SPACE:
+            return value
+
+
+class GateCodeAllocator(models.Model):
+    """Per-community gate code sequence.
+
+    Each community owns a counter and a secret permutation of the code
+    space, so a batch of N codes costs one row update, N permutations and
+    one lookup of the codes already held by live credentials (e.g. issued
+    by the former random generator), which are skipped.
+    """
+    _name = 'gate.code.allocator'
+    _description = 'Gate Code Allocator'
+    _rec_name = 'community_id'
+
+    community_id = fields.Many2one('community.management', string='Community', ondelete='cascade', readonly=True)
+    secret = fields.Char(string='Secret', required=True, readonly=True, groups='base.group_system')
+    next_index = fields.Integer(string='Next Index', default=0, readonly=True)
+
+    def init(self):
+        # A plain unique(community_id) never conflicts on NULL, so passes
+        # without a community would get a new allocator on every allocation
+        self.env.cr.execute(
+            "ALTER TABLE gate_code_allocator DROP CONSTRAINT IF EXISTS gate_code_allocator_community_uniq")
+        tools.create_unique_index(self.env.cr, 'gate_code_allocator_community_uniq', self._table,
+                                  ['COALESCE(community_id, 0)'])
+
+    @api.model
+    def _get_allocator_id(self, community_id):
+        self.env.cr.execute("""
+            INSERT INTO gate_code_allocator (community_id, secret, next_index, create_uid, create_date,
+                                             write_uid, write_date)
+            VALUES (%s, %s, 0, %s, NOW() AT TIME ZONE 'UTC', %s, NOW() AT TIME ZONE 'UTC')
+            ON CONFLICT ((COALESCE(community_id, 0))) DO NOTHING
+        """, (community_id or None, secrets.token_hex(16), self.env.uid, self.env.uid))
+        self.env.cr.execute(
+            "SELECT id FROM gate_code_allocator WHERE COALESCE(community_id, 0) = %s", (community_id or 0,))
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def _draw(self, allocator_id, count):
+        """Advance the allocator by ``count`` and return the codes of the drawn indexes"""
+        # The row lock taken by the UPDATE serialises concurrent allocations
+        self.env.cr.execute("""
+            UPDATE gate_code_allocator
+               SET next_index = next_index + %s
+             WHERE id = %s
+         RETURNING next_index, secret
+        """, (count, allocator_id))
+        end, secret = self.env.cr.fetchone()
+        self.browse(allocator_id).invalidate_recordset(['next_index'])
+        return [
+            str(_permute_index(secret, index % CODE_SPACE)).zfill(CODE_DIGITS)
+            for index in range(end - count, end)
+        ]
+
+    @api.model
+    def _get_taken_codes(self, community_id, codes):
+        """Return the subset of ``codes`` already held by a credential of the community"""
+        self.env.cr.execute("""
+            SELECT code
+              FROM gate_credential
+             WHERE code = ANY(%s)
+               AND COALESCE(community_id, 0) = %s
+        """, (codes, community_id or 0))
+        return {code for code, in self.env.cr.fetchall()}
+
+    @api.model
+    def _allocate(self, community_id, count=1):
+        """Return ``count`` unique gate codes for a community"""
+        codes = []
+        drawn = 0
+        while len(codes) < count:
+            if drawn >= CODE_SPACE:
+                raise UserError(_("No gate code left for this community."))
+            batch = self._draw(self._get_allocator_id(community_id), count - len(codes))
+            drawn += len(batch)
+            taken = self._get_taken_codes(community_id, batch)
+            codes += [code for code in batch if code not in taken and code not in codes]
+        return codes
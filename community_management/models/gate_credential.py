@@ -0,0 +1,498 @@
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from odoo import models, fields, api, tools
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+
+PASS_TYPE_SELECTION = [
+    ('visitor', 'Visitor'),
+    ('child_exit', 'Child Exit Permission'),
+    ('guest_invite', 'Guest Invite'),
+    ('cab', 'Cab Pre-Approval'),
+    ('delivery', 'Delivery Pass'),
+]
+
+# Gate codes are only resolved for security guards, within their own community
+GATE_USER_GROUP = 'community_management.group_community_security_guard'
+
+
+class GateCredential(models.Model):
+    """One row per live gate code, whatever pass model issued it.
+
+    Guards scan a code and resolve it here with a single index lookup
+    instead of searching every pass table in turn.
+    """
+    _name = 'gate.credential'
+    _description = 'Gate Credential Registry'
+    _rec_name = 'code'
+    _order = 'id desc'
+
+    # Codes are unique per community only: every lookup is scoped to the
+    # community of the guard scanning it, never to one sent by the client.
+    _sql_constraints = [
+        ('code_community_uniq',
+         'unique(code, community_id)',
+         'This gate code is already in use in the community!'),
+        ('pass_uniq',
+         'unique(res_model, res_id)',
+         'A pass can only hold one gate code!'),
+    ]
+
+    code = fields.Char(string='Code', required=True, readonly=True)
+    community_id = fields.Many2one('community.management', string='Community',
+                                   ondelete='cascade', readonly=True)
+    flat_id = fields.Many2one('flat.management', string='Flat', ondelete='cascade', readonly=True)
+
+    pass_type = fields.Selection(PASS_TYPE_SELECTION, string='Pass Type', required=True, readonly=True)
+    res_model = fields.Char(string='Pass Model', required=True, readonly=True)
+    res_id = fields.Many2oneReference(string='Pass ID', model_field='res_model', required=True, readonly=True)
+    pass_state = fields.Char(string='Pass Status', readonly=True)
+
+    valid_from = fields.Datetime(string='Valid From', readonly=True)
+    valid_until = fields.Datetime(string='Valid Until', readonly=True)
+
+    @api.model
+    def _get_gate_community(self):
+        """Community guarded by the current user, empty for anyone but a security guard"""
+        user = self.env.user
+        if not user.has_group(GATE_USER_GROUP):
+            return self.env['community.management']
+        return user.partner_id.sudo().security_community_id
+
+    @api.model
+    def _resolve(self, code, community):
+        """Return the credential matching a code scanned in ``community`` (or an empty recordset)"""
+        code = (code or '').strip()
+        if not code or not community:
+            return self.browse()
+        return self.search([('code', '=', code), ('community_id', '=', community.id)], limit=1)
+
+    def _get_pass(self):
+        """Browse the pass record behind this credential"""
+        self.ensure_one()
+        return self.env[self.res_model].browse(self.res_id).exists()
+
+    def _is_valid_now(self):
+        self.ensure_one()
+        now = fields.Datetime.now()
+        if self.valid_from and self.valid_from > now:
+            return False
+        if self.valid_until and self.valid_until < now:
+            return False
+        return True
+
+    def _get_changed_vals(self, vals):
+        """Subset of ``vals`` that differs from what is stored"""
+        self.ensure_one()
+        current = {
+            'code': self.code,
+            'community_id': self.community_id.id,
+            'flat_id': self.flat_id.id,
+            'pass_type': self.pass_type,
+            'res_model': self.res_model,
+            'res_id': self.res_id,
+            'pass_state': self.pass_state,
+            'valid_from': self.valid_from,
+            'valid_until': self.valid_until,
+        }
+        return {key: value for key, value in vals.items() if current.get(key) != (value or False)}
+
+    def _prepare_verify_data(self):
+        """Payload returned to gate devices for a scanned code"""
+        self.ensure_one()
+        gate_pass = self._get_pass()
+        return {
+            'pass_type': self.pass_type,
+            'pass_type_label': dict(PASS_TYPE_SELECTION).get(self.pass_type),
+            'pass_id': self.res_id,
+            'name': gate_pass.display_name if gate_pass else '',
+            'state': self.pass_state,
+            'flat_number': self.flat_id.name or 'N/A',
+            'community': self.community_id.name or '',
+            'valid_from': fields.Datetime.to_string(self.valid_from) if self.valid_from else False,
+            'valid_until': fields.Datetime.to_string(self.valid_until) if self.valid_until else False,
+            'is_valid': self._is_valid_now(),
+        }
+
+    @api.model
+    def _rebuild_registry(self):
+        """Rebuild the registry from every pass model (install/upgrade).
+
+        Codes issued before the registry existed may collide; the first pass
+        keeps the code and the others are logged and left out.
+        """
+        self.search([]).unlink()
+        seen = set()
+        vals_list = []
+        for model_name in self._get_pass_models():
+            Pass = self.env[model_name].sudo().with_context(skip_gate_credential_sync=True)
+            passes = Pass.search([('state', 'in', list(Pass._gate_live_states))], order='id')
+            if Pass._gate_auto_code:
+                passes._ensure_gate_codes()
+            elif Pass._gate_code_states:
+                passes.filtered(lambda rec: rec.state in Pass._gate_code_states)._ensure_gate_codes()
+            for rec in passes:
+                if not rec._is_gate_credential_live():
+                    continue
+                key = (rec[Pass._gate_code_field], rec.community_id.id)
+                if key in seen:
+                    _logger.warning("Gate credential registry: duplicate code %s on %s,%s skipped",
+                                    key[0], model_name, rec.id)
+                    continue
+                seen.add(key)
+                vals_list.append(rec._prepare_gate_credential_vals())
+        self.create(vals_list)
+        _logger.info("Gate credential registry: %s live code(s) registered", len(vals_list))
+        self._schedule_next_expiry()
+
+    @api.model
+    def _cron_expire_passes(self):
+        """Expire every pass model whose validity window has ended"""
+        for model_name in self._get_pass_models():
+            Pass = self.env[model_name].sudo()
+            if Pass._gate_expire_states:
+                Pass._expire_gate_passes(commit=True)
+        self._schedule_next_expiry()
+
+    @api.model
+    def _schedule_next_expiry(self):
+        """Trigger the expiry cron at the nearest upcoming validity end"""
+        ends = []
+        for model_name in self._get_pass_models():
+            Pass = self.env[model_name].sudo()
+            end = Pass._get_next_gate_expiry()
+            if end:
+                ends.append(end)
+        if ends:
+            self._schedule_expiry_at(min(ends))
+
+    @api.model
+    def _schedule_expiry_at(self, when):
+        """Make sure the expiry cron runs right after ``when``.
+
+        A trigger is only added when no pending trigger of the cron falls
+        before it, so saving passes does not pile up cron triggers.
+        """
+        now = fields.Datetime.now()
+        # Passes expire once their end is strictly in the past
+        when = max(when, now) + timedelta(seconds=1)
+        cron = self.env.ref('community_management.ir_cron_gate_pass_expiry', raise_if_not_found=False)
+        if not cron:
+            return
+        scheduled = self.env['ir.cron.trigger'].sudo().search_count([
+            ('cron_id', '=', cron.id),
+            ('call_at', '<=', when),
+        ], limit=1)
+        if not scheduled:
+            cron.sudo()._trigger(at=when)
+
+    @api.model
+    def _get_pass_models(self):
+        return [
+            name for name, model in self.env.registry.items()
+            if not model._abstract and getattr(model, '_gate_pass_type', False)
+        ]
+
+
+class GateCredentialMixin(models.AbstractModel):
+    """Keep a pass model's gate code mirrored in ``gate.credential``.
+
+    Inheriting models set ``_gate_pass_type`` and, where their field names
+    differ from the defaults, the code / validity field attributes below.
+    """
+    _name = 'gate.credential.mixin'
+    _description = 'Gate Credential Mixin'
+
+    _gate_pass_type = False
+    _gate_code_field = 'access_code'
+    # Assign a code on create when none is given
+    _gate_auto_code = False
+    _gate_live_states = ('active',)
+    # States in which a pass must hold a code; it is allocated on entering them
+    _gate_code_states = ()
+    _gate_valid_from_field = 'start_datetime'
+    _gate_valid_until_field = 'end_datetime'
+    # Extra fields whose change must refresh the registry row (e.g. the
+    # dependencies of a stored compute used for the validity window)
+    _gate_sync_depends = ()
+    # {current state: state once the validity end has passed}
+    _gate_expire_states = {}
+    _gate_expire_chunk_size = 1000
+
+    def init(self):
+        if self._abstract:
+            return
+        # Portal pass lists page each flat's passes newest first
+        tools.create_index(self.env.cr, '%s_flat_create_date_idx' % self._table, self._table,
+                           ['flat_id', 'create_date DESC', 'id DESC'])
+
+    def _allocate_gate_codes(self):
+        """Allocate fresh gate codes for these passes, one batch per community.
+
+        Returns a ``{record id: code}`` mapping; nothing is written.
+        """
+        Allocator = self.env['gate.code.allocator'].sudo()
+        codes = {}
+        for community, passes in self.grouped('community_id').items():
+            codes.update(zip(passes.ids, Allocator._allocate(community.id, len(passes))))
+        return codes
+
+    def _ensure_gate_codes(self):
+        """Give a gate code to the passes that have none yet"""
+        missing = self.filtered(lambda rec: not rec[self._gate_code_field])
+        if not missing:
+            return
+        missing._write_gate_codes(missing._allocate_gate_codes())
+        if not self.env.context.get('skip_gate_credential_sync'):
+            missing._sync_gate_credentials()
+
+    def _write_gate_codes(self, codes):
+        """Store a ``{record id: code}`` mapping with a single UPDATE.
+
+        The write overrides are bypassed, so batches do not run them once per
+        pass: the code change is tracked (chatter or compact audit log) for
+        the whole batch and ``_on_gate_codes_written`` runs once on it.
+        Callers sync the gate credentials of the batch afterwards.
+        """
+        fname = self._gate_code_field
+        records = self.browse(list(codes))
+        records.flush_recordset([fname])
+        tracked = getattr(self._fields[fname], 'tracking', None)
+        audit = tracked and hasattr(self, '_compact_audit_enabled') and self._compact_audit_enabled()
+        if audit:
+            old_values = records._compact_audit_values([fname])
+        elif tracked and hasattr(self, '_track_prepare') and not self.env.context.get('mail_notrack'):
+            # Initial values, compared and posted by mail.thread at commit
+            records._track_prepare([fname])
+        self.env.cr.execute(SQL(
+            """
+            UPDATE %(table)s
+               SET %(field)s = codes.code, write_date = %(now)s, write_uid = %(uid)s
+              FROM unnest(%(ids)s::int[], %(codes)s::varchar[]) AS codes(id, code)
+             WHERE %(table)s.id = codes.id
+            """,
+            table=SQL.identifier(self._table),
+            field=SQL.identifier(fname),
+            ids=list(codes),
+            codes=list(codes.values()),
+            now=fields.Datetime.now(),
+            uid=self.env.uid,
+        ))
+        records.invalidate_recordset([fname, 'write_date', 'write_uid'])
+        records.modified([fname])
+        if audit:
+            records._buffer_compact_audit(old_values, records._compact_audit_values([fname]))
+        records._on_gate_codes_written()
+
+    def _on_gate_codes_written(self):
+        """Side effects for passes whose codes were just stored by ``_write_gate_codes``"""
+        if hasattr(self, '_mark_kpi_snapshots_stale'):
+            self._mark_kpi_snapshots_stale()
+
+    @api.model
+    def _assign_gate_codes(self, vals_list):
+        """Fill the code of new passes in ``vals_list`` before insertion"""
+        pending = [vals for vals in vals_list if not vals.get(self._gate_code_field)]
+        if not pending:
+            return
+        flat_ids = {vals['flat_id'] for vals in pending if vals.get('flat_id')}
+        flats = self.env['flat.management'].sudo().browse(flat_ids)
+        community_by_flat = {flat.id: flat.community_id.id for flat in flats}
+        by_community = defaultdict(list)
+        for vals in pending:
+            community_id = vals.get('community_id') or community_by_flat.get(vals.get('flat_id'))
+            by_community[community_id].append(vals)
+        Allocator = self.env['gate.code.allocator'].sudo()
+        for community_id, group in by_community.items():
+            for vals, code in zip(group, Allocator._allocate(community_id, len(group))):
+                vals[self._gate_code_field] = code
+
+    def _gate_sync_fields(self):
+        return {
+            self._gate_code_field, 'state', 'flat_id', 'community_id',
+            self._gate_valid_from_field, self._gate_valid_until_field,
+            *self._gate_sync_depends,
+        }
+
+    def _is_gate_credential_live(self):
+        self.ensure_one()
+        return bool(self[self._gate_code_field]) and self.state in self._gate_live_states
+
+    def _prepare_gate_credential_vals(self):
+        self.ensure_one()
+        return {
+            'code': self[self._gate_code_field],
+            'community_id': self.community_id.id,
+            'flat_id': self.flat_id.id,
+            'pass_type': self._gate_pass_type,
+            'res_model': self._name,
+            'res_id': self.id,
+            'pass_state': self.state,
+            'valid_from': self[self._gate_valid_from_field] if self._gate_valid_from_field else False,
+            'valid_until': self[self._gate_valid_until_field] if self._gate_valid_until_field else False,
+        }
+
+    def _sync_gate_credentials(self):
+        """Upsert live codes into the registry and drop the rest"""
+        if not self:
+            return
+        Credential = self.env['gate.credential'].sudo()
+        existing = Credential.search([('res_model', '=', self._name), ('res_id', 'in', self.ids)])
+        by_res_id = {cred.res_id: cred for cred in existing}
+
+        to_unlink = Credential.browse()
+        to_create = []
+        for rec in self:
+            cred = by_res_id.get(rec.id)
+            if not rec._is_gate_credential_live():
+                to_unlink |= cred or Credential.browse()
+                continue
+            vals = rec._prepare_gate_credential_vals()
+            if not cred:
+                to_create.append(vals)
+                continue
+            changed = cred._get_changed_vals(vals)
+            if changed:
+                cred.write(changed)
+
+        # Free released codes before claiming new ones
+        if to_unlink:
+            to_unlink.unlink()
+        if to_create:
+            Credential.create(to_create)
+
+    @api.model
+    def _expire_gate_passes(self, now=None, commit=False):
+        """Expire passes past their validity end with set-based updates.
+
+        Rows are updated in chunks of ``_gate_expire_chunk_size`` (committed
+        one by one when ``commit`` is set) and ``_on_gate_passes_expired``
+        runs on each chunk only. Returns the ids of the expired passes.
+        """
+        now = now or fields.Datetime.now()
+        expired_ids = []
+        for from_state, to_state in self._gate_expire_states.items():
+            while True:
+                self.env.cr.execute(SQL(
+                    """
+                    UPDATE %(table)s
+                       SET state = %(to_state)s, write_date = %(now)s, write_uid = %(uid)s
+                     WHERE id IN (
+                            SELECT id FROM %(table)s
+                             WHERE state = %(from_state)s AND %(valid_until)s < %(now)s
+                             LIMIT %(limit)s
+                               FOR UPDATE SKIP LOCKED)
+                 RETURNING id
+                    """,
+                    table=SQL.identifier(self._table),
+                    valid_until=SQL.identifier(self._gate_valid_until_field),
+                    from_state=from_state,
+                    to_state=to_state,
+                    now=now,
+                    uid=self.env.uid,
+                    limit=self._gate_expire_chunk_size,
+                ))
+                ids = [row[0] for row in self.env.cr.fetchall()]
+                if not ids:
+                    break
+                passes = self.browse(ids)
+                passes.invalidate_recordset(['state', 'write_date', 'write_uid'])
+                passes.modified(['state'])
+                passes._on_gate_passes_expired(from_state)
+                self.env.flush_all()
+                if commit:
+                    self.env.cr.commit()
+                expired_ids.extend(ids)
+                if len(ids) < self._gate_expire_chunk_size:
+                    break
+        if expired_ids:
+            _logger.info("Expired %s %s pass(es)", len(expired_ids), self._name)
+        return expired_ids
+
+    def _log_gate_events(self, event_type, allowed=True):
+        """Append a scan / entry / exit event per pass to the gate ledger"""
+        self.env['gate.event'].sudo().create([{
+            'event_type': event_type,
+            'allowed': allowed,
+            'code': rec[self._gate_code_field],
+            'community_id': rec.community_id.id,
+            'flat_id': rec.flat_id.id,
+            'pass_type': self._gate_pass_type,
+            'res_model': self._name,
+            'res_id': rec.id,
+        } for rec in self])
+
+    def _admit_gate_entry(self, now=None):
+        """Decide whether this pass may enter now and log the attempt.
+
+        Returns ``(allowed, reason)``; pass models add their own rules.
+        """
+        self.ensure_one()
+        allowed, reason = self._check_gate_admission(now or fields.Datetime.now())
+        self._log_gate_events('entry', allowed=allowed)
+        return allowed, reason
+
+    def _check_gate_admission(self, now):
+        self.ensure_one()
+        if not self._is_gate_credential_live():
+            return False, 'Pass is not active'
+        valid_from = self[self._gate_valid_from_field] if self._gate_valid_from_field else False
+        valid_until = self[self._gate_valid_until_field] if self._gate_valid_until_field else False
+        if (valid_from and valid_from > now) or (valid_until and valid_until < now):
+            return False, 'Pass is outside its validity window'
+        return True, ''
+
+    def _on_gate_passes_expired(self, from_state):
+        """Side effects for passes just expired from ``from_state``"""
+        self._sync_gate_credentials()
+
+    @api.model
+    def _get_next_gate_expiry(self):
+        """Nearest future validity end among passes that can still expire"""
+        if not self._gate_expire_states:
+            return False
+        until = self._gate_valid_until_field
+        nearest = self.search([
+            ('state', 'in', list(self._gate_expire_states)),
+            (until, '>=', fields.Datetime.now()),
+        ], order='%s asc' % until, limit=1)
+        return nearest[until]
+
+    def _schedule_gate_expiry(self):
+        """Trigger the expiry cron at the nearest validity end of these passes"""
+        if not self._gate_expire_states:
+            return
+        until = self._gate_valid_until_field
+        ends = [rec[until] for rec in self if rec.state in self._gate_expire_states and rec[until]]
+        if ends:
+            self.env['gate.credential']._schedule_expiry_at(min(ends))
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        if self._gate_auto_code:
+            self._assign_gate_codes(vals_list)
+        records = super().create(vals_list)
+        if not self.env.context.get('skip_gate_credential_sync'):
+            records._sync_gate_credentials()
+            records._schedule_gate_expiry()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        if vals.get('state') in self._gate_code_states:
+            self._ensure_gate_codes()
+        if not self.env.context.get('skip_gate_credential_sync') and self._gate_sync_fields().intersection(vals):
+            self._sync_gate_credentials()
+            self._schedule_gate_expiry()
+        return res
+
+    def unlink(self):
+        self.env['gate.credential'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_id', 'in', self.ids),
+        ]).unlink()
+        return super().unlink()
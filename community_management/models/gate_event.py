@@ -0,0 +1,150 @@
+import logging
+from datetime import timedelta
+
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import UserError
+from odoo.tools import SQL
+
+from .gate_credential import GATE_USER_GROUP, PASS_TYPE_SELECTION
+
+_logger = logging.getLogger(__name__)
+
+
+EVENT_TYPE_SELECTION = [
+    ('scan', 'Scan'),
+    ('entry', 'Entry'),
+    ('exit', 'Exit'),
+]
+
+# Hours recounted before the last rolled up hour, for events committed late
+ROLLUP_OVERLAP = timedelta(hours=1)
+
+
+class GateEvent(models.Model):
+    """Append-only ledger of gate scans, entries and exits.
+
+    Rows are only ever inserted, in time order, so the table is indexed with
+    BRIN on ``event_time`` and can be pruned or partitioned by day. Reports
+    read ``gate.event.hourly``, which a cron rebuilds from the recent events
+    so that scans never contend on a shared rollup row.
+    """
+    _name = 'gate.event'
+    _description = 'Gate Event'
+    _order = 'event_time desc, id desc'
+    _rec_name = 'code'
+
+    event_time = fields.Datetime(string='Time', required=True, readonly=True, default=fields.Datetime.now)
+    event_date = fields.Date(string='Date', required=True, readonly=True, index=True)
+    event_type = fields.Selection(EVENT_TYPE_SELECTION, string='Event', required=True, readonly=True)
+    allowed = fields.Boolean(string='Allowed', default=True, readonly=True)
+
+    community_id = fields.Many2one('community.management', string='Community', readonly=True, index=True)
+    flat_id = fields.Many2one('flat.management', string='Flat', readonly=True)
+    pass_type = fields.Selection(PASS_TYPE_SELECTION, string='Pass Type', readonly=True)
+    res_model = fields.Char(string='Pass Model', readonly=True)
+    res_id = fields.Many2oneReference(string='Pass ID', model_field='res_model', readonly=True)
+    code = fields.Char(string='Code', readonly=True)
+    user_id = fields.Many2one('res.users', string='Recorded By', readonly=True,
+                              default=lambda self: self.env.user)
+
+    def init(self):
+        tools.create_index(self.env.cr, 'gate_event_event_time_brin', self._table, ['event_time'], method='brin')
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            vals.setdefault('event_time', fields.Datetime.now())
+            vals.setdefault('event_date', fields.Datetime.to_datetime(vals['event_time']).date())
+        return super().create(vals_list)
+
+    def write(self, vals):
+        raise UserError(_("Gate events are append-only and cannot be modified."))
+
+    def unlink(self):
+        if not self.env.su:
+            raise UserError(_("Gate events are append-only and cannot be deleted."))
+        return super().unlink()
+
+    @api.model
+    def _log_scan(self, code, credential, community_id=None, allowed=None):
+        """Record a code scanned at the gate, whether it resolved or not"""
+        if not self.env.user.has_group(GATE_USER_GROUP):
+            return self.browse()
+        if allowed is None:
+            allowed = bool(credential) and credential._is_valid_now()
+        return self.sudo().create({
+            'event_type': 'scan',
+            'allowed': allowed,
+            'code': code,
+            'community_id': credential.community_id.id or (int(community_id) if community_id else False),
+            'flat_id': credential.flat_id.id,
+            'pass_type': credential.pass_type,
+            'res_model': credential.res_model,
+            'res_id': credential.res_id,
+        })
+
+    @api.model
+    def _cron_rollup_events(self):
+        """Recount the hourly rollups since the last rolled up hour.
+
+        The window is found from the rollup table and read from the ledger
+        through its BRIN index, so a run only scans the recent events.
+        """
+        self.env.cr.execute("SELECT MAX(date + make_interval(hours => hour)) FROM gate_event_hourly")
+        last_hour = self.env.cr.fetchone()[0]
+        if last_hour:
+            start = last_hour - ROLLUP_OVERLAP
+        else:
+            self.env.cr.execute("SELECT date_trunc('hour', MIN(event_time)) FROM gate_event")
+            start = self.env.cr.fetchone()[0]
+            if not start:
+                return
+        self.env.cr.execute(SQL(
+            "DELETE FROM gate_event_hourly WHERE date + make_interval(hours => hour) >= %s", start,
+        ))
+        # Scans are counted whatever the outcome, entries and exits only when allowed
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO gate_event_hourly (date, hour, community_id, pass_type, scan_count, entry_count,
+                                          exit_count, denied_count, create_uid, create_date,
+                                          write_uid, write_date)
+            SELECT event_date, EXTRACT(HOUR FROM event_time)::int, community_id, COALESCE(pass_type, 'none'),
+                   COUNT(*) FILTER (WHERE event_type = 'scan'),
+                   COUNT(*) FILTER (WHERE event_type = 'entry' AND allowed),
+                   COUNT(*) FILTER (WHERE event_type = 'exit' AND allowed),
+                   COUNT(*) FILTER (WHERE NOT allowed),
+                   %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+              FROM gate_event
+             WHERE event_time >= %(start)s
+               AND community_id IS NOT NULL
+          GROUP BY event_date, EXTRACT(HOUR FROM event_time), community_id, COALESCE(pass_type, 'none')
+            """,
+            start=start, uid=self.env.uid,
+        ))
+        self.env['gate.event.hourly'].invalidate_model()
+        _logger.info("Gate event rollups rebuilt from %s", start)
+
+
+class GateEventHourly(models.Model):
+    """Per-community gate traffic, one row per day, hour (UTC) and pass type"""
+    _name = 'gate.event.hourly'
+    _description = 'Gate Traffic Hourly Rollup'
+    _order = 'date desc, hour'
+    _rec_name = 'date'
+
+    _sql_constraints = [
+        ('rollup_uniq',
+         'unique(date, hour, community_id, pass_type)',
+         'Only one rollup row per day, hour, community and pass type!'),
+    ]
+
+    date = fields.Date(string='Date', required=True, readonly=True)
+    hour = fields.Integer(string='Hour (UTC)', required=True, readonly=True)
+    community_id = fields.Many2one('community.management', string='Community', required=True,
+                                   ondelete='cascade', readonly=True)
+    pass_type = fields.Selection(PASS_TYPE_SELECTION + [('none', 'Unknown Code')], string='Pass Type',
+                                 required=True, readonly=True)
+    scan_count = fields.Integer(string='Scans', readonly=True, aggregator='sum')
+    entry_count = fields.Integer(string='Entries', readonly=True, aggregator='sum')
+    exit_count = fields.Integer(string='Exits', readonly=True, aggregator='sum')
+    denied_count = fields.Integer(string='Denied', readonly=True, aggregator='sum')
@@ -2,16 +2,22 @@ from odoo import models, fields, api
 from odoo.exceptions import ValidationError
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
-import random
-import string
 import urllib.parse
 
 
 class GuestInvite(models.Model):
     _name = 'guest.invite'
     _description = 'Guest Invite'
+    _inherit = ['gate.credential.mixin']
     _order = 'create_date desc'
 
+    # Gate credential registry
+    _gate_pass_type = 'guest_invite'
+    _gate_code_field = 'otpcode'
+    _gate_auto_code = True
+    _gate_live_states = ('draft', 'active')
+    _gate_expire_states = {'active': 'expired'}
+
     resident_id = fields.Many2one('res.partner', string='Resident', required=True,
                                   default=lambda self: self.env.user.partner_id, ondelete='cascade')
 
@@ -47,7 +53,7 @@ class GuestInvite(models.Model):
 
     # Consolidated validity window
     start_datetime = fields.Datetime(string='Start')
-    end_datetime = fields.Datetime(string='End')
+    end_datetime = fields.Datetime(string='End', index=True)
 
     state = fields.Selection([
         ('draft', 'Draft'),
@@ -59,37 +65,18 @@ class GuestInvite(models.Model):
     otpcode = fields.Char(string='Entry Code / OTP', size=6, readonly=True, copy=False,
                           help='Unique 6-digit OTP for gate entry - ALWAYS GENERATED')
 
-    @api.model
-    def create(self, vals):
-        """🚀 ALWAYS Generate unique OTP on record creation"""
-        record = super(GuestInvite, self).create(vals)
-        record.generate_unique_otp()  # ✅ GUARANTEED OTP GENERATION
-        return record
-
-    @api.model_create_multi
-    def create_multi(self, vals_list):
-        """Handle multi-create and generate OTPs"""
-        records = super().create_multi(vals_list)
-        for record in records:
-            record.generate_unique_otp()  # ✅ EVERY record gets OTP
-        return records
+    # OTPs are assigned on create by gate.credential.mixin (_gate_auto_code)
 
     def write(self, vals):
         """Regenerate OTP if explicitly cleared"""
         res = super(GuestInvite, self).write(vals)
         if 'otpcode' in vals and not vals['otpcode']:
-            for record in self:
-                record.generate_unique_otp()
+            self.generate_unique_otp()
         return res
 
     def generate_unique_otp(self):
-        """🔥 Generate unique 6-digit OTP that NEVER exists"""
-        self.ensure_one()
-        while True:
-            otp = ''.join(random.choices(string.digits, k=6))  # 100000-999999
-            if not self.search([('otpcode', '=', otp)], limit=1):
-                self.otpcode = otp
-                break
+        """Give a unique 6-digit OTP to the invites that have none"""
+        self._ensure_gate_codes()
 
     @api.onchange('duration_type', 'freq_start_date')
     def onchange_duration(self):
@@ -138,8 +125,7 @@ class GuestInvite(models.Model):
             rec.end_datetime = end_dt
 
             # 🚀 ALWAYS ENSURE OTP EXISTS
-            if not rec.otpcode:
-                rec.generate_unique_otp()
+            rec.generate_unique_otp()
 
             if rec.state == 'draft':
                 rec.state = 'active'
@@ -147,11 +133,7 @@ class GuestInvite(models.Model):
     @api.model
     def cron_expire_invites(self):
         """Auto-expire old invites"""
-        expired = self.search([
-            ('state', '=', 'active'),
-            ('end_datetime', '<', fields.Datetime.now())
-        ])
-        expired.write({'state': 'expired'})
+        return self._expire_gate_passes()
 
     def action_share_invite(self):
         """📱 Backend WhatsApp share - Bonus feature"""
@@ -183,7 +165,7 @@ class GuestInviteLine(models.Model):
     _name = 'guest.invite.line'
     _description = 'Guest Invite Guest'
 
-    invite_id = fields.Many2one('guest.invite', string='Invite', ondelete='cascade', required=True)
+    invite_id = fields.Many2one('guest.invite', string='Invite', ondelete='cascade', required=True, index=True)
     guest_name = fields.Char(string='Guest Name', required=True)
     guest_mobile = fields.Char(string='Mobile', required=True)
 
@@ -1,4 +1,5 @@
 from odoo import models, fields, api
+from odoo.tools import SQL
 from datetime import datetime
 import logging
 
@@ -7,8 +8,11 @@ _logger = logging.getLogger(__name__)
 
 class RealEstateDashboard(models.TransientModel):
     _name = 'real.estate.dashboard'
+    _inherit = 'community.kpi.dashboard.mixin'
     _description = 'Real Estate Dashboard'
 
+    _kpi_live_fields = ('feed_maintenance_html', 'feed_corpus_html', 'feed_events_html')
+
     community_id = fields.Many2one('community.management', string='Select Community', required=True)
 
     # Flat Stats
@@ -28,6 +32,7 @@ class RealEstateDashboard(models.TransientModel):
     total_maintenance_amount = fields.Monetary(string="Total Amount")
     collected_amount = fields.Monetary(string="Collected Amount")
     pending_amount = fields.Monetary(string="Pending Amount")
+    overdue_amount = fields.Monetary(string="Overdue Amount")
 
     # Corpus Fund
     total_corpus_fund_count = fields.Integer(string="Total Corpus Fund Invoices")
@@ -36,6 +41,7 @@ class RealEstateDashboard(models.TransientModel):
     total_corpus_fund_amount = fields.Monetary(string="Total Corpus Fund Amount")
     collected_corpus_fund_amount = fields.Monetary(string="Collected Corpus Fund Amount")
     pending_corpus_fund_amount = fields.Monetary(string="Pending Corpus Fund Amount")
+    overdue_corpus_fund_amount = fields.Monetary(string="Overdue Corpus Fund Amount")
 
     # Event Stats
     total_events_count = fields.Integer(string="Total Events")
@@ -62,15 +68,18 @@ class RealEstateDashboard(models.TransientModel):
     def _onchange_community_id(self):
         if not self.community_id:
             self.total_flats_count = self.occupied_flats_count = self.vacant_flats_count = self.occupancy_rate = 0
-            self.total_maintenance_amount = self.collected_amount = self.pending_amount = 0.0
-            self.total_corpus_fund_amount = self.collected_corpus_fund_amount = self.pending_corpus_fund_amount = 0.0
+            self.total_maintenance_amount = self.collected_amount = self.pending_amount = self.overdue_amount = 0.0
+            self.total_corpus_fund_amount = self.collected_corpus_fund_amount = self.pending_corpus_fund_amount = self.overdue_corpus_fund_amount = 0.0
             self.total_events_expense = self.total_events_count = 0
             self.chart_occupancy_html = self.chart_finance_html = ""
             self.feed_maintenance_html = self.feed_corpus_html = self.feed_events_html = "<p class='text-muted'>Select a community.</p>"
+            self.kpi_as_of = False
             return
+        self.env['community.kpi.snapshot']._load(self)
 
-        cid = self.community_id.id
-        limit = 5
+    def _compute_kpis(self):
+        """Compute the dashboard values of the selected community from its records"""
+        cid = self.community_id._origin.id
 
         try:
             # 1. Flats & Occupancy
@@ -92,54 +101,30 @@ class RealEstateDashboard(models.TransientModel):
                 self.total_residents_count = self.total_pets_count = self.total_vehicles_count = 0
 
             # 2. Maintenance Analytics
-            m_records = self.env['flat.maintenance'].search([('community_id', '=', cid)])
-            self.total_maintenance_count = len(m_records)
-            self.pending_maintenance_count = len(m_records.filtered(lambda m: m.status == 'draft'))
-            self.confirmed_maintenance_count = len(m_records.filtered(lambda m: m.status == 'confirmed'))
-
-            t_inv, c_amt, p_amt = 0.0, 0.0, 0.0
-            seen_inv = set()
-            for m in m_records:
-                for inv in m.invoice_ids:
-                    if inv.id in seen_inv: continue
-                    seen_inv.add(inv.id)
-                    t_inv += inv.amount_total
-                    if inv.payment_state == 'paid':
-                        c_amt += inv.amount_total
-                    elif inv.payment_state == 'partial':
-                        c_amt += (inv.amount_total - inv.amount_residual)
-                        p_amt += inv.amount_residual
-                    else:
-                        p_amt += inv.amount_total
-
-            self.total_maintenance_amount = t_inv
-            self.collected_amount = c_amt
-            self.pending_amount = p_amt
+            maintenance_counts = dict(self.env['flat.maintenance']._read_group(
+                [('community_id', '=', cid)], groupby=['status'], aggregates=['__count']))
+            self.total_maintenance_count = sum(maintenance_counts.values())
+            self.pending_maintenance_count = maintenance_counts.get('draft', 0)
+            self.confirmed_maintenance_count = maintenance_counts.get('confirmed', 0)
+
+            totals = self._get_maintenance_payment_totals(cid)
+            self.total_maintenance_amount = totals['total']
+            self.collected_amount = totals['collected']
+            self.pending_amount = totals['pending']
+            self.overdue_amount = totals['overdue']
 
             # 3. Corpus Fund Analytics
-            c_records = self.env['corpus.fund.invoice'].search([('community_id', '=', cid)])
-            self.total_corpus_fund_count = len(c_records)
-            self.draft_corpus_fund_count = len(c_records.filtered(lambda c: c.state == 'draft'))
-            self.invoiced_corpus_fund_count = len(c_records.filtered(lambda c: c.state == 'invoiced'))
-
-            t_corp, c_corp, p_corp = 0.0, 0.0, 0.0
-            for c in c_records:
-                t_corp += c.amount
-                if c.invoice_id:
-                    inv = c.invoice_id
-                    if inv.payment_state == 'paid':
-                        c_corp += inv.amount_total
-                    elif inv.payment_state == 'partial':
-                        c_corp += (inv.amount_total - inv.amount_residual)
-                        p_corp += inv.amount_residual
-                    else:
-                        p_corp += inv.amount_total
-                else:
-                    p_corp += c.amount
-
-            self.total_corpus_fund_amount = t_corp
-            self.collected_corpus_fund_amount = c_corp
-            self.pending_corpus_fund_amount = p_corp
+            corpus_counts = dict(self.env['corpus.fund.invoice']._read_group(
+                [('community_id', '=', cid)], groupby=['state'], aggregates=['__count']))
+            self.total_corpus_fund_count = sum(corpus_counts.values())
+            self.draft_corpus_fund_count = corpus_counts.get('draft', 0)
+            self.invoiced_corpus_fund_count = corpus_counts.get('invoiced', 0)
+
+            totals = self._get_corpus_payment_totals(cid)
+            self.total_corpus_fund_amount = totals['total']
+            self.collected_corpus_fund_amount = totals['collected']
+            self.pending_corpus_fund_amount = totals['pending']
+            self.overdue_corpus_fund_amount = totals['overdue']
 
             # 4. Events Analytics
             events = self.env['community.festival'].search([('community_id', '=', cid)])
@@ -180,6 +165,15 @@ class RealEstateDashboard(models.TransientModel):
                 </div>
             """
 
+        except Exception as e:
+            _logger.error(f"Error computing financial dashboard data: {e}")
+
+    def _compute_feeds(self):
+        """Render the recent maintenance, corpus fund and event records of the selected community"""
+        cid = self.community_id._origin.id
+        limit = 5
+
+        try:
             # --- GENERATE ACTIVITY FEEDS ---
             def get_badge(text, color_type):
                 colors = {
@@ -216,10 +210,104 @@ class RealEstateDashboard(models.TransientModel):
             self.feed_events_html = e_html + "</div>" if recent_e else "<p class='text-muted'>No upcoming events.</p>"
 
         except Exception as e:
-            _logger.error(f"Error computing financial dashboard data: {e}")
+            _logger.error(f"Error computing financial dashboard activity: {e}")
+
+    @api.model
+    def _get_invoice_period_condition(self, date_from=None, date_to=None):
+        """SQL condition restricting ``move`` to invoices dated within the period"""
+        conditions = [SQL("TRUE")]
+        if date_from:
+            conditions.append(SQL("move.invoice_date >= %s", date_from))
+        if date_to:
+            conditions.append(SQL("move.invoice_date <= %s", date_to))
+        return SQL(" AND ").join(conditions)
+
+    @api.model
+    def _get_maintenance_payment_totals(self, community_id, date_from=None, date_to=None):
+        """Invoiced, collected, pending and overdue maintenance amounts of a community.
+
+        Invoices are reached through the maintenance/invoice relation of the
+        maintenance records the user can read, and counted once even when
+        shared by several of them; the period, if any, applies to the
+        invoice date.
+        """
+        invoice_ids = self.env['flat.maintenance']._fields['invoice_ids']
+        maintenances = self.env['flat.maintenance']._search([('community_id', '=', community_id)])
+        self.env.flush_all()
+        self.env.cr.execute(SQL(
+            """
+            SELECT COALESCE(SUM(move.amount_total), 0),
+                   COALESCE(SUM(%(collected)s), 0),
+                   COALESCE(SUM(%(pending)s), 0),
+                   COALESCE(SUM(%(overdue)s), 0)
+              FROM account_move move
+             WHERE move.id IN (SELECT rel.%(column2)s
+                                 FROM %(relation)s rel
+                                WHERE rel.%(column1)s IN %(maintenances)s)
+               AND %(period)s
+            """,
+            collected=self._payment_sql('collected'),
+            pending=self._payment_sql('pending'),
+            overdue=self._payment_sql('overdue'),
+            relation=SQL.identifier(invoice_ids.relation),
+            column1=SQL.identifier(invoice_ids.column1),
+            column2=SQL.identifier(invoice_ids.column2),
+            maintenances=maintenances.subselect(),
+            period=self._get_invoice_period_condition(date_from, date_to),
+        ))
+        return dict(zip(('total', 'collected', 'pending', 'overdue'), self.env.cr.fetchone()))
+
+    @api.model
+    def _get_corpus_payment_totals(self, community_id, date_from=None, date_to=None):
+        """Target, collected, pending and overdue corpus fund amounts of a community.
+
+        Only the corpus records the user can read are counted. Those without
+        an invoice count as pending for their amount and are left out when a
+        period is given, having no invoice date.
+        """
+        corpus_records = self.env['corpus.fund.invoice']._search([('community_id', '=', community_id)])
+        self.env.flush_all()
+        self.env.cr.execute(SQL(
+            """
+            SELECT COALESCE(SUM(corpus.amount), 0),
+                   COALESCE(SUM(CASE WHEN move.id IS NULL THEN 0 ELSE %(collected)s END), 0),
+                   COALESCE(SUM(CASE WHEN move.id IS NULL THEN corpus.amount ELSE %(pending)s END), 0),
+                   COALESCE(SUM(CASE WHEN move.id IS NULL THEN 0 ELSE %(overdue)s END), 0)
+              FROM corpus_fund_invoice corpus
+              LEFT JOIN account_move move ON move.id = corpus.invoice_id
+             WHERE corpus.id IN %(corpus_records)s
+               AND %(period)s
+            """,
+            collected=self._payment_sql('collected'),
+            pending=self._payment_sql('pending'),
+            overdue=self._payment_sql('overdue'),
+            corpus_records=corpus_records.subselect(),
+            period=self._get_invoice_period_condition(date_from, date_to),
+        ))
+        return dict(zip(('total', 'collected', 'pending', 'overdue'), self.env.cr.fetchone()))
+
+    @api.model
+    def _payment_sql(self, kind):
+        """Per-invoice amount of ``move`` that is collected, pending or overdue"""
+        if kind == 'collected':
+            return SQL("""CASE move.payment_state
+                              WHEN 'paid' THEN move.amount_total
+                              WHEN 'partial' THEN move.amount_total - move.amount_residual
+                              ELSE 0 END""")
+        if kind == 'pending':
+            return SQL("""CASE move.payment_state
+                              WHEN 'paid' THEN 0
+                              WHEN 'partial' THEN move.amount_residual
+                              ELSE move.amount_total END""")
+        return SQL("""CASE WHEN move.state = 'posted'
+                                AND move.payment_state IN ('not_paid', 'partial')
+                                AND move.invoice_date_due < %s
+                           THEN move.amount_residual
+                           ELSE 0 END""", fields.Date.context_today(self))
 
     # Standard Actions
     def refresh_dashboard(self):
+        self.env['community.kpi.snapshot']._mark_stale(self.community_id)
         return {'type': 'ir.actions.client', 'tag': 'reload'}
 
     def action_open_maintenance(self):
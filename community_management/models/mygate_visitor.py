@@ -1,17 +1,31 @@
-from odoo import models, fields, api, _
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import ValidationError, UserError
 from datetime import datetime, timedelta
+from io import BytesIO
+import hashlib
 import logging
 
 _logger = logging.getLogger(__name__)
 
+# Fields rendered into (or validating) the public gate QR image
+GATE_QR_FIELDS = ('name', 'access_code', 'flat_id', 'valid_until')
+
 
 class MyGateVisitor(models.Model):
     _name = 'mygate.visitor'
     _description = 'MyGate Visitor Management'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    # gate.audit.mixin must precede mail.thread to switch its tracking off
+    _inherit = ['gate.audit.mixin', 'mail.thread', 'mail.activity.mixin', 'gate.credential.mixin']
     _order = 'create_date desc'
 
+    # Gate credential registry
+    _gate_pass_type = 'visitor'
+    _gate_live_states = ('pending', 'approved')
+    _gate_code_states = ('approved',)
+    _gate_valid_from_field = 'expected_arrival'
+    _gate_valid_until_field = 'valid_until'
+    _gate_expire_states = {'approved': 'completed', 'pending': 'cancelled'}
+
     # Basic Information
     name = fields.Char(string='Visitor Name', required=True, tracking=True)
     mobile = fields.Char(string='Mobile Number', required=True, tracking=True)
@@ -46,6 +60,7 @@ class MyGateVisitor(models.Model):
         string='Tenant',
         compute='_compute_tenant_id',
         store=True,
+        index=True,
         tracking=True
     )
 
@@ -119,6 +134,7 @@ class MyGateVisitor(models.Model):
     access_code = fields.Char(
         string='Access Code',
         copy=False,
+        index=True,
         tracking=True
     )
 
@@ -128,7 +144,7 @@ class MyGateVisitor(models.Model):
         tracking=True
     )
 
-    valid_until = fields.Datetime(string='Valid Until', tracking=True)
+    valid_until = fields.Datetime(string='Valid Until', index=True, tracking=True)
 
     # Security Information
     security_notes = fields.Text(string='Security Notes')
@@ -141,7 +157,11 @@ class MyGateVisitor(models.Model):
 
     # QR Code
     qr_code = fields.Binary(string='QR Code', attachment=True)
+    qr_pending = fields.Boolean(string='QR Code Pending', copy=False, index=True,
+                                help='The QR code is rendered in background')
     qr_code_image = fields.Char(string='QR Code URL', compute='_compute_qr_code_image')
+    gate_qr_date = fields.Datetime(string='Gate QR Updated On', readonly=True, copy=False,
+                                   help='Last change of the code or validity shown by the public QR image')
 
     # Portal Access
     portal_user_id = fields.Many2one(
@@ -205,12 +225,10 @@ class MyGateVisitor(models.Model):
 
     def action_confirm_request(self):
         """Confirm the visitor request and send notification to tenant"""
+        access_codes = self._allocate_gate_codes()
         for record in self:
             # Generate access code
-            import random
-            import string
-            access_code = ''.join(random.choices(string.digits, k=6))
-            record.access_code = access_code
+            record.access_code = access_codes[record.id]
 
             # Calculate validity
             if record.expected_arrival:
@@ -219,48 +237,79 @@ class MyGateVisitor(models.Model):
                 )
                 record.valid_until = valid_until
 
-            # Generate QR code immediately (ADD THIS LINE)
-            record._generate_qr_code()
-
-            # Send notification to tenant
-            record._send_portal_notification()
+        # QR code and mails are produced in background
+        self._queue_qr_code()
 
-            # Create activity for tenant
-            record._create_approval_activity()
+        # Send notification to tenant
+        self._send_portal_notification()
 
+        # Create activity for tenant
+        self._create_approval_activity()
 
     def _send_portal_notification(self):
         """Send notification to tenant's portal"""
-        for record in self:
-            if record.portal_user_id:
-                try:
-                    # Send email notification
-                    template = self.env.ref('community_management.email_template_visitor_request')
-                    template.send_mail(record.id, force_send=True)
-
-                    # Create portal message
-                    record.message_post(
-                        body=f"Visitor request for {record.name} has been sent for approval.",
-                        partner_ids=record.tenant_id.ids,
-                        subtype_xmlid='mail.mt_comment'
-                    )
-
-                    record.portal_notification_sent = True
-                except Exception as e:
-                    _logger.error(f"Failed to send portal notification: {e}")
+        visitors = self.filtered('portal_user_id')
+        if not visitors:
+            return
+        try:
+            # Queue email notifications, sent by the mail queue
+            template = self.env.ref('community_management.email_template_visitor_request')
+            template.send_mail_batch(visitors.ids)
+
+            # Create portal message
+            for record in visitors:
+                record.message_post(
+                    body=f"Visitor request for {record.name} has been sent for approval.",
+                    partner_ids=record.tenant_id.ids,
+                    subtype_xmlid='mail.mt_comment'
+                )
+
+            visitors.portal_notification_sent = True
+        except Exception as e:
+            _logger.error(f"Failed to send portal notification: {e}")
 
     def _create_approval_activity(self):
         """Create activity for tenant to approve/reject"""
-        for record in self:
-            self.env['mail.activity'].create({
-                'activity_type_id': self.env.ref('mail.mail_activity_data_todo').id,
-                'summary': f'Approve Visitor: {record.name}',
-                'note': f'Please approve or reject visitor request for {record.name}',
-                'user_id': record.portal_user_id.id if record.portal_user_id else False,
-                'res_id': record.id,
-                'res_model_id': self.env['ir.model']._get_id('mygate.visitor'),
-                'date_deadline': fields.Datetime.from_string(record.expected_arrival)
-            })
+        activity_type_id = self.env.ref('mail.mail_activity_data_todo').id
+        res_model_id = self.env['ir.model']._get_id('mygate.visitor')
+        self.env['mail.activity'].create([{
+            'activity_type_id': activity_type_id,
+            'summary': f'Approve Visitor: {record.name}',
+            'note': f'Please approve or reject visitor request for {record.name}',
+            'user_id': record.portal_user_id.id if record.portal_user_id else False,
+            'res_id': record.id,
+            'res_model_id': res_model_id,
+            'date_deadline': fields.Datetime.from_string(record.expected_arrival)
+        } for record in self])
+
+    def _close_approval_activities(self, feedback):
+        """Mark the current user's approval activities on these visitors as done"""
+        activities = self.env['mail.activity'].search([
+            ('res_id', 'in', self.ids),
+            ('res_model', '=', 'mygate.visitor'),
+            ('user_id', '=', self.env.user.id)
+        ])
+        if activities:
+            activities.action_feedback(feedback=feedback)
+
+    def _queue_qr_code(self):
+        """Flag QR codes for rendering by the background worker"""
+        if not self:
+            return
+        self.write({'qr_pending': True})
+        cron = self.env.ref('community_management.ir_cron_visitor_qr', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+
+    @api.model
+    def _cron_generate_qr_codes(self, batch_size=200):
+        """Render pending visitor QR codes, one committed batch per run"""
+        visitors = self.search([('qr_pending', '=', True)], limit=batch_size)
+        for visitor in visitors:
+            visitor._generate_qr_code()
+        visitors.write({'qr_pending': False})
+        remaining = self.search_count([('qr_pending', '=', True)])
+        self.env['ir.cron']._notify_progress(done=len(visitors), remaining=remaining)
 
     def get_portal_url(self):
         """Get the portal URL for this visitor"""
@@ -269,40 +318,24 @@ class MyGateVisitor(models.Model):
         return f"{base_url}/my/visitors/{self.id}"
 
     def action_approve(self):
-        """Approve the visitor request from portal or backend"""
-        for record in self:
-            # if record.state != 'pending':
-            #     raise UserError(_("Only pending requests can be approved."))
-
-            record.state = 'approved'
-            record.approval_date = fields.Datetime.now()
-            record.approved_by_id = self.env.user.id
-
-            # FIX: Ensure access code and validity exist BEFORE generating the QR code!
-            if not record.access_code:
-                import random
-                import string
-                record.access_code = ''.join(random.choices(string.digits, k=6))
-
-            if not record.valid_until and record.expected_arrival:
-                from datetime import timedelta
-                record.valid_until = fields.Datetime.from_string(record.expected_arrival) + timedelta(
-                    minutes=record.validity_duration)
-
-            # Generate QR code safely and store it in the database
-            record._generate_qr_code()
-
-            # Send approval notification
-            record._send_approval_notification()
-
-            # Mark activity as done
-            activities = self.env['mail.activity'].search([
-                ('res_id', '=', record.id),
-                ('res_model', '=', 'mygate.visitor'),
-                ('user_id', '=', self.env.user.id)
-            ])
-            if activities:
-                activities.action_feedback(feedback=f"Visitor {record.name} approved.")
+        """Approve the visitor requests from portal or backend"""
+        # Entering the approved state allocates the missing access codes
+        self.write({
+            'state': 'approved',
+            'approval_date': fields.Datetime.now(),
+            'approved_by_id': self.env.user.id,
+        })
+
+        for record in self.filtered(lambda r: not r.valid_until and r.expected_arrival):
+            record.valid_until = fields.Datetime.from_string(record.expected_arrival) + timedelta(
+                minutes=record.validity_duration)
+
+        # QR code is rendered in background, mails go through the mail queue
+        self._queue_qr_code()
+        self._send_approval_notification()
+
+        # Mark activities as done
+        self._close_approval_activities("Visitor approved.")
 
     # def action_approve(self):
     #     """Approve the visitor request from portal"""
@@ -330,26 +363,21 @@ class MyGateVisitor(models.Model):
     #             activities.action_feedback(feedback=f"Visitor {record.name} approved.")
 
     def action_reject(self):
-        """Reject the visitor request from portal"""
-        for record in self:
-            if record.state != 'pending':
-                raise UserError(_("Only pending requests can be rejected."))
+        """Reject the visitor requests from portal"""
+        if any(record.state != 'pending' for record in self):
+            raise UserError(_("Only pending requests can be rejected."))
 
-            record.state = 'rejected'
-            record.rejection_date = fields.Datetime.now()
-            record.rejected_by_id = self.env.user.id
+        self.write({
+            'state': 'rejected',
+            'rejection_date': fields.Datetime.now(),
+            'rejected_by_id': self.env.user.id,
+        })
 
-            # Send rejection notification
-            record._send_rejection_notification()
+        # Send rejection notification
+        self._send_rejection_notification()
 
-            # Mark activity as done
-            activities = self.env['mail.activity'].search([
-                ('res_id', '=', record.id),
-                ('res_model', '=', 'mygate.visitor'),
-                ('user_id', '=', self.env.user.id)
-            ])
-            if activities:
-                activities.action_feedback(feedback=f"Visitor {record.name} rejected.")
+        # Mark activities as done
+        self._close_approval_activities("Visitor rejected.")
 
     def action_mark_arrived(self):
         """Mark visitor as arrived"""
@@ -360,12 +388,54 @@ class MyGateVisitor(models.Model):
             record.actual_arrival = fields.Datetime.now()
             record.state = 'completed'
             record.completion_date = fields.Datetime.now()
+        self._log_gate_events('entry')
 
     def action_cancel(self):
         """Cancel the visitor request"""
         for record in self:
             record.state = 'cancelled'
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        now = fields.Datetime.now()
+        for vals in vals_list:
+            vals.setdefault('gate_qr_date', now)
+        return super().create(vals_list)
+
+    def write(self, vals):
+        if 'gate_qr_date' not in vals and any(field in vals for field in GATE_QR_FIELDS):
+            vals = dict(vals, gate_qr_date=fields.Datetime.now())
+        return super().write(vals)
+
+    def _get_gate_qr_payload(self):
+        """Content of the public gate QR image"""
+        self.ensure_one()
+        return f"VISITOR:{self.name}:{self.access_code}:{self.flat_id.name}"
+
+    def _get_gate_qr_etag(self):
+        """Hash of the QR payload and validity, used as HTTP ETag"""
+        self.ensure_one()
+        key = f"{self._get_gate_qr_payload()}|{self.valid_until or ''}"
+        return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+    @api.model
+    @tools.ormcache('payload')
+    def _render_gate_qr_png(self, payload):
+        """Render a QR payload as PNG bytes, cached by payload"""
+        import qrcode
+        qr = qrcode.QRCode(
+            version=1,
+            error_correction=qrcode.constants.ERROR_CORRECT_L,
+            box_size=10,
+            border=4,
+        )
+        qr.add_data(payload)
+        qr.make(fit=True)
+        img = qr.make_image(fill_color="#2c3e50", back_color="white")
+        buffered = BytesIO()
+        img.save(buffered, format="PNG")
+        return buffered.getvalue()
+
     def _generate_qr_code(self):
         """Generate QR code for visitor access"""
         try:
@@ -405,35 +475,35 @@ class MyGateVisitor(models.Model):
             _logger.error(f"Error generating QR code: {e}")
 
     def _send_approval_notification(self):
-        """Send approval notification"""
+        """Queue approval notifications"""
         try:
             template = self.env.ref('community_management.email_template_visitor_approved')
-            template.send_mail(self.id, force_send=True)
+            template.send_mail_batch(self.ids)
         except Exception as e:
             _logger.error(f"Failed to send approval notification: {e}")
 
     def _send_rejection_notification(self):
-        """Send rejection notification"""
+        """Queue rejection notifications"""
         try:
             template = self.env.ref('community_management.email_template_visitor_rejected')
-            template.send_mail(self.id, force_send=True)
+            template.send_mail_batch(self.ids)
         except Exception as e:
             _logger.error(f"Failed to send rejection notification: {e}")
 
     # Cron Jobs
     def _cron_check_expired_visitors(self):
         """Check and expire old visitor requests"""
-        expired_visitors = self.search([
-            ('state', 'in', ['approved', 'pending']),
-            ('valid_until', '<', fields.Datetime.now())
-        ])
+        return self._expire_gate_passes()
+
+    def _on_gate_codes_written(self):
+        super()._on_gate_codes_written()
+        # The code is part of the QR payload
+        self.write({'gate_qr_date': fields.Datetime.now()})
 
-        for visitor in expired_visitors:
-            if visitor.state == 'approved':
-                visitor.state = 'completed'
-                visitor.completion_date = fields.Datetime.now()
-            elif visitor.state == 'pending':
-                visitor.state = 'cancelled'
+    def _on_gate_passes_expired(self, from_state):
+        super()._on_gate_passes_expired(from_state)
+        if from_state == 'approved':
+            self.write({'completion_date': fields.Datetime.now()})
 
     def _cron_send_reminders(self):
         """Send reminders for upcoming visitors"""
@@ -1,4 +1,5 @@
 from odoo import models, fields, api
+from odoo.tools import SQL
 
 
 class PropertyNoticeBoard(models.Model):
@@ -38,12 +39,161 @@ class PropertyNoticeBoard(models.Model):
     # Checkbox to make notice visible (Make sure to check this in the backend!)
     active = fields.Boolean(string="Active", default=True, tracking=True)
 
+    visibility_ids = fields.One2many('property.notice.visibility', 'notice_id', string="Visible To Flats")
+    read_ids = fields.One2many('property.notice.read', 'notice_id', string="Read By")
+
     @api.onchange('community_id')
     def _onchange_community_id(self):
         """Clear target flats if the community is changed to avoid mismatches"""
         if self.community_id:
             self.target_flat_ids = False
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        notices = super().create(vals_list)
+        self.env['property.notice.visibility']._rebuild(notice_ids=notices.ids)
+        return notices
+
+    def write(self, vals):
+        if 'community_id' not in vals and 'target_flat_ids' not in vals:
+            return super().write(vals)
+        audience = {notice.id: (notice.community_id, notice.target_flat_ids) for notice in self}
+        res = super().write(vals)
+        changed = self.filtered(lambda notice: audience[notice.id] != (notice.community_id, notice.target_flat_ids))
+        self.env['property.notice.visibility']._rebuild(notice_ids=changed.ids)
+        return res
+
+    @api.model
+    def _rebuild_visibility(self):
+        """Rebuild the visibility rows of every notice (install/upgrade)"""
+        self.env['property.notice.visibility']._rebuild()
+
+    @api.model
+    def _get_visible_domain(self, flats):
+        """Domain of the notices currently shown to any of ``flats``"""
+        now = fields.Datetime.now()
+        return [
+            ('active', '=', True),
+            ('visibility_ids.flat_id', 'in', flats.ids),
+            '|', ('date_start', '=', False), ('date_start', '<=', now),
+            '|', ('date_end', '=', False), ('date_end', '>=', now),
+        ]
+
+    @api.model
+    def _get_unread_count(self, partner):
+        """Number of visible notices ``partner`` has not opened yet, over all their flats"""
+        flats = self.env['flat.management'].sudo().search([
+            '|', ('tenant_id', '=', partner.id), ('lease_owner_id', '=', partner.id),
+        ])
+        if not flats:
+            return 0
+        return self.sudo().search_count(self._get_visible_domain(flats) + [
+            ('read_ids', 'not any', [('partner_id', '=', partner.id)]),
+        ])
+
+    def _mark_read(self, partner):
+        """Record that ``partner`` has opened these notices"""
+        self.env['property.notice.read']._mark(self.ids, partner.id)
+
+
+class PropertyNoticeVisibility(models.Model):
+    """Flats each notice is shown to, maintained from the notice targeting.
+
+    A notice with target flats is visible to those flats only, otherwise to
+    every flat of its community, or of all communities when it has none.
+    Rows are reconciled when a notice's targeting or a flat's community
+    actually changes: only the pairs that appear or disappear are written.
+    """
+    _name = 'property.notice.visibility'
+    _description = 'Notice Visibility'
+    _log_access = False
+
+    _sql_constraints = [
+        ('flat_notice_uniq', 'unique(flat_id, notice_id)', 'A notice is listed only once per flat!'),
+    ]
+
+    notice_id = fields.Many2one('property.notice.board', string="Notice", required=True,
+                                ondelete='cascade', index=True)
+    flat_id = fields.Many2one('flat.management', string="Flat", required=True, ondelete='cascade')
+
+    @api.model
+    def _rebuild(self, notice_ids=None, flat_ids=None):
+        """Reconcile the rows of the given notices or flats, of all of them when neither is given"""
+        if (notice_ids is not None and not notice_ids) or (flat_ids is not None and not flat_ids):
+            return
+        self.env['property.notice.board'].flush_model(['community_id', 'target_flat_ids'])
+        self.env['flat.management'].flush_model(['community_id'])
+        target = self.env['property.notice.board']._fields['target_flat_ids']
+        relation = SQL.identifier(target.relation)
+        notice_col = SQL.identifier(target.column1)
+        flat_col = SQL.identifier(target.column2)
+        notice_cond = SQL("n.id IN %s", tuple(notice_ids)) if notice_ids is not None else SQL("TRUE")
+        flat_cond = SQL("f.id IN %s", tuple(flat_ids)) if flat_ids is not None else SQL("TRUE")
+
+        self.env.cr.execute(SQL(
+            """
+            WITH wanted AS (
+                SELECT n.id AS notice_id, f.id AS flat_id
+                  FROM property_notice_board n
+                  JOIN %(relation)s t ON t.%(notice_col)s = n.id
+                  JOIN flat_management f ON f.id = t.%(flat_col)s
+                 WHERE %(notice_cond)s AND %(flat_cond)s
+                 UNION ALL
+                SELECT n.id, f.id
+                  FROM property_notice_board n
+                  JOIN flat_management f ON n.community_id IS NULL OR f.community_id = n.community_id
+                 WHERE %(notice_cond)s AND %(flat_cond)s
+                   AND NOT EXISTS (SELECT 1 FROM %(relation)s t WHERE t.%(notice_col)s = n.id)
+            ), removed AS (
+                DELETE FROM property_notice_visibility v
+                 USING property_notice_board n, flat_management f
+                 WHERE n.id = v.notice_id AND f.id = v.flat_id AND %(notice_cond)s AND %(flat_cond)s
+                   AND NOT EXISTS (SELECT 1 FROM wanted w
+                                    WHERE w.notice_id = v.notice_id AND w.flat_id = v.flat_id)
+            )
+            INSERT INTO property_notice_visibility (notice_id, flat_id)
+            SELECT notice_id, flat_id FROM wanted
+            ON CONFLICT (flat_id, notice_id) DO NOTHING
+            """,
+            relation=relation, notice_col=notice_col, flat_col=flat_col,
+            notice_cond=notice_cond, flat_cond=flat_cond,
+        ))
+        self.invalidate_model()
+        self.env['property.notice.board'].invalidate_model(['visibility_ids'])
+
+
+class PropertyNoticeRead(models.Model):
+    """First time a partner opened a notice on the portal"""
+    _name = 'property.notice.read'
+    _description = 'Notice Read Marker'
+    _log_access = False
+
+    _sql_constraints = [
+        ('partner_notice_uniq', 'unique(partner_id, notice_id)', 'A notice is marked read only once per partner!'),
+    ]
+
+    notice_id = fields.Many2one('property.notice.board', string="Notice", required=True,
+                                ondelete='cascade', index=True)
+    partner_id = fields.Many2one('res.partner', string="Partner", required=True, ondelete='cascade')
+    read_date = fields.Datetime(string="Read On", default=fields.Datetime.now)
+
+    @api.model
+    def _mark(self, notice_ids, partner_id):
+        if not notice_ids:
+            return
+        # Existing markers are left untouched: no update, no row lock
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO property_notice_read (notice_id, partner_id, read_date)
+            SELECT notice_id, %(partner_id)s, NOW() AT TIME ZONE 'UTC'
+              FROM unnest(%(notice_ids)s::int[]) AS notice_id
+            ON CONFLICT (partner_id, notice_id) DO NOTHING
+            """,
+            partner_id=partner_id, notice_ids=list(notice_ids),
+        ))
+        self.invalidate_model()
+        self.env['property.notice.board'].invalidate_model(['read_ids'])
+
 # from odoo import models, fields
 # from datetime import datetime
 #
@@ -1,15 +1,21 @@
 # File: party_cab_del_dashboard.py
 from odoo import models, fields, api
-from datetime import datetime, timedelta
+from odoo.tools import SQL
+from datetime import datetime, time, timedelta
 import logging
+import pytz
 
 _logger = logging.getLogger(__name__)
 
 
 class CommunityAccessDashboard(models.TransientModel):
     _name = 'community.access.dashboard'
+    _inherit = 'community.kpi.dashboard.mixin'
     _description = 'Community Access & Guest Management Dashboard'
 
+    _kpi_live_fields = ('recent_visitor_requests', 'recent_cab_approvals', 'recent_delivery_passes',
+                        'recent_guest_invites')
+
     community_id = fields.Many2one('community.management', string='Select Community', required=True)
 
     # Visitor Request Stats
@@ -74,27 +80,28 @@ class CommunityAccessDashboard(models.TransientModel):
             self.total_child_exit_permissions = self.active_child_exit_permissions = self.expired_child_exit_permissions = self.today_exit_permissions = 0
             self.total_visiting_help = self.active_visiting_help = self.once_visiting_help = self.frequent_visiting_help = 0
             self.recent_visitor_requests = self.recent_cab_approvals = self.recent_delivery_passes = self.recent_guest_invites = "<p class='text-muted'>Select a community to view recent activity.</p>"
+            self.kpi_as_of = False
             return
+        self.env['community.kpi.snapshot']._load(self)
 
-        cid = self.community_id.id
-        limit = 5
-
-        # --- BULLETPROOF FILTERING LOGIC ---
-        # Fetch flats and residents belonging to the selected community
-        flats = self.env['flat.management'].search([('community_id', '=', cid)])
-        flat_ids = flats.ids
-        tenant_ids = flats.mapped('tenant_id').ids
-        owner_ids = flats.mapped('lease_owner_id').ids
-        all_resident_ids = list(set(tenant_ids + owner_ids))
+    def _compute_kpis(self):
+        """Compute the dashboard values of the selected community from its records"""
+        cid = self.community_id._origin.id
+        all_resident_ids = self._get_resident_ids()
+        day_start, day_end = self._get_today_utc_range()
+        today = fields.Date.context_today(self)
 
         try:
             # 1. Visitor Requests (Linked by Flat)
-            v_domain = [('flat_id', 'in', flat_ids)] if flat_ids else [('id', '=', 0)]
-            visitors = self.env['mygate.visitor'].search(v_domain)
-            self.total_visitor_requests = len(visitors)
-            self.pending_visitor_requests = len(visitors.filtered(lambda v: v.state == 'pending'))
-            self.approved_visitor_requests = len(visitors.filtered(lambda v: v.state == 'approved'))
-            self.completed_visitor_requests = len(visitors.filtered(lambda v: v.state == 'completed'))
+            v_domain = [('flat_id.community_id', '=', cid)]
+            self._apply_counts(self._aggregate('mygate.visitor', v_domain, lambda col: {
+                'total_visitor_requests': SQL("COUNT(*)"),
+                'pending_visitor_requests': SQL("COUNT(*) FILTER (WHERE %s = 'pending')", col('state')),
+                'approved_visitor_requests': SQL("COUNT(*) FILTER (WHERE %s = 'approved')", col('state')),
+                'completed_visitor_requests': SQL("COUNT(*) FILTER (WHERE %s = 'completed')", col('state')),
+                'today_visitor_requests': SQL("COUNT(*) FILTER (WHERE %s >= %s AND %s < %s)",
+                                              col('expected_arrival'), day_start, col('expected_arrival'), day_end),
+            }))
 
             if self.total_visitor_requests > 0:
                 self.visitor_approval_rate = (self.approved_visitor_requests / self.total_visitor_requests) * 100
@@ -103,46 +110,69 @@ class CommunityAccessDashboard(models.TransientModel):
 
             # 2. Cab Approvals (Linked by Resident)
             res_domain = [('resident_id', 'in', all_resident_ids)] if all_resident_ids else [('id', '=', 0)]
-            cabs = self.env['cab.preapproval'].search(res_domain)
-            self.total_cab_approvals = len(cabs)
-            self.active_cab_approvals = len(cabs.filtered(lambda c: c.state == 'active'))
-            self.once_cab_approvals = len(cabs.filtered(lambda c: c.mode == 'once'))
-            self.frequent_cab_approvals = len(cabs.filtered(lambda c: c.mode == 'frequent'))
+            self._apply_counts(self._aggregate('cab.preapproval', res_domain, lambda col: {
+                'total_cab_approvals': SQL("COUNT(*)"),
+                'active_cab_approvals': SQL("COUNT(*) FILTER (WHERE %s = 'active')", col('state')),
+                'once_cab_approvals': SQL("COUNT(*) FILTER (WHERE %s = 'once')", col('mode')),
+                'frequent_cab_approvals': SQL("COUNT(*) FILTER (WHERE %s = 'frequent')", col('mode')),
+            }))
 
             # 3. Delivery Passes (Linked by Resident)
-            deliveries = self.env['community.delivery.pass'].search(res_domain)
-            self.total_delivery_passes = len(deliveries)
-            self.active_delivery_passes = len(deliveries.filtered(lambda d: d.state == 'active'))
-            self.surprise_deliveries = len(deliveries.filtered(lambda d: d.is_surprise))
-            self.gate_leave_deliveries = len(deliveries.filtered(lambda d: d.allow_leave_at_gate))
+            self._apply_counts(self._aggregate('community.delivery.pass', res_domain, lambda col: {
+                'total_delivery_passes': SQL("COUNT(*)"),
+                'active_delivery_passes': SQL("COUNT(*) FILTER (WHERE %s = 'active')", col('state')),
+                'surprise_deliveries': SQL("COUNT(*) FILTER (WHERE %s)", col('is_surprise')),
+                'gate_leave_deliveries': SQL("COUNT(*) FILTER (WHERE %s)", col('allow_leave_at_gate')),
+            }))
 
             # 4. Guest Invites (Linked by Resident)
-            guests = self.env['guest.invite'].search(res_domain)
-            self.total_guest_invites = len(guests)
-            self.active_guest_invites = len(guests.filtered(lambda g: g.state == 'active'))
-            self.once_guest_invites = len(guests.filtered(lambda g: g.invite_type == 'once'))
-            self.frequent_guest_invites = len(guests.filtered(lambda g: g.invite_type == 'frequent'))
-            self.total_guests = sum(len(g.guest_line_ids) for g in guests)
+            self._apply_counts(self._aggregate('guest.invite', res_domain, lambda col: {
+                'total_guest_invites': SQL("COUNT(*)"),
+                'active_guest_invites': SQL("COUNT(*) FILTER (WHERE %s = 'active')", col('state')),
+                'once_guest_invites': SQL("COUNT(*) FILTER (WHERE %s = 'once')", col('invite_type')),
+                'frequent_guest_invites': SQL("COUNT(*) FILTER (WHERE %s = 'frequent')", col('invite_type')),
+                'total_guests': SQL(
+                    "COALESCE(SUM((SELECT COUNT(*) FROM guest_invite_line line WHERE line.invite_id = %s)), 0)",
+                    col('id')),
+            }))
 
             # 5. Party Invites (Linked by Host)
             host_domain = [('host_id', 'in', all_resident_ids)] if all_resident_ids else [('id', '=', 0)]
-            parties = self.env['party.group.invite'].search(host_domain)
-            self.total_party_invites = len(parties)
-            self.active_party_invites = len(parties.filtered(lambda p: p.state == 'active'))
+            self._apply_counts(self._aggregate('party.group.invite', host_domain, lambda col: {
+                'total_party_invites': SQL("COUNT(*)"),
+                'active_party_invites': SQL("COUNT(*) FILTER (WHERE %s = 'active')", col('state')),
+                'upcoming_parties': SQL("COUNT(*) FILTER (WHERE %s >= %s)", col('event_date'), today),
+            }))
 
             # 6. Child Exit & Visiting Help (Linked by Tenant)
             tenant_domain = [('tenant_id', 'in', all_resident_ids)] if all_resident_ids else [('id', '=', 0)]
-            exits = self.env['child.exit.permission'].search(tenant_domain)
-            self.total_child_exit_permissions = len(exits)
-            self.active_child_exit_permissions = len(exits.filtered(lambda e: e.state == 'active'))
-            self.expired_child_exit_permissions = len(exits.filtered(lambda e: e.state == 'expired'))
+            self._apply_counts(self._aggregate('child.exit.permission', tenant_domain, lambda col: {
+                'total_child_exit_permissions': SQL("COUNT(*)"),
+                'active_child_exit_permissions': SQL("COUNT(*) FILTER (WHERE %s = 'active')", col('state')),
+                'expired_child_exit_permissions': SQL("COUNT(*) FILTER (WHERE %s = 'expired')", col('state')),
+                'today_exit_permissions': SQL("COUNT(*) FILTER (WHERE %s >= %s AND %s < %s)",
+                                              col('allowed_exit_time'), day_start, col('allowed_exit_time'), day_end),
+            }))
+
+            self._apply_counts(self._aggregate('community.visiting.help.entry', tenant_domain, lambda col: {
+                'total_visiting_help': SQL("COUNT(*)"),
+                'active_visiting_help': SQL("COUNT(*) FILTER (WHERE %s = 'active')", col('state')),
+                'once_visiting_help': SQL("COUNT(*) FILTER (WHERE %s = 'once')", col('entry_type')),
+                'frequent_visiting_help': SQL("COUNT(*) FILTER (WHERE %s = 'frequent')", col('entry_type')),
+            }))
 
-            helps = self.env['community.visiting.help.entry'].search(tenant_domain)
-            self.total_visiting_help = len(helps)
-            self.active_visiting_help = len(helps.filtered(lambda h: h.state == 'active'))
-            self.once_visiting_help = len(helps.filtered(lambda h: h.entry_type == 'once'))
-            self.frequent_visiting_help = len(helps.filtered(lambda h: h.entry_type == 'frequent'))
+        except Exception as e:
+            _logger.error(f"Error computing access dashboard data: {e}")
 
+    def _compute_feeds(self):
+        """Render the recent activity of the selected community"""
+        cid = self.community_id._origin.id
+        limit = 5
+        all_resident_ids = self._get_resident_ids()
+        v_domain = [('flat_id.community_id', '=', cid)]
+        res_domain = [('resident_id', 'in', all_resident_ids)] if all_resident_ids else [('id', '=', 0)]
+
+        try:
             # --- RECENT HTML DATA GENERATION ---
             recent_vis = self.env['mygate.visitor'].search(v_domain, limit=limit, order='create_date desc')
             v_html = ""
@@ -171,10 +201,44 @@ class CommunityAccessDashboard(models.TransientModel):
             self.recent_guest_invites = g_html or "<p class='text-muted p-2'>No recent guests</p>"
 
         except Exception as e:
-            _logger.error(f"Error computing access dashboard data: {e}")
+            _logger.error(f"Error computing access dashboard activity: {e}")
+
+    def _get_resident_ids(self):
+        """Residents (tenants and lease owners) of the flats of the selected community"""
+        [(tenant_ids, owner_ids)] = self.env['flat.management']._read_group(
+            [('community_id', '=', self.community_id._origin.id)],
+            aggregates=['tenant_id:array_agg', 'lease_owner_id:array_agg'])
+        return list({pid for pid in (tenant_ids or []) + (owner_ids or []) if pid})
+
+    def _get_today_utc_range(self):
+        """Start and end (UTC) of the current day in the user's timezone"""
+        today = fields.Date.context_today(self)
+        tz = pytz.timezone(self.env.context.get('tz') or self.env.user.tz or 'UTC')
+        day_start = tz.localize(datetime.combine(today, time.min)).astimezone(pytz.utc).replace(tzinfo=None)
+        return day_start, day_start + timedelta(days=1)
+
+    def _aggregate(self, model_name, domain, get_aggregates):
+        """Evaluate KPI aggregates over the ``domain`` records of ``model_name`` in one query.
+
+        :param get_aggregates: function returning ``{kpi field: SQL aggregate}``,
+            given a function that maps a column name to its SQL reference
+        :return: ``{kpi field: value}``
+        """
+        Model = self.env[model_name]
+        query = Model._search(domain)
+        aggregates = get_aggregates(lambda fname: SQL.identifier(query.table, fname))
+        if query.is_empty():
+            return dict.fromkeys(aggregates, 0)
+        self.env.cr.execute(query.select(*aggregates.values()))
+        return dict(zip(aggregates, self.env.cr.fetchone()))
+
+    def _apply_counts(self, counts):
+        for fname, value in counts.items():
+            self[fname] = value or 0
 
     # Standard Actions
     def action_refresh_dashboard(self):
+        self.env['community.kpi.snapshot']._mark_stale(self.community_id)
         return {'type': 'ir.actions.client', 'tag': 'reload'}
 
     def action_open_visitor_requests(self):
@@ -1,4 +1,4 @@
-from odoo import models, fields, api
+from odoo import models, fields, api, tools
 from datetime import datetime, timedelta
 import uuid
 import hashlib
@@ -45,6 +45,11 @@ class PartyGroupInvite(models.Model):
                 vals['token'] = hashlib.md5(str(uuid.uuid4()).encode()).hexdigest()[:16]
         return super().create(vals_list)
 
+    def init(self):
+        # Portal invite lists page each flat's invites newest first
+        tools.create_index(self.env.cr, 'party_group_invite_flat_create_date_idx', self._table,
+                           ['flat_id', 'create_date DESC', 'id DESC'])
+
     @api.depends('token')
     def _compute_share_link(self):
         base = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
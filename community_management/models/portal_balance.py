@@ -0,0 +1,165 @@
+from odoo import models, fields, api
+from odoo.tools import SQL, str2bool
+
+# System parameter enabling the per-partner /my/bills balance cache
+BALANCE_CACHE_PARAM = 'community_management.portal_balance_cache'
+
+UNPAID_PAYMENT_STATES = ('not_paid', 'partial')
+PAID_PAYMENT_STATES = ('paid', 'in_payment', 'reversed')
+
+
+class PortalBalanceCache(models.Model):
+    """Outstanding and paid totals of a partner's posted customer invoices.
+
+    Rows are filled on demand by ``/my/bills`` when the
+    ``community_management.portal_balance_cache`` parameter is set, and
+    marked stale whenever one of the partner's invoices is posted, reset or
+    gets a payment, so they never outlive the totals they summarise.
+    """
+    _name = 'portal.balance.cache'
+    _description = 'Portal Balance Cache'
+    _rec_name = 'partner_id'
+    _log_access = False
+
+    _sql_constraints = [
+        ('partner_uniq', 'unique(partner_id)', 'Only one cached balance per partner!'),
+    ]
+
+    partner_id = fields.Many2one('res.partner', string='Partner', required=True, ondelete='cascade',
+                                 readonly=True)
+    amount_due = fields.Float(string='Outstanding', readonly=True)
+    amount_paid = fields.Float(string='Paid', readonly=True)
+    unpaid_count = fields.Integer(string='Unpaid Invoices', readonly=True)
+    paid_count = fields.Integer(string='Paid Invoices', readonly=True)
+    computed_at = fields.Datetime(string='Computed On', readonly=True)
+
+    @api.model
+    def _get_invoice_domain(self, partner, paid=None):
+        """Posted customer invoices of ``partner``, only the paid or unpaid ones if ``paid`` is given"""
+        domain = [
+            ('move_type', '=', 'out_invoice'),
+            ('partner_id', '=', partner.id),
+            ('state', '=', 'posted'),
+        ]
+        if paid is not None:
+            domain.append(('payment_state', 'in', list(PAID_PAYMENT_STATES if paid else UNPAID_PAYMENT_STATES)))
+        return domain
+
+    @api.model
+    def _compute_balance(self, partner):
+        """Totals of the partner's invoices, from one grouped query"""
+        balance = {'amount_due': 0.0, 'amount_paid': 0.0, 'unpaid_count': 0, 'paid_count': 0}
+        groups = self.env['account.move'].sudo()._read_group(
+            self._get_invoice_domain(partner),
+            groupby=['payment_state'],
+            aggregates=['amount_residual:sum', 'amount_total:sum', '__count'],
+        )
+        for payment_state, amount_residual, amount_total, count in groups:
+            if payment_state in UNPAID_PAYMENT_STATES:
+                balance['amount_due'] += amount_residual
+                balance['unpaid_count'] += count
+            elif payment_state in PAID_PAYMENT_STATES:
+                balance['amount_paid'] += amount_total
+                balance['paid_count'] += count
+        return balance
+
+    @api.model
+    def _is_enabled(self):
+        return str2bool(self.env['ir.config_parameter'].sudo().get_param(BALANCE_CACHE_PARAM, 'False'))
+
+    @api.model
+    def _get_balance(self, partner):
+        """Invoice totals of ``partner``, read from the cache when it is enabled"""
+        if not self._is_enabled():
+            return self._compute_balance(partner)
+        self.env.cr.execute(SQL(
+            """
+            SELECT amount_due, amount_paid, unpaid_count, paid_count, computed_at
+              FROM portal_balance_cache
+             WHERE partner_id = %s
+            """,
+            partner.id,
+        ))
+        row = self.env.cr.dictfetchone()
+        if row and row.pop('computed_at'):
+            return row
+        balance = self._compute_balance(partner)
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO portal_balance_cache (partner_id, amount_due, amount_paid, unpaid_count, paid_count,
+                                              computed_at)
+            VALUES (%(partner_id)s, %(amount_due)s, %(amount_paid)s, %(unpaid_count)s, %(paid_count)s,
+                    NOW() AT TIME ZONE 'UTC')
+            ON CONFLICT (partner_id) DO UPDATE
+               SET amount_due = EXCLUDED.amount_due,
+                   amount_paid = EXCLUDED.amount_paid,
+                   unpaid_count = EXCLUDED.unpaid_count,
+                   paid_count = EXCLUDED.paid_count,
+                   computed_at = EXCLUDED.computed_at
+            """,
+            partner_id=partner.id, **balance,
+        ))
+        return balance
+
+    @api.model
+    def _invalidate(self, partners):
+        """Mark the balances of ``partners`` stale.
+
+        A stale row is kept rather than deleted: a request that computed the
+        totals before the change committed then conflicts with it and is
+        retried, instead of caching the outdated totals.
+        """
+        if not partners or not self._is_enabled():
+            return
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO portal_balance_cache (partner_id)
+            SELECT unnest(%s::int[])
+            ON CONFLICT (partner_id) DO UPDATE SET computed_at = NULL
+            """,
+            partners.ids,
+        ))
+
+    @api.model
+    def _clear(self):
+        """Drop every cached balance, e.g. missed invalidations while the cache was disabled"""
+        self.env.cr.execute("DELETE FROM portal_balance_cache")
+        self.invalidate_model()
+
+
+class IrConfigParameter(models.Model):
+    _inherit = 'ir.config_parameter'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        params = super().create(vals_list)
+        if any(param.key == BALANCE_CACHE_PARAM for param in params):
+            self.env['portal.balance.cache']._clear()
+        return params
+
+    def write(self, vals):
+        res = super().write(vals)
+        if any(param.key == BALANCE_CACHE_PARAM for param in self):
+            self.env['portal.balance.cache']._clear()
+        return res
+
+
+class AccountMove(models.Model):
+    _inherit = 'account.move'
+
+    def _invalidate_portal_balance(self):
+        invoices = self.filtered(lambda move: move.id and move.move_type == 'out_invoice')
+        self.env['portal.balance.cache']._invalidate(invoices.partner_id)
+
+    def _compute_payment_state(self):
+        # Runs whenever a payment is reconciled with or removed from the invoice
+        super()._compute_payment_state()
+        self._invalidate_portal_balance()
+
+    def write(self, vals):
+        if 'partner_id' in vals:
+            self._invalidate_portal_balance()
+        res = super().write(vals)
+        if 'state' in vals or 'partner_id' in vals:
+            self._invalidate_portal_balance()
+        return res
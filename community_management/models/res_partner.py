@@ -1,11 +1,11 @@
 # models/res_partner_category.py
-from odoo import models, fields
+from odoo import models, fields, tools
 
 class ResPartnerCategoryCustom(models.Model):
     _name = 'res.partner.category.custom'
     _description = 'Contact Category'
 
-    name = fields.Char(string='Category', required=True)
+    name = fields.Char(string='Category', required=True, index='trigram')
     active = fields.Boolean(default=True)
 
 # models/res_partner_inherit.py
@@ -27,6 +27,11 @@ class ResPartner(models.Model):
         string='Security Guard',
         default=False
     )
+    security_community_id = fields.Many2one(
+        'community.management',
+        string='Guarded Community',
+        help='Community whose gate codes this guard can verify and admit.'
+    )
 
     community_role = fields.Selection([
         ('', ''),  # Empty option - No role
@@ -40,12 +45,15 @@ class ResPartner(models.Model):
 
     last_notice_viewed = fields.Datetime(string="Last Notice Viewed", default=fields.Datetime.now)
 
+    def init(self):
+        super().init()
+        # Substring search on service provider names, restricted to the
+        # partners that have a service category
+        if self.env.registry.has_trigram:
+            tools.create_index(self.env.cr, 'res_partner_service_provider_name_trgm_idx', self._table,
+                               ['name gin_trgm_ops'], method='gin', where='category_custom_id IS NOT NULL')
+
     def get_unread_notice_count(self):
         """Get count of unread notices for this partner"""
-        notice_model = self.env['property.notice.board']
-
-        all_notices = notice_model.get_user_notices(self.env.user)
-        last_viewed = self.last_notice_viewed or fields.Datetime.from_string('1900-01-01')
-
-        unread_count = sum(1 for notice in all_notices if notice.create_date > last_viewed)
-        return unread_count
+        self.ensure_one()
+        return self.env['property.notice.board']._get_unread_count(self)
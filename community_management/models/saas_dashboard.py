@@ -6,8 +6,11 @@ _logger = logging.getLogger(__name__)
 
 class SaasMasterDashboard(models.TransientModel):
     _name = 'saas.master.dashboard'
+    _inherit = 'community.kpi.dashboard.mixin'
     _description = 'SaaS Master Engagement Dashboard'
 
+    _kpi_live_fields = ('recent_notices', 'recent_requests', 'recent_bookings')
+
     # 1. FILTER
     community_id = fields.Many2one('community.management', string='Active Community', required=True)
 
@@ -32,9 +35,11 @@ class SaasMasterDashboard(models.TransientModel):
         if not self.community_id:
             self._reset_dashboard()
             return
+        self.env['community.kpi.snapshot']._load(self)
 
-        cid = self.community_id.id
-        limit = 5
+    def _compute_kpis(self):
+        """Compute the dashboard values of the selected community from its records"""
+        cid = self.community_id._origin.id
 
         try:
             # --- AGGREGATE KPIs ---
@@ -101,6 +106,15 @@ class SaasMasterDashboard(models.TransientModel):
                 </div>
             """
 
+        except Exception as e:
+            _logger.error(f"Error computing SaaS dashboard data: {e}")
+
+    def _compute_feeds(self):
+        """Render the recent activity of the selected community"""
+        cid = self.community_id._origin.id
+        limit = 5
+
+        try:
             # --- GENERATE RECENT ACTIVITY FEEDS (App Style) ---
             def get_badge(text, style_type):
                 colors = {
@@ -137,12 +151,13 @@ class SaasMasterDashboard(models.TransientModel):
             self.recent_bookings = b_html + "</div>" if recent_b else "<p class='text-muted'>No recent bookings.</p>"
 
         except Exception as e:
-            _logger.error(f"Error computing SaaS dashboard data: {e}")
+            _logger.error(f"Error computing SaaS dashboard activity: {e}")
 
     def _reset_dashboard(self):
         self.active_notices = self.total_access_requests = self.pending_access = self.total_bookings = self.pending_bookings = 0
         self.chart_notices = self.chart_bookings = ""
         self.recent_notices = self.recent_requests = self.recent_bookings = "<p class='text-muted'>Select a community to view data.</p>"
+        self.kpi_as_of = False
 
     @api.model
     def action_open_dashboard(self):
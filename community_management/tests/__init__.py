@@ -0,0 +1,9 @@
+from . import test_gate_code_allocator
+from . import test_cab_preapproval
+from . import test_portal_keyset
+from . import test_portal_security_guards
+from . import test_kpi_snapshot
+from . import test_dashboard_payment_totals
+from . import test_portal_notice
+from . import test_gate_credential
+from . import test_community_post_views
@@ -0,0 +1,31 @@
+from odoo.tests import TransactionCase
+
+
+class CommunityCommon(TransactionCase):
+    """A community with one building, floor and occupied flat"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.community = cls.env['community.management'].create({
+            'name': 'Test Community',
+            'country_id': cls.env.ref('base.in').id,
+        })
+        cls.building = cls.env['building.management'].create({
+            'name': 'Block A',
+            'community_id': cls.community.id,
+        })
+        cls.floor = cls.env['floor.management'].create({
+            'name': 'Floor 1',
+            'building_id': cls.building.id,
+        })
+        cls.flat_type = cls.env['flat.type'].create({'name': '2BHK'})
+        cls.resident = cls.env['res.partner'].create({'name': 'Test Resident', 'tz': 'Asia/Kolkata'})
+        cls.flat = cls.env['flat.management'].create({
+            'name': 'A-101',
+            'community_id': cls.community.id,
+            'building_id': cls.building.id,
+            'floor_id': cls.floor.id,
+            'flat_type_id': cls.flat_type.id,
+            'status': 'occupied',
+        })
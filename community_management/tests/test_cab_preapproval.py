@@ -0,0 +1,51 @@
+from datetime import datetime
+
+from odoo.tests import tagged, new_test_user
+
+from .common import CommunityCommon
+
+
+@tagged('post_install', '-at_install')
+class TestCabPreapprovalAdmission(CommunityCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.guard = new_test_user(
+            cls.env, login='gate_guard', tz='Asia/Kolkata',
+            groups='base.group_user,community_management.group_community_security_guard',
+        )
+
+    def _create_pass(self, **vals):
+        return self.env['cab.preapproval'].create({
+            'resident_id': self.resident.id,
+            'flat_id': self.flat.id,
+            'mode': 'frequent',
+            'freq_days': 'all',
+            'freq_time_from': 0.0,
+            'freq_time_to': 23.99,
+            'entries_per_day': '1',
+            'state': 'active',
+            'start_datetime': datetime(2026, 1, 1),
+            'end_datetime': datetime(2026, 2, 1),
+            **vals,
+        }).with_user(self.guard)
+
+    def test_allowed_hours_are_local(self):
+        cab = self._create_pass(freq_time_from=9.0, freq_time_to=10.0)
+        # 03:45 UTC is 09:15 in India
+        allowed, reason = cab._check_gate_admission(datetime(2026, 1, 5, 3, 45))
+        self.assertTrue(allowed, reason)
+        # 09:15 UTC is 14:45 in India
+        allowed, _reason = cab._check_gate_admission(datetime(2026, 1, 6, 9, 15))
+        self.assertFalse(allowed)
+
+    def test_daily_quota_resets_at_local_midnight(self):
+        cab = self._create_pass()
+        # 22:30 on January 5th in India
+        self.assertTrue(cab._check_gate_admission(datetime(2026, 1, 5, 17, 0))[0])
+        # 00:30 on January 6th in India, same UTC day
+        self.assertTrue(cab._check_gate_admission(datetime(2026, 1, 5, 19, 0))[0])
+        allowed, reason = cab._check_gate_admission(datetime(2026, 1, 5, 19, 30))
+        self.assertFalse(allowed)
+        self.assertEqual(reason, 'Daily entry limit reached')
@@ -0,0 +1,30 @@
+from odoo.tests import tagged, new_test_user
+
+from .common import CommunityCommon
+
+
+@tagged('post_install', '-at_install')
+class TestCommunityPostViews(CommunityCommon):
+
+    def test_views_count_viewers(self):
+        post = self.env['community.post'].create({
+            'name': 'Lift maintenance',
+            'description': '<p>Lift B is under maintenance today.</p>',
+            'community_id': self.community.id,
+        })
+        viewer = new_test_user(self.env, login='post_viewer', groups='base.group_portal')
+        View = self.env['community.post.view']
+
+        # Page refreshes stage a single view per viewer
+        for _i in range(3):
+            View._buffer_view(post.id, self.env.uid)
+        View._buffer_view(post.id, viewer.id)
+        View._cron_ingest_views()
+        post.invalidate_recordset(['view_count'])
+        self.assertEqual(post.view_count, 2)
+
+        # Views already counted are not staged again
+        View._buffer_view(post.id, viewer.id)
+        View._cron_ingest_views()
+        post.invalidate_recordset(['view_count'])
+        self.assertEqual(post.view_count, 2)
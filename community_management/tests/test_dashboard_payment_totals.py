@@ -0,0 +1,74 @@
+from odoo import Command, fields
+from odoo.tests import tagged
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+
+from .common import CommunityCommon
+
+
+@tagged('post_install', '-at_install')
+class TestDashboardPaymentTotals(CommunityCommon, AccountTestInvoicingCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Dashboard = cls.env['real.estate.dashboard']
+        today = fields.Date.context_today(cls.Dashboard)
+        cls.invoice_paid = cls._post_invoice(1000.0, today)
+        cls.invoice_overdue = cls._post_invoice(500.0, fields.Date.to_date('2020-01-01'))
+        cls.env['account.payment.register'].with_context(
+            active_model='account.move', active_ids=cls.invoice_paid.ids,
+        ).create({'amount': 400.0})._create_payments()
+
+    @classmethod
+    def _post_invoice(cls, amount, invoice_date):
+        return cls.init_invoice('out_invoice', partner=cls.resident, invoice_date=invoice_date,
+                                amounts=[amount], taxes=[], post=True)
+
+    def _create_maintenance(self, invoices):
+        return self.env['flat.maintenance'].create({
+            'tenant_id': self.resident.id,
+            'community_id': self.community.id,
+            'flat_id': self.flat.id,
+            'standard_amount': 1000.0,
+            'invoice_ids': [Command.set(invoices.ids)],
+        })
+
+    def _create_corpus(self, amount, invoice=None):
+        return self.env['corpus.fund.invoice'].create({
+            'flat_id': self.flat.id,
+            'community_id': self.community.id,
+            'amount': amount,
+            'invoice_id': invoice.id if invoice else False,
+        })
+
+    def test_maintenance_shared_invoice_counted_once(self):
+        paid, overdue = self.invoice_paid, self.invoice_overdue
+        self._create_maintenance(paid | overdue)
+        self._create_maintenance(overdue)
+
+        totals = self.Dashboard._get_maintenance_payment_totals(self.community.id)
+        self.assertAlmostEqual(totals['total'], paid.amount_total + overdue.amount_total)
+        self.assertAlmostEqual(totals['collected'], paid.amount_total - paid.amount_residual)
+        self.assertAlmostEqual(totals['pending'], paid.amount_residual + overdue.amount_total)
+        self.assertAlmostEqual(totals['overdue'], overdue.amount_residual)
+
+        # The period applies to the invoice date
+        totals = self.Dashboard._get_maintenance_payment_totals(self.community.id, date_from=paid.invoice_date)
+        self.assertAlmostEqual(totals['total'], paid.amount_total)
+        self.assertAlmostEqual(totals['overdue'], 0.0)
+
+    def test_corpus_without_invoice_is_pending(self):
+        overdue = self.invoice_overdue
+        self._create_corpus(500.0, overdue)
+        self._create_corpus(300.0)
+
+        totals = self.Dashboard._get_corpus_payment_totals(self.community.id)
+        self.assertAlmostEqual(totals['total'], 800.0)
+        self.assertAlmostEqual(totals['collected'], 0.0)
+        self.assertAlmostEqual(totals['pending'], overdue.amount_total + 300.0)
+        self.assertAlmostEqual(totals['overdue'], overdue.amount_residual)
+
+        # Records without an invoice have no invoice date
+        totals = self.Dashboard._get_corpus_payment_totals(self.community.id, date_from=overdue.invoice_date)
+        self.assertAlmostEqual(totals['total'], 500.0)
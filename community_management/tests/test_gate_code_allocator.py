@@ -0,0 +1,44 @@
+from odoo.tests import tagged
+
+from ..models.gate_code_allocator import _permute_index, CODE_DIGITS
+from .common import CommunityCommon
+
+
+@tagged('post_install', '-at_install')
+class TestGateCodeAllocator(CommunityCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Allocator = cls.env['gate.code.allocator'].sudo()
+
+    def _next_code(self, community_id):
+        allocator = self.Allocator.browse(self.Allocator._get_allocator_id(community_id))
+        return str(_permute_index(allocator.secret, allocator.next_index)).zfill(CODE_DIGITS)
+
+    def test_allocate_unique_codes(self):
+        codes = self.Allocator._allocate(self.community.id, 50)
+        self.assertEqual(len(codes), 50)
+        self.assertEqual(len(set(codes)), 50)
+        self.assertTrue(all(len(code) == CODE_DIGITS and code.isdigit() for code in codes))
+        self.assertFalse(set(codes) & set(self.Allocator._allocate(self.community.id, 50)))
+
+    def test_allocator_without_community_is_reused(self):
+        self.Allocator._allocate(False, 2)
+        self.Allocator._allocate(False, 3)
+        allocators = self.Allocator.search([('community_id', '=', False)])
+        self.assertEqual(len(allocators), 1)
+        self.assertEqual(allocators.next_index, 5)
+
+    def test_allocate_skips_codes_in_use(self):
+        taken = self._next_code(self.community.id)
+        self.env['gate.credential'].sudo().create({
+            'code': taken,
+            'community_id': self.community.id,
+            'pass_type': 'cab',
+            'res_model': 'cab.preapproval',
+            'res_id': 1,
+        })
+        codes = self.Allocator._allocate(self.community.id, 3)
+        self.assertEqual(len(codes), 3)
+        self.assertNotIn(taken, codes)
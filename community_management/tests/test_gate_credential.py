@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+
+from odoo import fields
+from odoo.tests import tagged, new_test_user
+
+from ..models.gate_audit import COMPACT_AUDIT_PARAM
+from .common import CommunityCommon
+
+
+@tagged('post_install', '-at_install')
+class TestGateCredentialScope(CommunityCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.other_community = cls.env['community.management'].create({
+            'name': 'Other Community',
+            'country_id': cls.env.ref('base.in').id,
+        })
+        cls.Credential = cls.env['gate.credential'].sudo()
+        # The same code issued in both communities
+        cls.credential, cls.other_credential = cls.Credential.create([{
+            'code': '123456',
+            'community_id': community.id,
+            'pass_type': 'visitor',
+            'res_model': 'mygate.visitor',
+            'res_id': res_id,
+        } for res_id, community in enumerate(cls.community | cls.other_community, start=1)])
+        cls.guard = new_test_user(
+            cls.env, login='scoped_guard',
+            groups='base.group_user,community_management.group_community_security_guard',
+        )
+        cls.guard.partner_id.write({'is_security_guard': True, 'security_community_id': cls.community.id})
+
+    def test_code_resolves_in_guard_community(self):
+        community = self.env['gate.credential'].with_user(self.guard)._get_gate_community()
+        self.assertEqual(community, self.community)
+        self.assertEqual(self.Credential._resolve('123456', community), self.credential)
+        self.assertEqual(self.Credential._resolve('123456', self.other_community), self.other_credential)
+
+    def test_code_needs_a_community(self):
+        self.assertFalse(self.Credential._resolve('123456', self.env['community.management']))
+        resident = new_test_user(self.env, login='scoped_resident', groups='base.group_portal')
+        resident.partner_id.security_community_id = self.community
+        # Only guards get a gate community
+        self.assertFalse(self.env['gate.credential'].with_user(resident)._get_gate_community())
+
+
+@tagged('post_install', '-at_install')
+class TestGateCodeBatchWrite(CommunityCommon):
+
+    def _create_visitor(self):
+        return self.env['mygate.visitor'].create({
+            'name': 'Courier',
+            'mobile': '9800000000',
+            'flat_id': self.flat.id,
+            'expected_arrival': fields.Datetime.now() + timedelta(hours=1),
+            'gate_qr_date': datetime(2026, 1, 1),
+        })
+
+    def test_batch_write_runs_side_effects(self):
+        visitor = self._create_visitor()
+        snapshot = self.env['community.kpi.snapshot'].create({
+            'dashboard': 'community.access.dashboard',
+            'community_id': self.community.id,
+            'scope': 'test',
+            'user_id': self.env.uid,
+            'date': fields.Date.today(),
+            'stale': False,
+        })
+        visitor._write_gate_codes({visitor.id: '654321'})
+        self.assertEqual(visitor.access_code, '654321')
+        # The QR image cache key follows the code
+        self.assertGreater(visitor.gate_qr_date, datetime(2026, 1, 1))
+        snapshot.invalidate_recordset()
+        self.assertTrue(snapshot.stale)
+
+        self.env.cr.precommit.run()
+        tracking = visitor.message_ids.tracking_value_ids.filtered(lambda value: value.field_id.name == 'access_code')
+        self.assertEqual(tracking.new_value_char, '654321')
+
+    def test_batch_write_compact_audit(self):
+        self.env['ir.config_parameter'].sudo().set_param(COMPACT_AUDIT_PARAM, 'True')
+        visitor = self._create_visitor()
+        visitor._write_gate_codes({visitor.id: '654321'})
+        self.env.cr.precommit.run()
+        log = self.env['gate.audit.log'].search([('res_model', '=', 'mygate.visitor'), ('res_id', '=', visitor.id)])
+        self.assertEqual(log.changes, {'access_code': [False, '654321']})
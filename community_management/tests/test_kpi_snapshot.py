@@ -0,0 +1,95 @@
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import tagged, new_test_user
+
+from .common import CommunityCommon
+
+
+@tagged('post_install', '-at_install')
+class TestKpiSnapshot(CommunityCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Snapshot = cls.env['community.kpi.snapshot']
+        cls.refresh_cron = cls.env.ref('community_management.ir_cron_community_kpi_snapshot_refresh')
+
+    def _create_snapshot(self, **vals):
+        return self.Snapshot.create({
+            'dashboard': 'saas.master.dashboard',
+            'community_id': self.community.id,
+            'scope': self.Snapshot._get_scope(),
+            'user_id': self.env.uid,
+            'date': fields.Date.context_today(self.Snapshot),
+            'kpi_values': {'active_notices': 7},
+            'computed_at': fields.Datetime.now(),
+            'stale': False,
+            **vals,
+        })
+
+    def _count_refresh_triggers(self):
+        return self.env['ir.cron.trigger'].search_count([('cron_id', '=', self.refresh_cron.id)])
+
+    def test_only_kpi_fields_mark_stale(self):
+        snapshot = self._create_snapshot()
+        self.flat.write({'name': 'A-102'})
+        snapshot.invalidate_recordset()
+        self.assertFalse(snapshot.stale)
+
+        triggers = self._count_refresh_triggers()
+        self.flat.write({'status': 'available'})
+        snapshot.invalidate_recordset()
+        self.assertTrue(snapshot.stale)
+        self.assertEqual(self._count_refresh_triggers(), triggers + 1)
+
+        # Already stale: no new trigger
+        self.flat.write({'status': 'occupied'})
+        self.assertEqual(self._count_refresh_triggers(), triggers + 1)
+
+    def test_load_serves_last_snapshot(self):
+        yesterday = fields.Date.context_today(self.Snapshot) - timedelta(days=1)
+        previous = self._create_snapshot(date=yesterday)
+        triggers = self._count_refresh_triggers()
+
+        dashboard = self.env['saas.master.dashboard'].new({'community_id': self.community.id})
+        self.Snapshot._load(dashboard)
+        self.assertEqual(dashboard.active_notices, 7)
+        self.assertEqual(dashboard.kpi_as_of, previous.computed_at)
+        self.assertTrue(dashboard.kpi_stale)
+        self.assertEqual(self._count_refresh_triggers(), triggers + 1)
+
+        requested = self.Snapshot.search([
+            ('community_id', '=', self.community.id),
+            ('date', '=', fields.Date.context_today(self.Snapshot)),
+        ])
+        self.assertTrue(requested.stale)
+        self.assertFalse(requested.computed_at)
+
+        requested._refresh()
+        self.assertFalse(requested.stale)
+        self.assertTrue(requested.computed_at)
+        # Feeds are rendered on load, never stored
+        self.assertIn('active_notices', requested.kpi_values)
+        self.assertNotIn('recent_notices', requested.kpi_values)
+
+    def test_scope_follows_access(self):
+        president_1, president_2 = (
+            new_test_user(self.env, login=login,
+                          groups='base.group_user,community_management.group_community_president')
+            for login in ('president_1', 'president_2')
+        )
+        guard = new_test_user(self.env, login='kpi_guard',
+                              groups='base.group_user,community_management.group_community_security_guard')
+        portal_1, portal_2 = (
+            new_test_user(self.env, login=login, groups='base.group_portal')
+            for login in ('kpi_portal_1', 'kpi_portal_2')
+        )
+        self.assertEqual(self.Snapshot.sudo()._get_scope(), 'superuser')
+        self.assertEqual(self.Snapshot.with_user(president_1)._get_scope(),
+                         self.Snapshot.with_user(president_2)._get_scope())
+        self.assertNotEqual(self.Snapshot.with_user(president_1)._get_scope(),
+                            self.Snapshot.with_user(guard)._get_scope())
+        # Their own records only
+        self.assertNotEqual(self.Snapshot.with_user(portal_1)._get_scope(),
+                            self.Snapshot.with_user(portal_2)._get_scope())
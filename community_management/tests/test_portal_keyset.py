@@ -0,0 +1,42 @@
+from datetime import datetime
+
+from odoo.tests import TransactionCase, tagged
+
+from ..controllers.portal_keyset import keyset_search
+
+
+@tagged('post_install', '-at_install')
+class TestPortalKeyset(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.partners = cls.env['res.partner'].create([{'name': 'Keyset %s' % i} for i in range(5)])
+        # Same second, different microseconds, in reverse id order
+        for microsecond, partner in enumerate(reversed(cls.partners)):
+            cls.env.cr.execute(
+                "UPDATE res_partner SET create_date = %s WHERE id = %s",
+                (datetime(2026, 1, 5, 10, 0, 0, microsecond * 1000), partner.id),
+            )
+        cls.partners.invalidate_recordset(['create_date'])
+        cls.domain = [('id', 'in', cls.partners.ids)]
+
+    def _walk(self, order, limit):
+        seen = self.env['res.partner']
+        cursor = None
+        while True:
+            records, cursor = keyset_search(self.env['res.partner'], self.domain, order, cursor, limit=limit)
+            seen += records
+            if not cursor:
+                return seen
+
+    def test_pages_cover_rows_of_the_same_second(self):
+        for order in ('create_date desc', 'create_date asc'):
+            for limit in (1, 2, 3):
+                seen = self._walk(order, limit)
+                self.assertEqual(len(seen), len(self.partners), (order, limit))
+                self.assertEqual(set(seen.ids), set(self.partners.ids), (order, limit))
+
+    def test_pages_follow_order(self):
+        seen = self._walk('create_date desc', 2)
+        self.assertEqual(seen.ids, self.partners.ids)
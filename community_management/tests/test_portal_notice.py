@@ -0,0 +1,44 @@
+from odoo.tests import HttpCase, tagged, new_test_user
+
+from .common import CommunityCommon
+
+
+@tagged('post_install', '-at_install')
+class TestPortalNotice(CommunityCommon, HttpCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tenant = new_test_user(cls.env, login='notice_tenant', groups='base.group_portal')
+        cls.flat.tenant_id = cls.tenant.partner_id
+        cls.notice = cls.env['property.notice.board'].create({
+            'name': 'Water Supply Interruption',
+            'notice_type': 'society',
+            'community_id': cls.community.id,
+        })
+
+    def test_notice_page_marks_read(self):
+        Notice = self.env['property.notice.board']
+        partner = self.tenant.partner_id
+        self.assertEqual(Notice._get_unread_count(partner), 1)
+
+        self.authenticate('notice_tenant', 'notice_tenant')
+        response = self.url_open('/my/notice/%s' % self.notice.id)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("fetch('/my/notice/' + noticeId + '/read'", response.text)
+        # Displaying the page alone does not mark it read
+        self.assertEqual(Notice._get_unread_count(partner), 1)
+
+        # Wait for the page's own script to post the read marker
+        self.browser_js('/my/notice/%s' % self.notice.id, """
+            (function poll() {
+                const posted = performance.getEntriesByType('resource').some(
+                    (entry) => entry.name.endsWith('/my/notice/%s/read') && entry.responseEnd > 0);
+                if (posted) {
+                    console.log('test successful');
+                } else {
+                    setTimeout(poll, 50);
+                }
+            })();
+        """ % self.notice.id, login='notice_tenant')
+        self.assertEqual(Notice._get_unread_count(partner), 0)
@@ -0,0 +1,30 @@
+from odoo.tests import HttpCase, tagged, new_test_user
+
+
+@tagged('post_install', '-at_install')
+class TestPortalSecurityGuards(HttpCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env['res.partner'].search([('is_security_guard', '=', True)]).is_security_guard = False
+        cls.guards = cls.env['res.partner'].create([
+            {'name': 'Guard %02d' % i, 'is_security_guard': True} for i in range(13)
+        ])
+        new_test_user(cls.env, login='guard_directory_portal', groups='base.group_portal')
+
+    def test_pager_links_resolve(self):
+        self.authenticate('guard_directory_portal', 'guard_directory_portal')
+        response = self.url_open('/my/community_management')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('/my/community_management/page/2', response.text)
+
+        response = self.url_open('/my/community_management/page/2')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Guard 12', response.text)
+        self.assertNotIn('Guard 00', response.text)
+
+        # Former pager URL
+        response = self.url_open('/my/community_management/2')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Guard 12', response.text)